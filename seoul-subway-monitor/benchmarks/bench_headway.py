@@ -0,0 +1,52 @@
+"""
+배차 간격 분석 벤치마크 (src/headway.py)
+
+14개 호선 하루치 합성 위치 데이터(benchmarks/synthetic.py)를 만들고
+도착 추출 -> 간격 계산 -> 몰림/벌어짐 표시 단계별 처리 시간과 처리량을 측정합니다.
+
+사용법 (프로젝트 루트에서):
+    python -m benchmarks.bench_headway
+    python -m benchmarks.bench_headway --days 3 --trains 80
+"""
+import argparse
+import time
+from benchmarks.synthetic import generate_positions
+from src.headway import compute_headways, detect_arrivals, flag_irregular, summarize_stations
+
+
+def _timed(label, func, *args):
+    """함수를 실행하고 소요 시간을 출력한 뒤 결과를 반환합니다."""
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"- {label:<12} {elapsed:7.2f}초 ({len(result):,}행)")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="배차 간격 분석 벤치마크")
+    parser.add_argument("--days", type=int, default=1, help="생성할 일수")
+    parser.add_argument("--trains", type=int, default=60, help="호선별 운행 열차 수")
+    parser.add_argument("--sample-seconds", type=float, default=30, help="수집 주기(초)")
+    args = parser.parse_args()
+
+    print(f"[준비] 14개 호선 x {args.trains}대 x {args.days}일 합성 데이터 생성 중...")
+    started = time.perf_counter()
+    df = generate_positions(trains_per_line=args.trains, days=args.days, sample_seconds=args.sample_seconds)
+    print(f"[준비] {len(df):,}행 생성 ({time.perf_counter() - started:.1f}초, "
+          f"{df.memory_usage(deep=True).sum() / 1024 ** 2:.0f}MB)")
+
+    print("\n[측정]")
+    arrivals, t_arrivals = _timed("도착 추출", detect_arrivals, df)
+    headways, t_headways = _timed("간격 계산", compute_headways, arrivals)
+    flagged, t_flags = _timed("불규칙 표시", flag_irregular, headways)
+    summary, t_summary = _timed("역별 요약", summarize_stations, flagged)
+
+    total = t_arrivals + t_headways + t_flags + t_summary
+    print(f"\n[결과] 전체 {total:.2f}초, {len(df) / total:,.0f}행/초 | "
+          f"역/방향 {len(summary):,}개, 몰림 {int(flagged['is_bunching'].sum()):,}건, "
+          f"벌어짐 {int(flagged['is_gap'].sum()):,}건")
+
+
+if __name__ == "__main__":
+    main()
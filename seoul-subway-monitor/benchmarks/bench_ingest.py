@@ -0,0 +1,136 @@
+"""
+수집 경로 부하 벤치마크 (src/main.job + 로컬 대역 서버)
+
+녹화 fixture(또는 합성 fixture)를 서울시 API 대역 서버로 재생하고, 삽입 요청은 PostgREST 대역 서버가 받도록 해
+실제 서비스 없이 job()을 실시간의 1x ~ 100x 속도(주기 간격 = 60초 / 배속)로 반복 실행합니다.
+열차 수 배수(fleet)별로 주기 소요 시간 백분위수(p50/p95/p99), 주기 초과 횟수, 저장 처리량(행/초),
+메모리(RSS)를 출력합니다. 수집기와 같은 변경분 필터와 실시간 분석기(observers)를 붙여 실행합니다.
+
+사용법 (프로젝트 루트에서):
+    python -m benchmarks.bench_ingest
+    python -m benchmarks.bench_ingest --speeds 1 10 100 --fleets 1 10 --cycles 20
+    python -m benchmarks.bench_ingest --fixture benchmarks/fixtures/realtime_position.jsonl.gz --api-latency-ms 30
+"""
+import argparse
+import contextlib
+import io
+import os
+import resource
+import time
+from benchmarks.replay import DEFAULT_FIXTURE, PostgrestStandIn, SeoulApiStandIn, load_fixture, synthetic_fixture
+from src.api_client import SeoulSubwayClient
+from src.config import Config
+from src.db_client import SupabaseClient
+from src.dedup import ChangeFilter
+from src.main import _build_observers, job
+from src.pipeline import IngestPipeline
+from src.rate_limiter import RateLimiter
+
+REAL_INTERVAL = 60  # 수집기 실제 주기(초)
+
+
+def rss_mb():
+    """현재 프로세스 RSS(MB) (/proc이 없으면 최대 RSS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_scenario(cycles, speed, fleet, n_cycles, rate_limit, api_latency, db_latency):
+    """
+    배속/열차 배수 한 조합으로 job()을 n_cycles번 실행합니다.
+
+    Returns:
+        dict: latencies, overruns, rows(수신), written, failed, elapsed, rss_before, rss_after
+    """
+    interval = REAL_INTERVAL / speed
+    api = SeoulApiStandIn(cycles, fleet_multiplier=fleet, latency=api_latency).start()
+    db = PostgrestStandIn(latency=db_latency).start()
+
+    api_client = SeoulSubwayClient(rate_limiter=RateLimiter(rate_limit) if rate_limit > 0 else None)
+    api_client.base_url = f"{api.url}/api/subway"
+    db_client = SupabaseClient()
+    db_client.supabase_url = db.url
+    pipeline = IngestPipeline(db_client).start()
+    change_filter = ChangeFilter(Config.DEDUP_TTL_SECONDS) if Config.DEDUP_ENABLED else None
+    observers = _build_observers()
+
+    rss_before = rss_mb()
+    latencies = []
+    overruns = 0
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for index in range(n_cycles):
+                tick = started + index * interval
+                time.sleep(max(0.0, tick - time.perf_counter()))
+                api.set_cycle(index)
+                t0 = time.perf_counter()
+                job(api_client, pipeline, change_filter, observers)
+                latency = time.perf_counter() - t0
+                latencies.append(latency)
+                overruns += latency > interval
+            pipeline.close()
+    finally:
+        elapsed = time.perf_counter() - started
+        api_client.close()
+        api.close()
+        db.close()
+
+    stats = pipeline.stats.snapshot()
+    return {
+        "latencies": latencies,
+        "overruns": overruns,
+        "rows": sum(api.rows_per_cycle[i % len(api.rows_per_cycle)] for i in range(n_cycles)),
+        "written": stats["written_rows"],
+        "failed": stats["failed_rows"] + stats["dropped_rows"],
+        "db_rows": db.row_count,
+        "elapsed": elapsed,
+        "rss_before": rss_before,
+        "rss_after": rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="수집 경로 부하 벤치마크 (대역 서버 재생)")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="재생할 fixture (없으면 합성 fixture 사용)")
+    parser.add_argument("--speeds", type=float, nargs="+", default=[10, 100], help="배속 목록 (1 = 실제 1분 주기)")
+    parser.add_argument("--fleets", type=int, nargs="+", default=[1, 10], help="열차 수 배수 목록")
+    parser.add_argument("--cycles", type=int, default=10, help="조합별 실행 주기 수")
+    parser.add_argument("--trains", type=int, default=60, help="합성 fixture의 호선별 열차 수")
+    parser.add_argument("--rate-limit", type=float, default=0, help="초당 API 요청 제한 (0: 제한 없음, 수집기 기본값은 API_RATE_LIMIT)")
+    parser.add_argument("--api-latency-ms", type=float, default=0, help="API 대역 서버 응답 지연(ms)")
+    parser.add_argument("--db-latency-ms", type=float, default=0, help="DB 대역 서버 응답 지연(ms)")
+    args = parser.parse_args()
+
+    if os.path.exists(args.fixture):
+        cycles = load_fixture(args.fixture)
+        print(f"[준비] 녹화 fixture {args.fixture}: {len(cycles)}주기")
+    else:
+        cycles = synthetic_fixture(max(args.cycles, 2), args.trains)
+        print(f"[준비] 합성 fixture: {len(cycles)}주기, 호선 {len(cycles[0])}개 x {args.trains}대")
+
+    print(f"\n{'배속':>5} | {'배수':>4} | {'주기(초)':>8} | {'p50':>7} | {'p95':>7} | {'p99':>7} | {'초과':>4} | "
+          f"{'수신 행':>9} | {'저장 행/초':>10} | {'실패':>5} | {'RSS(MB)':>14}")
+    print("-" * 112)
+    for fleet in args.fleets:
+        for speed in args.speeds:
+            result = run_scenario(cycles, speed, fleet, args.cycles, args.rate_limit,
+                                  args.api_latency_ms / 1000, args.db_latency_ms / 1000)
+            latencies = result["latencies"]
+            print(f"{speed:>4g}x | {fleet:>3}x | {REAL_INTERVAL / speed:>8.2f} | "
+                  f"{percentile(latencies, 0.5):>6.3f}s | {percentile(latencies, 0.95):>6.3f}s | "
+                  f"{percentile(latencies, 0.99):>6.3f}s | {result['overruns']:>4} | {result['rows']:>9,} | "
+                  f"{result['written'] / result['elapsed']:>10,.0f} | {result['failed']:>5} | "
+                  f"{result['rss_before']:>6.0f} -> {result['rss_after']:<5.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+호선별 병렬 분석 벤치마크 (src/parallel_analysis.py)
+
+합성 위치 데이터(benchmarks/synthetic.py)를 임시 로컬 Parquet 저장소에 기록한 뒤
+워커 프로세스 수를 바꿔 가며 run_parallel_analysis()의 전체 소요 시간과 속도 향상 배율을 측정합니다.
+(동기화, 차트 생성, 분석 캐시는 끄고 데이터 읽기 + 체류/배차 간격/기준선 계산 + 병합만 측정)
+마지막에 워커에서 모은 분석 단계별 소요 시간(src/metrics.py)을 함께 출력합니다.
+
+사용법 (프로젝트 루트에서):
+    python -m benchmarks.bench_parallel
+    python -m benchmarks.bench_parallel --days 3 --workers 1 2 4 8
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import numpy as np
+from benchmarks.synthetic import generate_positions
+from src import metrics
+from src.analysis_cache import AnalysisCache
+from src.local_store import LocalStore
+from src.parallel_analysis import run_parallel_analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description="호선별 병렬 분석 벤치마크")
+    parser.add_argument("--days", type=int, default=1, help="생성할 일수")
+    parser.add_argument("--trains", type=int, default=60, help="호선별 운행 열차 수")
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="측정할 워커 수 목록 (기본: 1, 2, 4, ... CPU 코어 수)")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    workers_list = args.workers or sorted({1, *[2 ** i for i in range(1, 5) if 2 ** i < cpus], cpus})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "store")
+        print(f"[준비] 14개 호선 x {args.trains}대 x {args.days}일 합성 데이터 생성 및 저장 중...")
+        df = generate_positions(trains_per_line=args.trains, days=args.days)
+        df.insert(0, "id", np.arange(1, len(df) + 1))
+        store = LocalStore(root)
+        for day, chunk in df.groupby(df["created_at"].dt.date, sort=True):
+            store._write(chunk)
+        lines = list(df["line_name"].cat.categories)
+        start, end = df["created_at"].min(), df["created_at"].max() + np.timedelta64(1, "s")
+        print(f"[준비] {len(df):,}행 저장 ({cpus}코어)")
+        del df
+
+        print("\n[측정]")
+        base = None
+        for workers in workers_list:
+            # 매 실행마다 빈 기준선에서 시작하도록 기준선 파일을 분리
+            options = dict(workers=workers, lines=lines, source="local", root=root, start=start, end=end,
+                           sync=False, render_charts=False, cache=AnalysisCache(enabled=False),
+                           baseline_file=os.path.join(tmp, f"baselines_{workers}.json"),
+                           report_file=os.path.join(tmp, "report.md"))
+            cwd = os.getcwd()
+            os.chdir(tmp)  # 결과 CSV가 프로젝트 폴더에 남지 않도록
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stats = run_parallel_analysis(**options)
+            finally:
+                os.chdir(cwd)
+            base = base or stats["wall_seconds"]
+            print(f"- 워커 {stats['workers']:2d}개  {stats['wall_seconds']:6.2f}초  x{base / stats['wall_seconds']:.2f}  "
+                  f"(호선별 합계 {stats['line_seconds']:.2f}초, 정차 {stats['events']:,}건, 지연 {stats['outliers']:,}건)")
+
+    print("\n[단계별 소요 시간] (모든 실행 합계)")
+    for item in metrics.REGISTRY.snapshot():
+        if item["name"] == metrics.ANALYSIS_SECONDS.name:
+            print(f"- {item['labels']['step']:<28} {item['sum']:7.2f}초 / {item['count']:,}회")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+분석 캐시 / 시간대별 누적 보고서 벤치마크 (src/analysis_cache.py, run_report_series)
+
+합성 위치 데이터(benchmarks/synthetic.py) N일치를 임시 로컬 Parquet 저장소에 기록한 뒤 일 단위 누적 보고서를 만들며
+다음 실행들의 소요 시간을 비교합니다.
+1. 캐시 없음: 모든 시간대를 매번 다시 계산 (기존 방식)
+2. 첫 실행: 빈 캐시에서 모든 시간대를 계산하고 캐시에 저장
+3. 재실행: 보고서에 이미 있는 시간대는 건너뜀
+4. 보고서 재생성: 새 보고서 파일을 만들되 모든 호선 결과를 캐시에서 읽음 (첫 실행과 정차 건수/평균이 같은지 검사)
+5. 하루 추가: 다음 날 데이터를 저장소에 추가하고 하루 뒤 시각으로 실행 (새 시간대 하나만 계산해 끝에 추가)
+이어서 기본 report 경로(최근 24시간, run_parallel_analysis)를 기준 시각을 옮겨 가며 실행해
+닫힌 1시간 구간은 캐시에서 읽고 열린 꼬리만 다시 계산하는지 확인합니다.
+차트는 matplotlib/seaborn이 있는 환경에서만 --charts로 켭니다.
+
+사용법 (프로젝트 루트에서):
+    python -m benchmarks.bench_report_cache
+    python -m benchmarks.bench_report_cache --days 5 --trains 80 --charts
+"""
+import argparse
+import contextlib
+import io
+import os
+import re
+import tempfile
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import generate_positions
+from src import metrics
+from src.analysis_cache import CACHE_LOOKUPS, AnalysisCache
+from src.dwell import KST
+from src.local_store import LocalStore
+from src.parallel_analysis import run_parallel_analysis, run_report_series
+from src.schema import LOCAL_TZ
+
+SUMMARY = re.compile(r"정차 횟수\*\*: (\d+)건, \*\*평균 체류 시간\*\*: ([\d.]+)분")
+
+
+def write_days(store, df, days):
+    """df에서 지정한 날짜(한국 시간 기준 운행 시작일)의 행만 저장소에 기록합니다."""
+    service_day = (df["created_at"].dt.tz_convert(LOCAL_TZ) - np.timedelta64(5, "h")).dt.date
+    for day, chunk in df[service_day.isin(days)].groupby(service_day, sort=True):
+        store._write(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="분석 캐시 / 누적 보고서 벤치마크")
+    parser.add_argument("--days", type=int, default=3, help="처음 저장할 일수 (하루는 나중에 추가)")
+    parser.add_argument("--trains", type=int, default=60, help="호선별 운행 열차 수")
+    parser.add_argument("--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--charts", action="store_true", help="차트도 생성 (matplotlib/seaborn 필요)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "store")
+        print(f"[준비] 14개 호선 x {args.trains}대 x {args.days + 1}일 합성 데이터 생성 중...")
+        df = generate_positions(trains_per_line=args.trains, days=args.days + 1)
+        df.insert(0, "id", np.arange(1, len(df) + 1))
+        dates = sorted(set((df["created_at"].dt.tz_convert(LOCAL_TZ) - np.timedelta64(5, "h")).dt.date))
+        store = LocalStore(root)
+        write_days(store, df, dates[:-1])
+        lines = list(df["line_name"].cat.categories)
+        print(f"[준비] {args.days}일치 저장, 하루치는 5번 실행 전에 추가 ({len(df):,}행 중)")
+
+        first_day = datetime.combine(dates[0], datetime.min.time(), KST)
+        now = first_day + timedelta(days=args.days)
+        cache = AnalysisCache(os.path.join(tmp, "cache"))
+
+        def run(name, report, now, cache, windows=args.days):
+            before = {(labels["kind"], labels["result"]): value for labels, value in CACHE_LOOKUPS.items()}
+            options = dict(freq="day", windows=windows, workers=args.workers, lines=lines, source="local", root=root,
+                           sync=False, render_charts=args.charts, image_dir=os.path.join(tmp, "images"),
+                           baseline_file=os.path.join(tmp, f"baselines_{report}.json"),
+                           report_file=os.path.join(tmp, f"{report}.md"), cache=cache, now=now)
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = run_report_series(**options)
+            wall = time.perf_counter() - started
+            lookups = {(labels["kind"], labels["result"]): value - before.get((labels["kind"], labels["result"]), 0)
+                       for labels, value in CACHE_LOOKUPS.items()}
+            print(f"- {name:<14} {wall:7.2f}초  시간대 추가 {stats['added']}개  "
+                  f"호선 캐시 적중 {lookups.get(('line', 'hit'), 0):>3} / 미스 {lookups.get(('line', 'miss'), 0):>3}  "
+                  f"차트 적중 {lookups.get(('chart', 'hit'), 0)}")
+            return wall
+
+        print(f"\n[측정] 일 단위 누적 보고서, 최근 {args.days}일")
+        run("1. 캐시 없음", "nocache", now, AnalysisCache(enabled=False))
+        cold = run("2. 첫 실행", "series", now, cache)
+        run("3. 재실행", "series", now, cache)
+        warm = run("4. 보고서 재생성", "rebuilt", now, cache)
+
+        # 정차 이벤트 수/평균은 같아야 함 (임계값은 기준선 스케치의 무작위 압축 때문에 실행마다 조금씩 다를 수 있음)
+        summaries = []
+        for report in ("series", "rebuilt"):
+            with open(os.path.join(tmp, f"{report}.md"), encoding="utf-8") as f:
+                summaries.append(SUMMARY.findall(f.read()))
+        same = summaries[0] == summaries[1] and len(summaries[0]) == args.days
+        print(f"  -> 첫 실행 대비 x{cold / warm:.1f}, 시간대별 정차 건수/평균 {'일치' if same else '불일치'}")
+
+        write_days(store, df, dates[-1:])
+        run("5. 하루 추가", "series", now + timedelta(days=1), cache)
+        with open(os.path.join(tmp, "series.md"), encoding="utf-8") as f:
+            sections = f.read().count("<!-- window: ")
+        print(f"  -> 보고서 섹션 {sections}개 (기존 {args.days}개 + 새 시간대 1개)")
+
+        def segment_hits():
+            return sum(value for labels, value in CACHE_LOOKUPS.items()
+                       if labels["kind"] == "segment" and labels["result"] == "hit")
+
+        # 기준 시각까지의 행만 별도 저장소에 추가하며 실행 (동기화로 새 파일이 붙는 것과 같은 상황)
+        rolling_root = os.path.join(tmp, "rolling_store")
+        rolling_store = LocalStore(rolling_root)
+        written = [pd.Timestamp(now) - pd.Timedelta(hours=13)]  # 첫 실행의 조회 범위(정오 기준 24시간 + 여유 시간)를 덮는 시작점
+
+        def rolling(name, now):
+            created = df["created_at"]
+            rolling_store._write(df[(created >= written[0]) & (created < pd.Timestamp(now))])
+            written[0] = pd.Timestamp(now)
+            before = segment_hits()
+            options = dict(hours=24, workers=args.workers, lines=lines, source="local", root=rolling_root, sync=False,
+                           render_charts=args.charts, image_dir=os.path.join(tmp, "images"),
+                           baseline_file=os.path.join(tmp, "baselines_rolling.json"),
+                           report_file=os.path.join(tmp, "rolling.md"), cache=cache, now=now)
+            cwd = os.getcwd()
+            os.chdir(tmp)  # 결과 CSV가 프로젝트 폴더에 남지 않도록
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stats = run_parallel_analysis(**options)
+            finally:
+                os.chdir(cwd)
+            print(f"- {name:<14} {stats['wall_seconds']:7.2f}초  구간 캐시 적중 "
+                  f"{segment_hits() - before:>3}  정차 {stats['events']:,}건")
+            return stats
+
+        noon = now + timedelta(hours=12)  # 마지막 날 정오 (열린 꼬리에도 데이터가 있도록)
+        print(f"\n[측정] 최근 24시간 report (기준 {noon:%Y-%m-%d %H:%M})")
+        first = rolling("6. 첫 실행", noon)
+        again = rolling("7. 10분 뒤", noon + timedelta(minutes=10))
+        rolling("8. 1시간 뒤", noon + timedelta(hours=1))
+        print(f"  -> 첫 실행 대비 x{first['wall_seconds'] / again['wall_seconds']:.1f} (10분 뒤 실행)")
+
+    print("\n[단계별 소요 시간] (모든 실행 합계)")
+    for item in metrics.REGISTRY.snapshot():
+        if item["name"] == metrics.ANALYSIS_SECONDS.name:
+            print(f"- {item['labels']['step']:<28} {item['sum']:7.2f}초 / {item['count']:,}회")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+적응형 폴링 스케줄러 시뮬레이션 벤치마크 (src/scheduler.py)
+
+하루(한국 시간 0시 ~ 24시)를 1초 단위 가상 시계로 진행하며 AdaptivePoller가 어떤 호선을 언제 수집하는지 재현합니다.
+호선별 운행 열차 수는 시간대 운행 곡선(심야 운행 없음, 출퇴근 최대)과 호선 규모로 만들고,
+지연 의심 구간(무작위 10분)과 막차 시간대(is_last_train)를 섞어 넣습니다.
+예산별로 하루 총 요청 수, 시간대/상황별 평균 수집 간격(샘플링 해상도)을 고정 1분 주기(하루 20160회)와 비교해 출력합니다.
+
+사용법 (프로젝트 루트에서):
+    python -m benchmarks.bench_scheduler
+    python -m benchmarks.bench_scheduler --budgets 10000 20160 40000 --lines
+"""
+import argparse
+import random
+from datetime import datetime
+from benchmarks.synthetic import LINE_NAMES
+from src.dwell import KST
+from src.scheduler import AdaptivePoller, parse_hours
+
+PEAK_HOURS = "7-9,18-20"
+NIGHT_HOURS = "1-5"
+LAST_TRAIN_HOURS = parse_hours("0-1")  # 0~1시: 막차 운행
+
+# 시간대별 운행 비율 (0시 ~ 23시, 최대 운행 대비)
+SERVICE_PROFILE = [0.3, 0.05, 0, 0, 0, 0.2, 0.6, 1.0, 1.0, 0.8, 0.6, 0.6,
+                   0.6, 0.6, 0.6, 0.6, 0.7, 0.8, 1.0, 1.0, 0.8, 0.7, 0.6, 0.5]
+
+
+def make_activity(seed, suspect_episodes):
+    """
+    호선별 규모와 지연 의심 구간을 만듭니다.
+
+    Returns:
+        tuple: (호선명 -> 최대 운행 열차 수, 호선명 -> [(시작 초, 끝 초), ...])
+    """
+    rng = random.Random(seed)
+    sizes = {line: rng.randint(15, 80) for line in LINE_NAMES}
+    suspects = {line: [] for line in LINE_NAMES}
+    for _ in range(suspect_episodes):
+        line = rng.choice(LINE_NAMES)
+        start = rng.randint(6 * 3600, 23 * 3600)
+        suspects[line].append((start, start + 600))
+    return sizes, suspects
+
+
+def simulate(budget, sizes, suspects, day_start):
+    """
+    가상 시계로 하루를 진행합니다.
+
+    Returns:
+        tuple: (poller, 호선명 -> 수집 시각(초) 리스트)
+    """
+    now = [day_start]
+
+    def suspect_counts():
+        t = now[0] - day_start
+        return {line: 1 for line, episodes in suspects.items() if any(a <= t < b for a, b in episodes)}
+
+    poller = AdaptivePoller(LINE_NAMES, budget, peak_hours=PEAK_HOURS, night_hours=NIGHT_HOURS,
+                            suspects=suspect_counts, clock=lambda: now[0])
+    polls = {line: [] for line in LINE_NAMES}
+    for second in range(24 * 3600):
+        now[0] = day_start + second
+        lines = poller.due()
+        hour = second // 3600
+        for line in lines:
+            polls[line].append(second)
+            trains = int(sizes[line] * SERVICE_PROFILE[hour])
+            last_train = hour in LAST_TRAIN_HOURS
+            poller.observe(line, [{"is_last_train": last_train}] * trains)
+    return poller, polls
+
+
+def mean_gap(times, condition):
+    """condition(직전 수집 시각)을 만족하는 구간의 평균 수집 간격(초)"""
+    gaps = [b - a for a, b in zip(times, times[1:]) if condition(a)]
+    return sum(gaps) / len(gaps) if gaps else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="적응형 폴링 스케줄러 시뮬레이션")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[10080, 20160], help="하루 요청 예산 목록")
+    parser.add_argument("--suspects", type=int, default=20, help="하루 지연 의심 구간 수 (10분씩)")
+    parser.add_argument("--seed", type=int, default=0, help="난수 시드")
+    parser.add_argument("--lines", action="store_true", help="호선별 결과도 출력")
+    args = parser.parse_args()
+
+    sizes, suspects = make_activity(args.seed, args.suspects)
+    day_start = datetime(2026, 1, 7, tzinfo=KST).timestamp()
+    peak, night = parse_hours(PEAK_HOURS), parse_hours(NIGHT_HOURS)
+
+    def in_suspect(line):
+        return lambda t: any(a <= t < b for a, b in suspects[line])
+
+    print(f"[비교 기준] 고정 1분 주기: 하루 {len(LINE_NAMES) * 1440:,}회, 모든 시간대 간격 60초")
+    print(f"\n{'예산':>7} | {'사용':>7} | {'출퇴근(초)':>9} | {'주간(초)':>8} | {'심야(초)':>8} | {'지연 의심(초)':>11} | {'막차(초)':>8}")
+    print("-" * 80)
+    for budget in args.budgets:
+        poller, polls = simulate(budget, sizes, suspects, day_start)
+
+        def average(condition_for):
+            values = [mean_gap(polls[line], condition_for(line)) for line in LINE_NAMES]
+            values = [v for v in values if v == v]
+            return sum(values) / len(values) if values else float("nan")
+
+        by_peak = average(lambda line: lambda t: t // 3600 in peak)
+        by_day = average(lambda line: lambda t: t // 3600 not in peak | night and t // 3600 not in LAST_TRAIN_HOURS)
+        by_night = average(lambda line: lambda t: t // 3600 in night)
+        by_suspect = average(in_suspect)
+        by_last = average(lambda line: lambda t: t // 3600 in LAST_TRAIN_HOURS)
+        used = sum(len(times) for times in polls.values())
+        print(f"{budget:>7,} | {used:>7,} | {by_peak:>9.1f} | {by_day:>8.1f} | {by_night:>8.1f} | "
+              f"{by_suspect:>11.1f} | {by_last:>8.1f}")
+
+        if args.lines:
+            for line in LINE_NAMES:
+                times = polls[line]
+                print(f"    - {line:<6} 최대 {sizes[line]:>2}대  요청 {len(times):>5,}회  "
+                      f"출퇴근 {mean_gap(times, lambda t: t // 3600 in peak):5.1f}초  "
+                      f"심야 {mean_gap(times, lambda t: t // 3600 in night):6.1f}초  "
+                      f"지연 의심 {mean_gap(times, in_suspect(line)):5.1f}초")
+
+
+if __name__ == "__main__":
+    main()
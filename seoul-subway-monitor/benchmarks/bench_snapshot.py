@@ -0,0 +1,96 @@
+"""
+실시간 스냅샷 API 벤치마크 (src/snapshot.py)
+
+14개 호선 x N대 열차의 수집 레코드로 LiveSnapshot을 채우고 로컬 포트에서 SnapshotServer를 띄운 뒤,
+keep-alive 연결 하나로 경로별 전체 응답(200)과 ETag 재검증 응답(304)의 처리량/지연 시간을 측정합니다.
+스냅샷 갱신(observe) 소요 시간도 함께 출력합니다.
+
+사용법 (프로젝트 루트에서):
+    python -m benchmarks.bench_snapshot
+    python -m benchmarks.bench_snapshot --trains 100 --requests 5000
+"""
+import argparse
+import http.client
+import time
+from urllib.parse import quote, unquote
+from benchmarks.synthetic import LINE_NAMES
+from src.snapshot import LiveSnapshot, SnapshotServer
+
+
+def make_records(line_index, line_name, trains, stations=40, tick=0):
+    """수집기 transform() 결과와 같은 형태의 호선 레코드를 만듭니다."""
+    line_id = 1001 + line_index
+    records = []
+    for k in range(trains):
+        station = (k * stations // trains + tick) % stations
+        records.append({
+            "line_id": line_id, "line_name": line_name,
+            "station_id": line_id * 1000000 + 100 + station, "station_name": f"{line_name}-{station}",
+            "train_number": f"{line_index * 1000 + k:04d}", "last_rec_date": "2026-01-07",
+            "last_rec_time": f"2026-01-07T08:{tick % 60:02d}:00+09:00", "direction_type": k % 2,
+            "dest_station_id": line_id * 1000000 + 100, "dest_station_name": f"{line_name}-0",
+            "train_status": k % 3, "is_express": 0, "is_last_train": False,
+        })
+    return records
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def bench_path(conn, path, requests, revalidate):
+    """같은 경로를 반복 요청해 (처리량, p50, p99, 응답 크기)를 반환합니다."""
+    latencies = []
+    etag = None
+    size = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        headers = {"If-None-Match": etag} if revalidate and etag else {}
+        t0 = time.perf_counter()
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        body = response.read()
+        latencies.append(time.perf_counter() - t0)
+        etag = response.getheader("ETag")
+        size = max(size, len(body))
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.99), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="실시간 스냅샷 API 벤치마크")
+    parser.add_argument("--trains", type=int, default=60, help="호선별 열차 수")
+    parser.add_argument("--requests", type=int, default=2000, help="경로별 요청 횟수")
+    args = parser.parse_args()
+
+    snapshot = LiveSnapshot()
+    started = time.perf_counter()
+    for tick in range(10):
+        for i, line in enumerate(LINE_NAMES):
+            snapshot.observe(line, make_records(i, line, args.trains, tick=tick))
+    update = (time.perf_counter() - started) / (10 * len(LINE_NAMES))
+    print(f"[준비] {len(LINE_NAMES)}개 호선 x {args.trains}대, 호선 스냅샷 갱신 {update * 1e3:.2f}ms/회")
+
+    server = SnapshotServer(snapshot, port=0).start()
+    host, port = server.httpd.server_address[:2]
+    conn = http.client.HTTPConnection(host, port)
+    paths = ["/lines", "/trains", f"/lines/{quote('2호선')}", f"/stations/{quote('2호선-10')}", "/trains/1005"]
+
+    print(f"\n[측정] {args.requests}회씩, keep-alive 연결 1개")
+    print(f"{'경로':<20} | {'모드':<4} | {'요청/초':>9} | {'p50(ms)':>8} | {'p99(ms)':>8} | {'응답(KB)':>8}")
+    print("-" * 72)
+    try:
+        for path in paths:
+            for revalidate in (False, True):
+                rate, p50, p99, size = bench_path(conn, path, args.requests, revalidate)
+                print(f"{unquote(path):<20} | {'304' if revalidate else '200':<4} | {rate:>9,.0f} | "
+                      f"{p50 * 1e3:>8.3f} | {p99 * 1e3:>8.3f} | {size / 1024:>8.1f}")
+    finally:
+        conn.close()
+        server.close()
+    print(f"\n[스냅샷] {snapshot.end_cycle()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+저장 대기열 장애 복구 벤치마크 (src/spool.py + IngestPipeline 재전송 스레드)
+
+PostgREST 대역 서버를 장애 상태(모든 요청 503)로 두고 N분 분량의 수집 주기를 파이프라인에 넣어
+저장 대기열에 쌓은 뒤, 서버를 복구시켜 밀린 분량을 모두 채우는 데 걸리는 시간(복구 처리량)을 측정합니다.
+복구 중 일부 요청은 저장 후 응답을 잃게 해(504) 재전송이 일어나도 중복 행이 생기지 않는지 함께 검사합니다.
+재전송 묶음 크기(drain_rows)별로 반복하고, 대기열 크기 제한(--max-mb)을 작게 주면 오래된 배치를 버리는 동작도 확인할 수 있습니다.
+
+사용법 (프로젝트 루트에서):
+    python -m benchmarks.bench_spool
+    python -m benchmarks.bench_spool --outage-minutes 360 --fleet 2 --drain-rows 5000 20000 50000
+    python -m benchmarks.bench_spool --outage-minutes 120 --max-mb 2
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from benchmarks.replay import PostgrestStandIn, multiply_fleet, synthetic_fixture
+from src.db_client import SupabaseClient
+from src.pipeline import IngestPipeline
+from src.spool import WriteAheadSpool
+
+
+def wait_until(condition, timeout=600, poll=0.01):
+    """condition()이 참이 될 때까지 기다린 시간(초)을 반환합니다. (시간 초과 시 None)"""
+    started = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - started > timeout:
+            return None
+        time.sleep(poll)
+    return time.perf_counter() - started
+
+
+def run_scenario(batches, drain_rows, max_bytes, lost_rate, db_latency, workdir):
+    """
+    장애 -> 복구 한 번을 실행합니다.
+
+    Args:
+        batches (list): 주기별 호선 레코드 리스트의 리스트 (transform 결과)
+
+    Returns:
+        dict: rows, spool_seconds, spool_file_mb, evicted, recovery_seconds, stored, duplicates, lost, retries
+    """
+    path = os.path.join(workdir, f"spool_{drain_rows}.sqlite3")
+    db = PostgrestStandIn(lost_response_rate=lost_rate, latency=db_latency).start()
+    db.down = True
+    db_client = SupabaseClient()
+    db_client.supabase_url = db.url
+    spool = WriteAheadSpool(path, max_bytes)
+    pipeline = IngestPipeline(db_client, spool=spool, drain_rows=drain_rows, retry_max=0.2).start()
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            # 1. 장애 구간: 주기마다 호선별 레코드를 넣고 플러시 (모두 대기열에 쌓임)
+            rows = 0
+            started = time.perf_counter()
+            for cycle in batches:
+                for records in cycle:
+                    pipeline.put(records)
+                    rows += len(records)
+                pipeline.flush()
+            wait_until(lambda: pipeline.depth() == 0 and spool.rows + spool.evicted_rows >= rows)
+            spool_seconds = time.perf_counter() - started
+            depth = spool.depth()
+
+            # 2. 복구: 서버를 되살리고 대기열이 빌 때까지 측정
+            db.down = False
+            pipeline._wake.set()
+            recovery = wait_until(lambda: pipeline.backlog() == 0)
+            pipeline.close()
+    finally:
+        db.close()
+        spool.close()
+
+    stats = pipeline.stats.snapshot()
+    return {
+        "rows": rows,
+        "spool_seconds": spool_seconds,
+        "spool_file_mb": depth["file_bytes"] / 1024 ** 2,
+        "backlog": depth["rows"],
+        "evicted": depth["evicted_rows"],
+        "recovery_seconds": recovery,
+        "stored": db.row_count,
+        "duplicates": db.duplicate_rows,
+        "lost": db.lost_responses,
+        "retries": stats["retries"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="저장 대기열 장애 복구 벤치마크")
+    parser.add_argument("--outage-minutes", type=int, default=180, help="장애 기간(분, = 쌓이는 수집 주기 수)")
+    parser.add_argument("--trains", type=int, default=60, help="합성 fixture의 호선별 열차 수")
+    parser.add_argument("--fleet", type=int, default=1, help="열차 수 배수")
+    parser.add_argument("--drain-rows", type=int, nargs="+", default=[5000, 20000], help="재전송 묶음 크기 목록")
+    parser.add_argument("--max-mb", type=float, default=512, help="대기열 최대 크기(MB)")
+    parser.add_argument("--lost-rate", type=float, default=0.05, help="복구 중 저장 후 응답을 잃는 요청 비율")
+    parser.add_argument("--db-latency-ms", type=float, default=0, help="DB 대역 서버 응답 지연(ms)")
+    args = parser.parse_args()
+
+    # 합성 fixture 30주기를 반복해 장애 기간만큼의 주기를 만듦 (적재 시각이 달라 서로 다른 행으로 저장됨)
+    fixture = synthetic_fixture(min(args.outage_minutes, 30), args.trains)
+    transformer = SupabaseClient()
+    cycles = [[transformer.transform(multiply_fleet(rows, args.fleet)) for rows in lines.values()] for lines in fixture]
+    batches = [cycles[i % len(cycles)] for i in range(args.outage_minutes)]
+    total = sum(len(records) for cycle in batches for records in cycle)
+    print(f"[준비] 장애 {args.outage_minutes}분 x 주기당 {total // args.outage_minutes:,}건 = {total:,}건, "
+          f"응답 유실 {args.lost_rate:.0%}, 대기열 제한 {args.max_mb:g}MB")
+
+    print(f"\n{'묶음(행)':>8} | {'적재(초)':>8} | {'파일(MB)':>8} | {'버림':>7} | {'복구(초)':>8} | {'복구 행/초':>10} | "
+          f"{'저장 행':>9} | {'중복 무시':>8} | {'재시도':>6} | 검사")
+    print("-" * 108)
+    with tempfile.TemporaryDirectory() as tmp:
+        for drain_rows in args.drain_rows:
+            result = run_scenario(batches, drain_rows, int(args.max_mb * 1024 ** 2), args.lost_rate,
+                                  args.db_latency_ms / 1000, tmp)
+            recovery = result["recovery_seconds"]
+            # 버린 행을 빼면 대기열에 쌓인 행이 정확히 한 번씩 저장되어야 함
+            ok = recovery is not None and result["stored"] == result["rows"] - result["evicted"]
+            rate = f"{result['backlog'] / recovery:>10,.0f}" if recovery else f"{'-':>10}"
+            print(f"{drain_rows:>8,} | {result['spool_seconds']:>8.2f} | {result['spool_file_mb']:>8.1f} | "
+                  f"{result['evicted']:>7,} | {recovery or float('nan'):>8.2f} | {rate} | {result['stored']:>9,} | "
+                  f"{result['duplicates']:>8,} | {result['retries']:>6} | {'통과' if ok else '실패'}")
+
+
+if __name__ == "__main__":
+    main()
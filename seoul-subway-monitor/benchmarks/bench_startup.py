@@ -0,0 +1,125 @@
+"""
+CLI 시작 시간(import 시간) 벤치마크 / 회귀 검사 (src/cli.py)
+
+하위 명령마다 새 파이썬 프로세스를 `-X importtime`으로 실행해
+CLI 파싱과 해당 명령 모듈 import에 걸린 시간(인터프리터 기본 import 제외)을 측정하고,
+오래 걸린 모듈 목록을 출력합니다. (명령 자체는 실행하지 않음)
+
+다음 조건을 어기면 종료 코드 1을 반환하므로 CI/cron 배포 전 회귀 검사로 사용할 수 있습니다.
+- 명령별 import 시간 예산 (BUDGETS_MS x --budget-scale)
+- 명령별로 불러오면 안 되는 무거운 모듈 (FORBIDDEN, 예: 수집기는 pandas 금지, --help는 requests 금지)
+
+사용법 (프로젝트 루트에서):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 5 --top 10 --budget-scale 2
+"""
+import argparse
+import subprocess
+import sys
+
+# 측정할 명령 -> 실행할 코드 (CLI 파싱 후 실행 함수 import까지만 수행)
+PROBE = "import src.cli as c; a = c.build_parser().parse_args({argv!r}); c.load(c.resolve(a))"
+COMMANDS = {
+    "help": "import src.cli as c; c.build_parser()",
+    "collect": PROBE.format(argv=["collect"]),
+    "sync": PROBE.format(argv=["sync"]),
+    "analyze delay": PROBE.format(argv=["analyze", "delay"]),
+    "analyze headway": PROBE.format(argv=["analyze", "headway"]),
+    "analyze turnaround": PROBE.format(argv=["analyze", "turnaround"]),
+    "analyze overtake": PROBE.format(argv=["analyze", "overtake"]),
+    "report": PROBE.format(argv=["report"]),
+}
+
+# 명령별 import 시간 예산(ms)
+BUDGETS_MS = {
+    "help": 30,
+    "collect": 250,
+}
+DEFAULT_BUDGET_MS = 1500
+
+# 명령별로 import되면 안 되는 모듈 (최상위 패키지명)
+CHART_MODULES = {"matplotlib", "seaborn"}
+FORBIDDEN = {
+    "help": {"requests", "dotenv", "pandas", "numpy", "pyarrow"} | CHART_MODULES,
+    "collect": {"pandas", "numpy", "pyarrow"} | CHART_MODULES,
+}
+DEFAULT_FORBIDDEN = CHART_MODULES  # 차트 라이브러리는 실제로 그릴 때만 불러옴 (src/charts.py)
+
+
+def import_times(code):
+    """
+    `python -X importtime -c code`를 실행해 모듈별 import 시간을 읽습니다.
+
+    Returns:
+        dict: 모듈명 -> (자체 시간(us), 누적 시간(us), 중첩 깊이)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        times[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return times
+
+
+def measure(code, baseline, repeat):
+    """
+    인터프리터 기본 import(baseline)를 뺀 import 시간을 repeat번 측정해 가장 빠른 결과를 반환합니다.
+
+    Returns:
+        tuple: (총 import 시간(ms), 모듈별 시간 dict)
+    """
+    best = None
+    for _ in range(repeat):
+        times = {name: t for name, t in import_times(code).items() if name not in baseline}
+        total_ms = sum(self_us for self_us, _, _ in times.values()) / 1000
+        if best is None or total_ms < best[0]:
+            best = (total_ms, times)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI 시작 시간 벤치마크 / 회귀 검사")
+    parser.add_argument("--repeat", type=int, default=3, help="명령별 측정 횟수 (가장 빠른 값 사용)")
+    parser.add_argument("--top", type=int, default=5, help="명령별로 출력할 느린 모듈 수")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="시간 예산 배율 (느린 장비에서는 크게)")
+    args = parser.parse_args()
+
+    baseline = set(import_times("pass"))
+    failures = []
+
+    print(f"{'명령':<20} | {'import(ms)':>10} | {'예산(ms)':>8} | {'모듈 수':>6} | 무거운 모듈")
+    print("-" * 80)
+    details = []
+    for command, code in COMMANDS.items():
+        total_ms, times = measure(code, baseline, args.repeat)
+        budget = BUDGETS_MS.get(command, DEFAULT_BUDGET_MS) * args.budget_scale
+        packages = {name.split(".")[0] for name in times}
+        heavy = sorted(packages & ({"requests", "dotenv", "pandas", "numpy", "pyarrow"} | CHART_MODULES))
+        forbidden = sorted(packages & FORBIDDEN.get(command, DEFAULT_FORBIDDEN))
+
+        print(f"{command:<20} | {total_ms:>10.1f} | {budget:>8.0f} | {len(times):>6} | {', '.join(heavy) or '-'}")
+        if total_ms > budget:
+            failures.append(f"{command}: import {total_ms:.1f}ms > 예산 {budget:.0f}ms")
+        if forbidden:
+            failures.append(f"{command}: 불러오면 안 되는 모듈 import ({', '.join(forbidden)})")
+        details.append((command, times))
+
+    print(f"\n[느린 모듈 Top {args.top}] (누적 시간 기준, 최상위 import만)")
+    for command, times in details:
+        top = sorted(((t[1], name) for name, t in times.items() if t[2] == 0), reverse=True)[:args.top]
+        print(f"- {command}: " + ", ".join(f"{name} {us / 1000:.1f}ms" for us, name in top))
+
+    if failures:
+        print("\n[실패]")
+        for failure in failures:
+            print(f"- {failure}")
+        sys.exit(1)
+    print("\n[통과] 모든 명령이 시간 예산과 import 제한을 지켰습니다.")
+
+
+if __name__ == "__main__":
+    main()
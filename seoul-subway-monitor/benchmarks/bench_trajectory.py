@@ -0,0 +1,63 @@
+"""
+열차 궤적 인덱스 / 회차 분석 벤치마크 (src/trajectory.py, src/turnaround.py)
+
+14개 호선 하루치 합성 위치 데이터(benchmarks/synthetic.py)로
+인덱스 구성 시간, 열차별 궤적 조회 속도, 회차 탐지 시간을 측정합니다.
+비교 기준으로 평면 DataFrame에서 열차 하나를 매번 필터/정렬하는 방식의 조회 속도도 함께 출력합니다.
+
+사용법 (프로젝트 루트에서):
+    python -m benchmarks.bench_trajectory
+    python -m benchmarks.bench_trajectory --days 3 --lookups 100000
+"""
+import argparse
+import random
+import time
+from benchmarks.synthetic import generate_positions
+from src.trajectory import TrajectoryIndex
+from src.turnaround import detect_turnarounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="열차 궤적 인덱스 / 회차 분석 벤치마크")
+    parser.add_argument("--days", type=int, default=1, help="생성할 일수")
+    parser.add_argument("--trains", type=int, default=60, help="호선별 운행 열차 수")
+    parser.add_argument("--lookups", type=int, default=100_000, help="궤적 조회 횟수")
+    parser.add_argument("--scan-lookups", type=int, default=20, help="비교 기준(평면 필터/정렬) 조회 횟수")
+    args = parser.parse_args()
+
+    print(f"[준비] 14개 호선 x {args.trains}대 x {args.days}일 합성 데이터 생성 중...")
+    df = generate_positions(trains_per_line=args.trains, days=args.days)
+    print(f"[준비] {len(df):,}행 생성")
+
+    print("\n[측정]")
+    started = time.perf_counter()
+    index = TrajectoryIndex(df)
+    build = time.perf_counter() - started
+    print(f"- 인덱스 구성   {build:7.2f}초 (궤적 {len(index):,}개, 배열 {index.memory_bytes() / 1024 ** 2:.0f}MB)")
+
+    rng = random.Random(0)
+    keys = [rng.choice(index.keys) for _ in range(args.lookups)]
+    started = time.perf_counter()
+    for line_id, train_number, day in keys:
+        trajectory = index.get(line_id, train_number, day)
+        trajectory.at(trajectory.ts[len(trajectory) // 2])
+    lookup = (time.perf_counter() - started) / args.lookups
+    print(f"- 궤적 조회     {lookup * 1e6:7.1f}us/건 (조회 + 시각 이진 탐색, {args.lookups:,}건)")
+
+    started = time.perf_counter()
+    for line_id, train_number, _ in keys[:args.scan_lookups]:
+        rows = df[(df['line_id'] == line_id) & (df['train_number'] == train_number)]
+        rows.sort_values('last_rec_time')
+    scan = (time.perf_counter() - started) / args.scan_lookups
+    print(f"- (기준) 평면 필터/정렬 {scan * 1e3:7.1f}ms/건 ({args.scan_lookups}건)")
+
+    started = time.perf_counter()
+    turnarounds = detect_turnarounds(index)
+    detect = time.perf_counter() - started
+    print(f"- 회차 탐지     {detect:7.2f}초 ({len(turnarounds):,}건)")
+
+    print(f"\n[결과] 구성+회차 {build + detect:.2f}초, 조회 {scan / lookup:,.0f}배 빠름 (평면 필터/정렬 대비)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+수집 경로 오프라인 재생 도구 (녹화 fixture + 로컬 대역 서버)
+
+서울시 API(realtimePosition) 응답을 녹화해 두었다가, 실제 서비스 없이
+로컬 대역 서버로 다시 재생해 수집기(src/main.job)의 처리량과 회귀를 측정할 수 있게 합니다.
+- fixture: 주기(cycle)별, 호선별 API 원본 행 목록 (gzip JSON Lines, 한 줄 = 한 주기의 한 호선)
+- SeoulApiStandIn: 녹화한 응답을 서울시 API와 같은 URL/형식으로 돌려주는 서버 (열차 수 배수 확장 지원)
+- PostgrestStandIn: Supabase(PostgREST) 일괄 삽입/RPC 요청을 받아 건수만 세는 서버 (지연/실패/장애/응답 유실 주입, on_conflict 중복 무시 지원)
+
+사용법 (프로젝트 루트에서):
+    # 실제 API 응답 녹화 (.env의 SEOUL_API_KEY 필요, 1분 간격 10주기)
+    python -m benchmarks.replay record --cycles 10 --interval 60
+    # 녹화 대신 합성 fixture 생성
+    python -m benchmarks.replay synthetic --cycles 30 --trains 60
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DEFAULT_FIXTURE = "benchmarks/fixtures/realtime_position.jsonl.gz"
+
+# 서울시 API에 데이터가 없을 때의 응답 (src/api_client.py가 경고로 처리)
+NO_DATA_RESPONSE = {"RESULT": {"CODE": "INFO-200", "MESSAGE": "해당하는 데이터가 없습니다."}}
+
+
+# fixture 저장/불러오기 ------------------------------------------------------
+
+def save_fixture(cycles, path=DEFAULT_FIXTURE):
+    """
+    주기별 응답을 fixture 파일로 저장합니다. (임시 파일에 쓴 뒤 교체)
+
+    Args:
+        cycles (list): 주기 목록, 각 주기는 {호선명: API 원본 행 리스트}
+        path (str): 저장 경로 (.gz)
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for index, lines in enumerate(cycles):
+            for line, rows in lines.items():
+                f.write(json.dumps({"cycle": index, "line": line, "rows": rows}, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+
+def load_fixture(path=DEFAULT_FIXTURE):
+    """
+    fixture 파일을 읽습니다.
+
+    Returns:
+        list: 주기 목록, 각 주기는 {호선명: API 원본 행 리스트}
+    """
+    cycles = {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for text in f:
+            item = json.loads(text)
+            cycles.setdefault(item["cycle"], {})[item["line"]] = item["rows"]
+    return [cycles[index] for index in sorted(cycles)]
+
+
+def record_fixture(cycles=10, interval=60, lines=None, path=DEFAULT_FIXTURE):
+    """
+    실제 서울시 API 응답을 interval초 간격으로 cycles번 녹화해 저장합니다. (API 키는 저장하지 않음)
+
+    Args:
+        cycles (int): 녹화할 주기 수
+        interval (float): 주기 간격(초)
+        lines (list, optional): 녹화할 호선 목록 (기본: 수집 대상 전체 호선)
+        path (str): 저장 경로
+    """
+    from src.api_client import SeoulSubwayClient
+    from src.config import TARGET_LINES, Config
+
+    Config.validate()
+    client = SeoulSubwayClient()
+    recorded = []
+    try:
+        for index in range(cycles):
+            started = time.monotonic()
+            snapshot = {line: client.get_realtime_position(line) for line in (lines or TARGET_LINES)}
+            recorded.append(snapshot)
+            print(f"[녹화] {index + 1}/{cycles} 주기: {sum(len(rows) for rows in snapshot.values())}건")
+            if index + 1 < cycles:
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    finally:
+        client.close()
+    save_fixture(recorded, path)
+    print(f"[녹화] 저장 완료: {path}")
+    return recorded
+
+
+def synthetic_fixture(cycles=30, trains_per_line=60, interval=60, seed=0):
+    """
+    합성 위치 데이터(benchmarks/synthetic.py)를 서울시 API 원본 형식의 주기별 응답으로 만듭니다.
+
+    Args:
+        cycles (int): 주기 수
+        trains_per_line (int): 호선별 열차 수
+        interval (float): 주기 간격(초)
+        seed (int): 난수 시드
+
+    Returns:
+        list: 주기 목록, 각 주기는 {호선명: API 원본 행 리스트}
+    """
+    from benchmarks.synthetic import generate_positions
+
+    df = generate_positions(trains_per_line=trains_per_line, hours=cycles * interval / 3600,
+                            sample_seconds=interval, seed=seed)
+    created = df["created_at"]
+    cycle_index = ((created - created.min()).dt.total_seconds() // interval).astype(int)
+    station_id = df["station_id"].astype(str)
+    dest_id = df["dest_station_id"].astype(str)
+    dest_name = df["line_name"].astype(str) + "-" + (dest_id.str[-3:].astype(int) - 100).astype(str)
+    raw = {
+        "subwayId": df["line_id"].astype(str), "subwayNm": df["line_name"].astype(str),
+        "statnId": station_id, "statnNm": df["station_name"].astype(str),
+        "trainNo": df["train_number"].astype(str),
+        "lastRecptnDt": df["last_rec_time"].dt.strftime("%Y%m%d"),
+        "recptnDt": df["last_rec_time"].dt.strftime("%Y-%m-%d %H:%M:%S"),
+        "updnLine": df["direction_type"].astype(str), "statnTid": dest_id, "statnTnm": dest_name,
+        "trainSttus": df["train_status"].astype(str), "directAt": df["is_express"].astype(str),
+        "lstcarAt": "0",
+    }
+    frame = df[[]].assign(**raw, cycle=cycle_index)
+
+    result = [{} for _ in range(cycles)]
+    for (index, line), group in frame.groupby(["cycle", "subwayNm"], sort=False):
+        if index < cycles:
+            result[index][line] = group.drop(columns="cycle").to_dict("records")
+    return result
+
+
+def multiply_fleet(rows, multiplier):
+    """
+    열차 수를 multiplier배로 늘립니다. (복제 열차는 열차번호에 'x{n}'을 붙여 서로 다른 열차로 취급)
+
+    Args:
+        rows (list): API 원본 행 리스트
+        multiplier (int): 배수 (1이면 그대로)
+    """
+    if multiplier <= 1:
+        return rows
+    return rows + [dict(row, trainNo=f"{row.get('trainNo')}x{n}") for n in range(1, multiplier) for row in rows]
+
+
+# 로컬 대역 서버 -------------------------------------------------------------
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    """대역 서버 공통 핸들러 (keep-alive, JSON 응답, 요청 로그 생략)"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_state = None  # 서버 객체가 지정
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StandInServer:
+    """데몬 스레드에서 실행되는 로컬 HTTP 서버 (포트 0이면 빈 포트 자동 선택)"""
+
+    handler = _JsonHandler
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        """
+        Args:
+            latency (float): 요청마다 추가할 응답 지연(초) (네트워크 왕복 시간 흉내)
+        """
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        handler = type(self.handler.__name__, (self.handler,), {"server_state": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _wait(self):
+        with self._lock:
+            self.requests += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+
+class _SeoulApiHandler(_JsonHandler):
+    def do_GET(self):
+        # /api/subway/{KEY}/json/realtimePosition/{START}/{END}/{호선명}
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        state = self.server_state
+        state._wait()
+        if len(parts) != 8 or parts[4] != "realtimePosition":
+            return self._send(404, json.dumps({"error": "not found"}).encode("utf-8"))
+        self._send(200, state.body(unquote(parts[7])))
+
+
+class SeoulApiStandIn(_StandInServer):
+    """
+    서울시 실시간 위치 API 대역 서버
+    set_cycle()로 지정한 주기의 녹화 응답을 호선별로 돌려줍니다. (주기 수보다 크면 처음부터 반복)
+    열차 수를 배수로 늘린 응답은 START/END 범위(최대 100건)를 무시하고 전체를 돌려줍니다.
+    """
+
+    handler = _SeoulApiHandler
+
+    def __init__(self, cycles, fleet_multiplier=1, **server_options):
+        """
+        Args:
+            cycles (list): fixture 주기 목록 (load_fixture / synthetic_fixture 결과)
+            fleet_multiplier (int): 열차 수 배수
+            **server_options: host, port, latency
+        """
+        super().__init__(**server_options)
+        # 응답 본문은 미리 직렬화 (서버가 병목이 되지 않도록)
+        self._bodies = [
+            {line: json.dumps({"realtimePositionList": multiply_fleet(rows, fleet_multiplier)},
+                              ensure_ascii=False).encode("utf-8") for line, rows in lines.items()}
+            for lines in cycles
+        ]
+        self._no_data = json.dumps(NO_DATA_RESPONSE, ensure_ascii=False).encode("utf-8")
+        self.rows_per_cycle = [sum(len(rows) for rows in lines.values()) * max(fleet_multiplier, 1) for lines in cycles]
+        self.cycle = 0
+
+    def set_cycle(self, cycle):
+        self.cycle = cycle
+
+    def body(self, line):
+        return self._bodies[self.cycle % len(self._bodies)].get(line, self._no_data)
+
+
+class _PostgrestHandler(_JsonHandler):
+    def do_POST(self):
+        state = self.server_state
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        state._wait()
+        if state.down or state.should_fail():
+            return self._send(503, json.dumps({"message": "injected failure"}).encode("utf-8"))
+
+        url = urlsplit(self.path)
+        path = url.path
+        if path.startswith("/rest/v1/rpc/"):
+            return self._send(200, json.dumps({"created": 0, "dropped": 0}).encode("utf-8"))
+        if not path.startswith("/rest/v1/"):
+            return self._send(404, json.dumps({"error": "not found"}).encode("utf-8"))
+
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        rows = json.loads(body)
+        rows = rows if isinstance(rows, list) else [rows]
+        on_conflict = parse_qs(url.query).get("on_conflict", [None])[0]
+        stored = state.insert(rows, on_conflict.split(",") if on_conflict else None)
+        if state.should_lose_response():
+            # 저장은 끝났지만 응답이 유실된 경우 (클라이언트는 실패로 보고 같은 배치를 다시 보냄)
+            return self._send(504, json.dumps({"message": "injected lost response"}).encode("utf-8"))
+
+        prefer = self.headers.get("Prefer", "")
+        if "return=representation" in prefer:
+            return self._send(201, json.dumps(stored, ensure_ascii=False).encode("utf-8"))
+        headers = {"Content-Range": f"*/{len(rows)}"} if "count=exact" in prefer else None
+        self._send(201, headers=headers)
+
+    def do_GET(self):
+        self._send(501, json.dumps({"message": "PostgrestStandIn은 조회를 지원하지 않습니다."}, ensure_ascii=False).encode("utf-8"))
+
+
+class PostgrestStandIn(_StandInServer):
+    """
+    Supabase(PostgREST) 대역 서버
+    POST /rest/v1/{table} 일괄 삽입을 받아 행 수를 세고(keep_rows면 보관), RPC 호출에는 빈 결과를 돌려줍니다.
+    Prefer 헤더(return=minimal / count=exact / return=representation)와 gzip 본문을 지원합니다.
+    on_conflict 파라미터가 있으면 해당 컬럼 값이 이미 저장된 행은 건너뜁니다. (resolution=ignore-duplicates)
+    """
+
+    handler = _PostgrestHandler
+
+    def __init__(self, keep_rows=False, fail_rate=0.0, lost_response_rate=0.0, seed=0, **server_options):
+        """
+        Args:
+            keep_rows (bool): 받은 행을 메모리에 보관할지 여부 (행 검증용)
+            fail_rate (float): 요청을 503으로 실패시킬 비율 (0~1, 재시도/복구 검증용)
+            lost_response_rate (float): 행을 저장한 뒤 504로 응답할 비율 (0~1, 재전송 중복 검증용)
+            seed (int): 실패 주입 난수 시드
+            **server_options: host, port, latency
+        """
+        super().__init__(**server_options)
+        self.keep_rows = keep_rows
+        self.fail_rate = fail_rate
+        self.lost_response_rate = lost_response_rate
+        self.down = False  # True이면 모든 요청을 503으로 실패 (장애 구간 흉내)
+        self._rng = random.Random(seed)
+        self.rows = []
+        self.row_count = 0
+        self.duplicate_rows = 0
+        self.failures = 0
+        self.lost_responses = 0
+        self._next_id = 1
+        self._conflict_keys = set()
+
+    def should_fail(self):
+        with self._lock:
+            failed = self.fail_rate > 0 and self._rng.random() < self.fail_rate
+            self.failures += failed
+        return failed
+
+    def should_lose_response(self):
+        with self._lock:
+            lost = self.lost_response_rate > 0 and self._rng.random() < self.lost_response_rate
+            self.lost_responses += lost
+        return lost
+
+    def insert(self, rows, on_conflict=None):
+        """행을 받아 id/created_at(없을 때)을 붙여 반환합니다. on_conflict 컬럼 값이 이미 있는 행은 건너뜁니다."""
+        created_at = datetime.now().astimezone().isoformat()
+        with self._lock:
+            if on_conflict:
+                fresh = []
+                for row in rows:
+                    key = tuple(row.get(column) for column in on_conflict)
+                    if key not in self._conflict_keys:
+                        self._conflict_keys.add(key)
+                        fresh.append(row)
+                self.duplicate_rows += len(rows) - len(fresh)
+                rows = fresh
+            stored = [dict(row, id=self._next_id + i, created_at=row.get("created_at") or created_at)
+                      for i, row in enumerate(rows)]
+            self._next_id += len(rows)
+            self.row_count += len(rows)
+            if self.keep_rows:
+                self.rows.extend(stored)
+        return stored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="수집 경로 재생용 fixture 녹화/생성")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="실제 서울시 API 응답 녹화")
+    record.add_argument("--cycles", type=int, default=10, help="녹화할 주기 수")
+    record.add_argument("--interval", type=float, default=60, help="주기 간격(초)")
+    record.add_argument("--lines", nargs="+", default=None, help="녹화할 호선명 (기본: 전체)")
+    synthetic = commands.add_parser("synthetic", help="합성 fixture 생성")
+    synthetic.add_argument("--cycles", type=int, default=30, help="주기 수")
+    synthetic.add_argument("--trains", type=int, default=60, help="호선별 열차 수")
+    for command in (record, synthetic):
+        command.add_argument("--out", default=DEFAULT_FIXTURE, help="저장 경로")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record_fixture(args.cycles, args.interval, args.lines, args.out)
+    else:
+        cycles = synthetic_fixture(args.cycles, args.trains)
+        save_fixture(cycles, args.out)
+        print(f"[합성] {len(cycles)}주기, {sum(len(rows) for lines in cycles for rows in lines.values())}건 -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+벤치마크용 합성 열차 위치 데이터 생성기
+
+호선마다 여러 대의 열차가 양 끝 종착역 사이를 왕복하는 상황을 만들고,
+수집기처럼 일정 간격(sample_seconds)으로 위치를 기록한 DataFrame을 반환합니다.
+- 상행(0)으로 종착역까지 간 뒤 같은 역에서 방향을 바꿔 하행(1)으로 돌아옴 (회차)
+- 일부 열차는 급행(is_express=1): 더 빠르게 달리며 짝수 번째 역과 종착역에만 정차
+- 컬럼 구성과 타입은 분석 로더 결과(src/schema.coerce_frame)와 같음
+"""
+import numpy as np
+import pandas as pd
+from src.schema import coerce_frame
+
+LINE_NAMES = [
+    "1호선", "2호선", "3호선", "4호선", "5호선",
+    "6호선", "7호선", "8호선", "9호선",
+    "경의중앙선", "수인분당선", "신분당선", "공항철도", "경춘선",
+]
+
+
+def generate_positions(lines=14, trains_per_line=60, stations_per_line=40, hours=20, days=1,
+                       sample_seconds=30, hop_seconds=120, express_ratio=0.1,
+                       start="2026-01-07 05:30", seed=0):
+    """
+    합성 위치 데이터를 생성합니다.
+
+    Args:
+        lines (int): 호선 수 (최대 14개는 실제 호선명 사용)
+        trains_per_line (int): 호선별 운행 열차 수
+        stations_per_line (int): 호선별 역 수
+        hours (float): 하루 운행 시간(시간)
+        days (int): 생성할 일수
+        sample_seconds (float): 수집 주기(초)
+        hop_seconds (float): 일반 열차가 한 역을 이동하는 데 걸리는 시간(초)
+        express_ratio (float): 급행 열차 비율
+        start (str): 첫날 운행 시작 시각 (한국 시간)
+        seed (int): 난수 시드
+
+    Returns:
+        pandas.DataFrame: 위치 레코드 (행 수 = lines x trains_per_line x 수집 횟수)
+    """
+    rng = np.random.default_rng(seed)
+    n_trains = lines * trains_per_line
+    n_samples = int(hours * 3600 / sample_seconds)
+    cycle = 2 * stations_per_line  # 한 번 왕복하는 데 필요한 이동 단위 수
+
+    frames = []
+    for day in range(days):
+        day_start = pd.Timestamp(start, tz="Asia/Seoul") + pd.Timedelta(days=day)
+        t = np.arange(n_samples) * sample_seconds  # 운행 시작 후 경과 시간(초)
+
+        line_idx = np.repeat(np.arange(lines), trains_per_line)
+        train_idx = np.tile(np.arange(trains_per_line), lines)
+        is_express = (rng.random(n_trains) < express_ratio).astype(np.int8)
+        speed = np.where(is_express == 1, 1.5, 1.0) / hop_seconds * rng.uniform(0.9, 1.1, n_trains)
+        phase = train_idx / trains_per_line * cycle + rng.uniform(0, 0.5, n_trains)
+
+        # 진행 위치 p (0 ~ cycle): [0, S) 상행, [S, 2S) 하행
+        p = (phase[:, None] + speed[:, None] * t[None, :]) % cycle
+        up = p < stations_per_line
+        station = np.where(up, np.floor(p), cycle - 1 - np.floor(p)).astype(np.int32)
+        # 급행은 짝수 번째 역과 종착역에서만 관측 (홀수 역은 통과 -> 직전 짝수 역으로 표시)
+        skip = (is_express[:, None] == 1) & (station != stations_per_line - 1)
+        station = np.where(skip, station - station % 2, station)
+        direction = np.where(up, 0, 1).astype(np.int8)
+        # 역 구간 내 진행률로 상태 결정 (0:진입, 1:도착, 2:출발)
+        frac = p % 1
+        status = np.select([frac < 0.15, frac < 0.7], [0, 1], 2).astype(np.int8)
+
+        rec_lag = rng.integers(0, 20, size=p.shape)
+        created = day_start + pd.to_timedelta(np.tile(t, n_trains), unit="s")
+        last_rec = created - pd.to_timedelta(rec_lag.ravel(), unit="s")
+
+        line_flat = np.repeat(line_idx, n_samples)
+        line_id = 1001 + line_flat
+        station_flat = station.ravel()
+        direction_flat = direction.ravel()
+        dest = np.where(direction_flat == 0, stations_per_line - 1, 0)
+        train_flat = np.repeat(line_idx * trains_per_line + train_idx, n_samples)
+
+        # 문자열 컬럼은 category 코드로 바로 생성 (문자열 배열 연산 비용 절약)
+        line_names = [LINE_NAMES[i] if i < len(LINE_NAMES) else f"{i + 1}호선" for i in range(lines)]
+        station_names = [f"{line_names[i]}-{k}" for i in range(lines) for k in range(stations_per_line)]
+        train_numbers = [f"{i * 1000 + k:04d}" for i in range(lines) for k in range(trains_per_line)]
+
+        frames.append(pd.DataFrame({
+            "line_id": line_id,
+            "line_name": pd.Categorical.from_codes(line_flat, line_names),
+            "station_id": line_id * 1000000 + 100 + station_flat,
+            "station_name": pd.Categorical.from_codes(line_flat * stations_per_line + station_flat, station_names),
+            "train_number": pd.Categorical.from_codes(train_flat, train_numbers),
+            "direction_type": direction_flat,
+            "dest_station_id": line_id * 1000000 + 100 + dest,
+            "train_status": status.ravel(),
+            "is_express": np.repeat(is_express, n_samples),
+            "is_last_train": False,
+            "last_rec_time": last_rec,
+            "created_at": created,
+        }))
+
+    df = pd.concat(frames, ignore_index=True)
+    # 수집 순서(적재 시각)대로 정렬
+    df = df.sort_values("created_at", kind="stable", ignore_index=True)
+    return coerce_frame(df)
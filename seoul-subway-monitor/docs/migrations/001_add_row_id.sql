@@ -0,0 +1,12 @@
+-- 001: 키셋 페이지네이션용 고유 행 ID 추가
+-- 일괄 삽입된 행은 모두 같은 created_at 값을 가지므로 created_at만으로는 페이지 경계를 정할 수 없습니다.
+-- (created_at, id) 조합을 커서로 사용해 중복/누락 없이 페이지를 넘깁니다.
+ALTER TABLE realtime_subway_positions
+    ADD COLUMN IF NOT EXISTS id BIGINT GENERATED ALWAYS AS IDENTITY;
+
+ALTER TABLE realtime_subway_positions
+    ADD CONSTRAINT realtime_subway_positions_pkey PRIMARY KEY (id);
+
+-- 키셋 페이지네이션(created_at, id 오름차순) 인덱스
+CREATE INDEX IF NOT EXISTS idx_realtime_subway_positions_created_at_id
+    ON realtime_subway_positions(created_at, id);
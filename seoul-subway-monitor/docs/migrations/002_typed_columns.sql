@@ -0,0 +1,20 @@
+-- 002: 문자열 컬럼을 실제 타입으로 변환
+-- 수집기(db_client.transform)가 수신 시각은 timestamptz, 코드값은 정수로 저장하므로
+-- 분석 시점에 문자열 파싱/비교를 반복하지 않아도 되고 행 크기도 줄어듭니다.
+-- 주의: 기존 행을 모두 다시 쓰므로 수집기를 잠시 멈춘 상태에서 실행하세요.
+
+ALTER TABLE realtime_subway_positions
+    -- 호선/역 ID: '1001', '1001000133' 형식의 숫자 코드
+    ALTER COLUMN line_id TYPE SMALLINT USING NULLIF(line_id, '')::SMALLINT,
+    ALTER COLUMN station_id TYPE INTEGER USING NULLIF(station_id, '')::INTEGER,
+    ALTER COLUMN dest_station_id TYPE INTEGER USING NULLIF(dest_station_id, '')::INTEGER,
+    -- 수신 날짜/시각: API 값은 시간대 없는 한국 시간
+    ALTER COLUMN last_rec_date TYPE DATE USING to_date(NULLIF(last_rec_date, ''), 'YYYYMMDD'),
+    ALTER COLUMN last_rec_time TYPE TIMESTAMP WITH TIME ZONE
+        USING (NULLIF(last_rec_time, '')::TIMESTAMP AT TIME ZONE 'Asia/Seoul'),
+    -- 코드값: 작은 정수 열거형
+    ALTER COLUMN direction_type TYPE SMALLINT USING NULLIF(direction_type, '')::SMALLINT,
+    ALTER COLUMN train_status TYPE SMALLINT USING NULLIF(train_status, '')::SMALLINT,
+    ALTER COLUMN is_express TYPE SMALLINT USING NULLIF(is_express, '')::SMALLINT;
+
+-- 로컬 Parquet 저장소(data/store)는 이전 타입으로 기록되어 있으므로 마이그레이션 후 폴더를 지우고 다시 동기화하세요.
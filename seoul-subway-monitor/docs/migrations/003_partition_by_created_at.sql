@@ -0,0 +1,36 @@
+-- 003: 일 단위 범위 파티션 테이블로 전환 + 조회 패턴별 복합 인덱스
+-- 기존 단일 테이블을 이름만 바꿔 두고, 파티션 테이블을 새로 만든 뒤 데이터를 옮깁니다.
+-- 주의: 전체 데이터를 복사하므로 수집기를 멈춘 상태에서 실행하세요. (001, 002 마이그레이션 선행 필요)
+
+BEGIN;
+
+ALTER TABLE realtime_subway_positions RENAME TO realtime_subway_positions_legacy;
+ALTER TABLE realtime_subway_positions_legacy RENAME CONSTRAINT realtime_subway_positions_pkey TO realtime_subway_positions_legacy_pkey;
+DROP INDEX IF EXISTS idx_realtime_subway_positions_created_at;
+DROP INDEX IF EXISTS idx_realtime_subway_positions_line_id;
+DROP INDEX IF EXISTS idx_realtime_subway_positions_created_at_id;
+
+-- 1) 파티션 테이블, 인덱스, 파티션 관리 함수 생성 (docs/schema.sql 실행, psql 기준)
+\ir ../schema.sql
+
+-- 2) 기존 데이터 기간만큼 파티션 생성
+SELECT create_realtime_partitions(
+    (min(created_at) AT TIME ZONE 'Asia/Seoul')::DATE,
+    (max(created_at) AT TIME ZONE 'Asia/Seoul')::DATE
+) FROM realtime_subway_positions_legacy;
+
+-- 3) 데이터 이동 (id 값 유지)
+INSERT INTO realtime_subway_positions OVERRIDING SYSTEM VALUE
+SELECT id, line_id, line_name, station_id, station_name, train_number, last_rec_date, last_rec_time,
+       direction_type, dest_station_id, dest_station_name, train_status, is_express, is_last_train, created_at
+FROM realtime_subway_positions_legacy;
+
+-- 4) id 시퀀스를 기존 최대값 이후로 이동
+SELECT setval(pg_get_serial_sequence('realtime_subway_positions', 'id'),
+              COALESCE((SELECT max(id) FROM realtime_subway_positions), 0) + 1, false);
+
+DROP TABLE realtime_subway_positions_legacy;
+
+COMMIT;
+
+ANALYZE realtime_subway_positions;
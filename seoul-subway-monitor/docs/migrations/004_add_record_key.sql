@@ -0,0 +1,17 @@
+-- 004: 저장 대기열(src/spool.py)의 멱등 재전송을 위한 레코드 식별 키
+-- 수집기가 적재 시각(created_at)과 레코드 키(record_key)를 정해 보내므로, 응답을 받지 못해 같은 배치를 다시 보내도
+-- (created_at, record_key) 고유 인덱스에 걸려 중복 행이 생기지 않습니다. (PostgREST on_conflict + resolution=ignore-duplicates)
+-- 기존 행의 record_key는 NULL로 남으며, NULL끼리는 충돌하지 않으므로 기존 데이터에는 영향이 없습니다.
+-- 주의: 파티션 테이블에는 CONCURRENTLY 인덱스를 만들 수 없어 생성 중 쓰기가 잠깁니다. 수집기를 멈춘 상태에서 실행하세요. (003 마이그레이션 선행 필요)
+
+BEGIN;
+
+ALTER TABLE realtime_subway_positions
+    ADD COLUMN IF NOT EXISTS record_key TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_realtime_subway_positions_record_key
+    ON realtime_subway_positions(created_at, record_key);
+
+COMMIT;
+
+-- 적용 후 .env에 SPOOL_ENABLED=true 설정
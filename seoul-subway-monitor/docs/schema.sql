@@ -1,21 +1,117 @@
 -- 테이블 생성 쿼리
+-- created_at(적재 시각) 기준 일 단위 범위 파티션 테이블
+-- 분석은 항상 시간 범위로 조회하므로 해당 날짜 파티션만 읽고(파티션 프루닝),
+-- 보관 기간이 지난 데이터는 DELETE 대신 파티션 DROP으로 즉시 정리합니다.
 CREATE TABLE IF NOT EXISTS realtime_subway_positions (
-    line_id VARCHAR(50) NOT NULL, -- subwayId: 지하철 호선 ID
+    id BIGINT GENERATED ALWAYS AS IDENTITY, -- 행 고유 ID (키셋 페이지네이션 커서)
+    line_id SMALLINT NOT NULL, -- subwayId: 지하철 호선 ID (예: 1001)
     line_name VARCHAR(50), -- subwayNm: 지하철 호선명
-    station_id VARCHAR(50), -- statnId: 지하철 역 ID
+    station_id INTEGER, -- statnId: 지하철 역 ID (예: 1001000133)
     station_name VARCHAR(50), -- statnNm: 지하철 역명
     train_number VARCHAR(50), -- trainNo: 열차 번호
-    last_rec_date VARCHAR(20), -- lastRecptnDt: 최종 수신 날짜
-    last_rec_time VARCHAR(20), -- recptnDt: 최종 수신 시간
-    direction_type VARCHAR(10), -- updnLine: 0:상행/내선, 1:하행/외선
-    dest_station_id VARCHAR(50), -- statnTid: 종착역 ID
+    last_rec_date DATE, -- lastRecptnDt: 최종 수신 날짜
+    last_rec_time TIMESTAMP WITH TIME ZONE, -- recptnDt: 최종 수신 시간 (한국 시간 기준으로 변환해 저장)
+    direction_type SMALLINT, -- updnLine: 0:상행/내선, 1:하행/외선
+    dest_station_id INTEGER, -- statnTid: 종착역 ID
     dest_station_name VARCHAR(50), -- statnTnm: 종착역명
-    train_status VARCHAR(10), -- trainSttus: 0:진입, 1:도착, 2:출발, 3:전전역출발 등
-    is_express VARCHAR(10), -- directAt: 1:급행, 0:아님, 7:특급
+    train_status SMALLINT, -- trainSttus: 0:진입, 1:도착, 2:출발, 3:전전역출발 등
+    is_express SMALLINT, -- directAt: 1:급행, 0:아님, 7:특급
     is_last_train BOOLEAN, -- lstcarAt: 막차 여부 (Boolean 변환)
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) -- 데이터 적재 시간
-);
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT timezone('utc'::text, now()), -- 데이터 적재 시간 (파티션 키, 저장 대기열 사용 시 수집 시각)
+    record_key TEXT, -- 레코드 식별 키 (src/spool.py, 저장 대기열의 멱등 재전송용)
+    PRIMARY KEY (created_at, id) -- 파티션 테이블의 기본키는 파티션 키를 포함해야 함
+) PARTITION BY RANGE (created_at);
 
--- 인덱스 생성 (조회 성능 향상을 위해)
-CREATE INDEX idx_realtime_subway_positions_created_at ON realtime_subway_positions(created_at);
-CREATE INDEX idx_realtime_subway_positions_line_id ON realtime_subway_positions(line_id);
+-- 파티션 범위를 벗어난 행을 받아 두는 기본 파티션 (파티션 생성 누락 시 적재 실패 방지)
+CREATE TABLE IF NOT EXISTS realtime_subway_positions_default
+    PARTITION OF realtime_subway_positions DEFAULT;
+
+-- 인덱스 생성 (조회 패턴별, 부모 테이블에 만들면 모든 파티션에 자동 생성)
+-- 1) 시간 범위 전체 조회 / 키셋 페이지네이션: 기본키 (created_at, id)
+-- 2) 시간 범위 + 호선 필터 조회 (iter_rows(lines=...))
+CREATE INDEX IF NOT EXISTS idx_realtime_subway_positions_line_name_created_at
+    ON realtime_subway_positions(line_name, created_at);
+-- 3) 열차별 궤적 / 체류 시간 (호선, 열차, 방향 그룹을 수신 시각 순으로)
+CREATE INDEX IF NOT EXISTS idx_realtime_subway_positions_train_time
+    ON realtime_subway_positions(line_id, train_number, direction_type, last_rec_time);
+-- 4) 역별 도착 간격 (역, 방향 그룹을 수신 시각 순으로)
+CREATE INDEX IF NOT EXISTS idx_realtime_subway_positions_station_time
+    ON realtime_subway_positions(station_id, direction_type, last_rec_time);
+-- 5) 멱등 재전송: 같은 (created_at, record_key) 행은 한 번만 저장 (upsert on_conflict 대상, 고유 인덱스는 파티션 키 포함 필요)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_realtime_subway_positions_record_key
+    ON realtime_subway_positions(created_at, record_key);
+
+
+-- 파티션 관리 함수 ------------------------------------------------------------
+
+-- 지정한 기간(한국 시간 기준 날짜)의 일 단위 파티션을 생성합니다. (이미 있으면 건너뜀)
+CREATE OR REPLACE FUNCTION create_realtime_partitions(from_date DATE, to_date DATE)
+RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    d DATE := from_date;
+    created INTEGER := 0;
+    partition_name TEXT;
+BEGIN
+    WHILE d <= to_date LOOP
+        partition_name := format('realtime_subway_positions_%s', to_char(d, 'YYYYMMDD'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF realtime_subway_positions FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                (d::TIMESTAMP AT TIME ZONE 'Asia/Seoul'),
+                ((d + 1)::TIMESTAMP AT TIME ZONE 'Asia/Seoul')
+            );
+            created := created + 1;
+        END IF;
+        d := d + 1;
+    END LOOP;
+    RETURN created;
+END;
+$$;
+
+-- 보관 기간이 지난 일 단위 파티션을 삭제합니다.
+CREATE OR REPLACE FUNCTION drop_old_realtime_partitions(retain_days INTEGER)
+RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    cutoff DATE := (now() AT TIME ZONE 'Asia/Seoul')::DATE - retain_days;
+    dropped INTEGER := 0;
+    part RECORD;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'realtime_subway_positions'::regclass
+          AND c.relname ~ '^realtime_subway_positions_[0-9]{8}$'
+    LOOP
+        IF to_date(right(part.relname, 8), 'YYYYMMDD') < cutoff THEN
+            EXECUTE format('DROP TABLE %I', part.relname);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+    RETURN dropped;
+END;
+$$;
+
+-- 매일 실행하는 유지보수: 앞으로 days_ahead일치 파티션 생성 + retain_days일 지난 파티션 삭제
+-- 수집기(main.py)가 REST RPC(/rest/v1/rpc/maintain_realtime_partitions)로 하루 한 번 호출합니다.
+CREATE OR REPLACE FUNCTION maintain_realtime_partitions(days_ahead INTEGER DEFAULT 7, retain_days INTEGER DEFAULT 90)
+RETURNS JSON
+LANGUAGE plpgsql AS $$
+DECLARE
+    today DATE := (now() AT TIME ZONE 'Asia/Seoul')::DATE;
+BEGIN
+    RETURN json_build_object(
+        'created', create_realtime_partitions(today, today + days_ahead),
+        'dropped', drop_old_realtime_partitions(retain_days)
+    );
+END;
+$$;
+
+-- 최초 파티션 생성
+SELECT maintain_realtime_partitions();
+
+-- (선택) pg_cron 확장을 사용할 수 있으면 DB에서 직접 매일 실행
+-- SELECT cron.schedule('maintain-realtime-partitions', '0 4 * * *', 'SELECT maintain_realtime_partitions(7, 90)');
@@ -0,0 +1,186 @@
+import json
+import os
+import pickle
+import shutil
+import time
+from hashlib import blake2b
+from src import metrics
+from src.config import Config
+
+# 분석 결과/차트 캐시 (내용 주소 방식)
+# 키는 입력 데이터 범위(조회 시간 범위 + 저장소 파일 요약값)와 분석 파라미터를 해시한 값이므로,
+# 같은 키가 있으면 데이터가 바뀌지 않은 것으로 보고 재계산/재렌더링을 건너뜁니다.
+# 파일 구조: {root}/{종류}/{키}{확장자} (결과는 pickle, 차트는 PNG)
+# 분석 코드의 결과 형식이나 계산 방식이 바뀌면 CACHE_VERSION을 올려 이전 캐시를 무효화합니다.
+CACHE_VERSION = 3
+
+# 계측 지표 (src/metrics.py)
+CACHE_LOOKUPS = metrics.counter("subway_analysis_cache_lookups_total", "분석 캐시 조회 수", ["kind", "result"])
+
+
+def cache_key(*parts):
+    """
+    키 구성 값(JSON으로 표현 가능한 값, 그 외는 문자열)으로 32자리 캐시 키를 만듭니다.
+
+    Args:
+        *parts: 데이터 범위, 파라미터 등 결과를 결정하는 값
+
+    Returns:
+        str: 16진수 키
+    """
+    raw = json.dumps([CACHE_VERSION, *parts], ensure_ascii=False, sort_keys=True, default=str)
+    return blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def frame_digest(df):
+    """DataFrame 내용(값 + 컬럼명) 해시 (차트 입력이 같은지 비교용)"""
+    import pandas as pd
+    digest = blake2b(digest_size=16)
+    digest.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    분석 결과와 차트 파일을 키별로 보관하는 디스크 캐시
+    저장은 임시 파일에 쓴 뒤 교체하므로, 여러 프로세스가 같은 키를 동시에 써도 깨진 항목이 남지 않습니다.
+    조회에 성공한 항목은 수정 시각을 갱신해 prune()이 오래 안 쓴 항목부터 지우도록 합니다.
+    """
+
+    def __init__(self, root=None, enabled=True):
+        """
+        Args:
+            root (str, optional): 캐시 폴더 경로 (기본: Config.ANALYSIS_CACHE_DIR)
+            enabled (bool): False이면 항상 조회 실패로 처리하고 저장하지 않음 (--no-cache)
+        """
+        self.root = root or Config.ANALYSIS_CACHE_DIR
+        self.enabled = enabled
+
+    def _path(self, kind, key, suffix):
+        return os.path.join(self.root, kind, key + suffix)
+
+    def _hit(self, kind, path):
+        if self.enabled and os.path.exists(path):
+            CACHE_LOOKUPS.inc(kind=kind, result="hit")
+            os.utime(path)
+            return True
+        CACHE_LOOKUPS.inc(kind=kind, result="miss")
+        return False
+
+    def load(self, kind, key):
+        """
+        저장된 결과를 읽습니다.
+
+        Returns:
+            object | None: 저장된 값 (없거나 읽을 수 없으면 None)
+        """
+        path = self._path(kind, key, ".pkl")
+        if not self._hit(kind, path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            print(f"[캐시] 손상된 항목을 무시합니다: {path} ({e})")
+            return None
+
+    def store(self, kind, key, value):
+        """결과를 저장합니다."""
+        if not self.enabled:
+            return
+        path = self._path(kind, key, ".pkl")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def fetch_file(self, kind, key, dest, suffix=".png"):
+        """
+        캐시된 파일(차트 등)을 dest로 복사합니다.
+
+        Returns:
+            bool: 캐시에 있어 복사했으면 True
+        """
+        path = self._path(kind, key, suffix)
+        if not self._hit(kind, path):
+            return False
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        tmp_path = f"{dest}.{os.getpid()}.tmp"
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, dest)
+        return True
+
+    def has_file(self, kind, key, suffix=".png"):
+        """캐시에 파일이 있는지만 확인합니다. (조회 지표에 세지 않음)"""
+        return self.enabled and os.path.exists(self._path(kind, key, suffix))
+
+    def keep_file(self, kind, key, src, suffix=".png"):
+        """새로 만든 파일(차트 등)을 캐시에 복사해 둡니다."""
+        if not self.enabled or not os.path.exists(src):
+            return
+        path = self._path(kind, key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, path)
+
+    def chart(self, func, data, *params, path):
+        """
+        차트를 캐시를 거쳐 그립니다. 입력 데이터와 파라미터가 같으면 저장된 PNG를 복사하고, 아니면 그린 뒤 저장합니다.
+
+        Args:
+            func (callable): src/charts.py의 차트 함수 (data, *params, path) 형태
+            data (pandas.DataFrame): 차트 입력 데이터
+            *params: 차트 파라미터 (임계값 등)
+            path (str): 저장 경로
+
+        Returns:
+            str: 저장 경로
+        """
+        key = self.chart_key(func, data, *params)
+        if not self.fetch_file("chart", key, path):
+            func(data, *params, path)
+            self.keep_file("chart", key, path)
+        return path
+
+    @staticmethod
+    def chart_key(func, data, *params):
+        """차트 함수 이름 + 입력 데이터 해시 + 파라미터로 만든 차트 캐시 키"""
+        return cache_key("chart", func.__name__, frame_digest(data), params)
+
+    def prune(self, max_bytes):
+        """
+        캐시 전체 크기가 max_bytes를 넘으면 가장 오래 안 쓴 항목부터 지웁니다.
+
+        Returns:
+            int: 지운 항목 수
+        """
+        if not os.path.isdir(self.root):
+            return 0
+        entries = []
+        for folder, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                # 다른 프로세스가 쓰다 만 임시 파일은 하루가 지났을 때만 지움
+                if name.endswith(".tmp") and time.time() - stat.st_mtime < 86400:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
@@ -1,15 +1,36 @@
 import requests
 import json
+from requests.adapters import HTTPAdapter
+from src import metrics
 from src.config import Config
 
+# 계측 지표 (src/metrics.py)
+REQUEST_SECONDS = metrics.histogram("subway_api_request_seconds", "서울시 API 요청 소요 시간(초, 속도 제한 대기 제외)", ["line"])
+ROWS_RECEIVED = metrics.counter("subway_api_rows_total", "서울시 API에서 받은 열차 위치 행 수", ["line"])
+ERRORS = metrics.counter("subway_api_errors_total", "서울시 API 요청 오류 수 (type: 예외 종류 또는 API 결과 코드)", ["line", "type"])
+
 class SeoulSubwayClient:
     """
     서울시 지하철 실시간 위치 정보 API 클라이언트
     """
 
-    def __init__(self):
+    def __init__(self, rate_limiter=None, pool_size=None):
+        """
+        Args:
+            rate_limiter (RateLimiter, optional): 여러 스레드가 공유하는 요청 속도 제한기
+            pool_size (int, optional): 유지할 keep-alive 커넥션 수 (기본: 수집 스레드 수)
+        """
         self.api_key = Config.SEOUL_API_KEY
         self.base_url = Config.API_BASE_URL
+        self.timeout = Config.API_TIMEOUT
+        self.rate_limiter = rate_limiter
+
+        # 모든 호선 요청이 공유하는 keep-alive 세션 (매 요청마다 TCP 연결을 새로 맺지 않음)
+        pool_size = pool_size or max(Config.COLLECT_MAX_WORKERS, 1)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def get_realtime_position(self, subway_name):
         """
@@ -26,30 +47,45 @@ class SeoulSubwayClient:
         url = f"{self.base_url}/{self.api_key}/json/realtimePosition/0/100/{subway_name}"
 
         try:
-            response = requests.get(url)
-            response.raise_for_status()  # HTTP 에러 확인
+            # 설정된 요청 속도를 넘지 않도록 대기
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+
+            with REQUEST_SECONDS.time(line=subway_name):
+                response = self.session.get(url, timeout=self.timeout)
+                response.raise_for_status()  # HTTP 에러 확인
 
-            data = response.json()
+                data = response.json()
 
             # API 응답 상태 확인
             if 'realtimePositionList' in data:
-                return data['realtimePositionList']
+                rows = data['realtimePositionList']
+                ROWS_RECEIVED.inc(len(rows), line=subway_name)
+                return rows
             else:
                 # 데이터가 없거나 에러 메시지가 있는 경우
                 if 'RESULT' in data and 'MESSAGE' in data['RESULT']:
+                    ERRORS.inc(line=subway_name, type=data['RESULT'].get('CODE', 'RESULT'))
                     print(f"[API 경고] {subway_name}: {data['RESULT']['MESSAGE']}")
                 return []
 
         except requests.exceptions.RequestException as e:
+            ERRORS.inc(line=subway_name, type=type(e).__name__)
             print(f"[API 오류] {subway_name} 데이터 요청 실패: {e}")
             return []
         except json.JSONDecodeError:
+            ERRORS.inc(line=subway_name, type="JSONDecodeError")
             print(f"[API 오류] {subway_name} 응답 JSON 파싱 실패")
             return []
         except Exception as e:
+            ERRORS.inc(line=subway_name, type=type(e).__name__)
             print(f"[API 오류] {subway_name} 알 수 없는 오류: {e}")
             return []
 
+    def close(self):
+        """공유 세션의 커넥션을 정리합니다."""
+        self.session.close()
+
 if __name__ == "__main__":
     # 테스트 코드
     try:
@@ -0,0 +1,241 @@
+import json
+import os
+import pandas as pd
+from src import metrics
+from src.schema import LOCAL_TZ
+from src.sketch import KLLSketch
+
+ALL = "*"  # 전체(모든 역 / 모든 시간대)를 나타내는 키 값
+
+
+class DwellBaselines:
+    """
+    호선별/역별 평시 체류 시간 기준선
+    체류 시간(초) 분포를 키마다 KLL 분위수 스케치로 보관해 원본 이벤트 없이 IQR 임계값을 계산합니다.
+    - 키: (호선, 역, 시간대) - 역이 ALL이면 호선 기준선, 호선도 ALL이면 전체 기준선
+    - 시간대: bucket_hours 단위 구간 번호 (0이면 시간대 구분 없이 ALL만 유지)
+    - 키마다 메모리는 스케치 크기(약 3k개 값)로 고정되며, 실행 간에는 JSON 파일로 저장/누적합니다.
+    - 이미 반영한 구간은 호선별 updated_until(마지막 반영 이벤트의 도착 시각)로 걸러 같은 이벤트를 두 번 세지 않습니다.
+      (호선마다 따로 두므로 한 호선의 데이터가 늦게 동기화되어도 다른 호선의 진행 위치 때문에 버려지지 않음)
+    - 데이터 끝에서 아직 정차 중이던 이벤트(is_open)는 체류 시간이 잘려 있으므로 반영하지 않고,
+      같은 호선에서 그보다 늦게 도착한 이벤트도 다음 실행으로 미뤄 진행 위치가 그 정차를 넘지 않게 합니다.
+    """
+
+    def __init__(self, bucket_hours=0, k=200, min_count=30):
+        """
+        Args:
+            bucket_hours (int): 시간대 구간 크기(시간), 0이면 시간대 구분 없음
+            k (int): 스케치 크기 (KLLSketch 참고)
+            min_count (int): 기준선으로 쓰기 위한 최소 표본 수 (부족하면 상위 기준선 사용)
+        """
+        self.bucket_hours = bucket_hours
+        self.k = k
+        self.min_count = min_count
+        self.updated_until = {}      # 호선명 -> 마지막 반영 이벤트의 도착 시각 (ALL: 이전 형식 파일의 전체 값)
+        self._sketches = {}
+
+    def __len__(self):
+        return len(self._sketches)
+
+    def _bucket(self, times):
+        """도착 시각(한국 시간) Series -> 시간대 구간 번호 Series"""
+        return times.dt.tz_convert(LOCAL_TZ).dt.hour // self.bucket_hours
+
+    def _sketch(self, key):
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            sketch = self._sketches[key] = KLLSketch(self.k)
+        return sketch
+
+    @metrics.ANALYSIS_SECONDS.timed(step="baseline.update")
+    def update(self, events, time_column='arrival_time'):
+        """
+        정차 이벤트를 기준선에 반영합니다. (호선별 updated_until 이후 도착해 정상적으로 끝난 이벤트만)
+
+        Args:
+            events (pandas.DataFrame): line_name, station_name, dwell_seconds, 도착 시각 컬럼 포함
+                (is_open 컬럼이 있으면 진행 중인 정차를 구분, compute_dwell_events 결과)
+            time_column (str): 도착 시각 컬럼명
+
+        Returns:
+            int: 반영한 이벤트 수
+        """
+        if events is None or events.empty:
+            return 0
+        lines = events['line_name'].astype(str)
+
+        if 'is_open' in events.columns:
+            # 진행 중인 정차는 빼고, 같은 호선에서 가장 먼저 시작된 진행 중 정차 이후 도착한 이벤트는 다음 실행으로 미룸
+            # (이번에 진행 위치를 그 뒤로 옮기면 다음 실행에서 끝까지 관측된 같은 정차가 걸러지므로)
+            is_open = events['is_open'].astype(bool)
+            first_open = events[time_column][is_open].groupby(lines[is_open]).min()
+            limit = _lookup(lines, first_open)
+            keep = ~is_open & (limit.isna() | (events[time_column] < limit))
+            events, lines = events[keep], lines[keep]
+
+        if self.updated_until:
+            marks = _lookup(lines, pd.Series(self.updated_until))
+            if ALL in self.updated_until:
+                marks = marks.fillna(self.updated_until[ALL])
+            keep = marks.isna() | (events[time_column] > marks)
+            events, lines = events[keep], lines[keep]
+        if events.empty:
+            return 0
+
+        frame = pd.DataFrame({
+            'line_name': events['line_name'].astype(str),
+            'station_name': events['station_name'].astype(str),
+            'bucket': self._bucket(events[time_column]).astype(str) if self.bucket_hours else ALL,
+            'dwell_seconds': events['dwell_seconds'].astype(float),
+        })
+
+        # 가장 세분화된 키 단위로 묶은 뒤 각 스케치에 일괄 반영
+        levels = [['line_name', 'station_name', 'bucket'], ['line_name', 'bucket']]
+        if self.bucket_hours:
+            levels += [['line_name', 'station_name'], ['line_name']]
+        for columns in levels:
+            for values, group in frame.groupby(columns, sort=False)['dwell_seconds']:
+                parts = dict(zip(columns, values if isinstance(values, tuple) else (values,)))
+                key = (parts['line_name'], parts.get('station_name', ALL), parts.get('bucket', ALL))
+                self._sketch(key).update_many(group.tolist())
+        self._sketch((ALL, ALL, ALL)).update_many(frame['dwell_seconds'].tolist())
+
+        for line_name, latest in events[time_column].groupby(lines).max().items():
+            self._advance(line_name, latest)
+        return len(frame)
+
+    def _advance(self, line_name, latest):
+        current = self.updated_until.get(line_name)
+        if current is None or latest > current:
+            self.updated_until[line_name] = latest
+
+    def merge(self, other):
+        """
+        다른 기준선(예: 워커 프로세스가 호선별로 만든 기준선)의 스케치를 합칩니다.
+        같은 bucket_hours 설정으로 만든 기준선끼리만 합칠 수 있습니다.
+        """
+        if other.bucket_hours != self.bucket_hours:
+            raise ValueError(f"시간대 구간 설정이 다른 기준선은 합칠 수 없습니다. ({other.bucket_hours} != {self.bucket_hours})")
+        for key, sketch in other._sketches.items():
+            mine = self._sketches.get(key)
+            if mine is None:
+                self._sketches[key] = sketch
+            else:
+                mine.merge(sketch)
+        for line_name, latest in other.updated_until.items():
+            self._advance(line_name, latest)
+        return self
+
+    def find(self, line_name=ALL, station_name=ALL, hour=None):
+        """
+        표본이 충분한 가장 구체적인 기준선 스케치를 찾습니다.
+        (역+시간대 -> 역 -> 호선+시간대 -> 호선 -> 전체 순으로 대체, 전체 기준선은 표본 수와 관계없이 사용)
+
+        Returns:
+            tuple: (사용한 키, KLLSketch) 또는 (None, None)
+        """
+        bucket = str(hour // self.bucket_hours) if self.bucket_hours and hour is not None else ALL
+        candidates = [
+            (line_name, station_name, bucket), (line_name, station_name, ALL),
+            (line_name, ALL, bucket), (line_name, ALL, ALL), (ALL, ALL, ALL),
+        ]
+        for key in dict.fromkeys(candidates):
+            sketch = self._sketches.get(key)
+            if sketch is not None and (sketch.count >= self.min_count or key == (ALL, ALL, ALL)):
+                return key, sketch
+        return None, None
+
+    def threshold(self, line_name=ALL, station_name=ALL, hour=None, iqr_factor=1.5):
+        """
+        IQR 지연 임계값(초): Q3 + iqr_factor x (Q3 - Q1)
+
+        Returns:
+            float | None: 임계값 (기준선이 없으면 None)
+        """
+        _, sketch = self.find(line_name, station_name, hour)
+        if sketch is None:
+            return None
+        q1, q3 = sketch.quantiles([0.25, 0.75])
+        return q3 + iqr_factor * (q3 - q1)
+
+    def thresholds(self, events, by_station=False, iqr_factor=1.5, time_column='arrival_time'):
+        """
+        이벤트마다 해당 호선(또는 역) 기준선의 임계값(초)을 붙여 반환합니다.
+        임계값은 고유 키마다 한 번만 계산합니다.
+
+        Returns:
+            pandas.Series: events와 같은 인덱스의 임계값(초) (기준선이 없으면 NaN)
+        """
+        keys = pd.DataFrame({
+            'line_name': events['line_name'].astype(str),
+            'station_name': events['station_name'].astype(str) if by_station else ALL,
+            'hour': events[time_column].dt.tz_convert(LOCAL_TZ).dt.hour if self.bucket_hours else -1,
+        }, index=events.index)
+        unique = keys.drop_duplicates()
+        unique['threshold'] = [
+            self.threshold(line, station, hour if hour >= 0 else None, iqr_factor)
+            for line, station, hour in zip(unique['line_name'], unique['station_name'], unique['hour'])
+        ]
+        return keys.merge(unique, on=['line_name', 'station_name', 'hour'], how='left')['threshold'].set_axis(events.index)
+
+    def summary(self, iqr_factor=1.5):
+        """
+        호선별 전 시간대 기준선 요약 (표본 수, Q1, 중앙값, Q3, 임계값 - 초 단위)
+
+        Returns:
+            pandas.DataFrame: 호선명 순으로 정렬된 요약
+        """
+        rows = []
+        for (line_name, station_name, bucket), sketch in self._sketches.items():
+            if line_name == ALL or station_name != ALL or bucket != ALL:
+                continue
+            q1, median, q3 = sketch.quantiles([0.25, 0.5, 0.75])
+            rows.append({'line_name': line_name, 'count': sketch.count, 'q1': q1, 'median': median, 'q3': q3,
+                         'threshold': q3 + iqr_factor * (q3 - q1)})
+        return pd.DataFrame(rows, columns=['line_name', 'count', 'q1', 'median', 'q3', 'threshold']) \
+            .sort_values('line_name', ignore_index=True)
+
+    # 저장/불러오기 -----------------------------------------------------------
+
+    def save(self, path):
+        """기준선을 JSON 파일로 저장합니다. (임시 파일에 쓴 뒤 교체)"""
+        data = {
+            "bucket_hours": self.bucket_hours,
+            "k": self.k,
+            "updated_until": {line_name: ts.isoformat() for line_name, ts in self.updated_until.items()},
+            "sketches": [[list(key), sketch.to_dict()] for key, sketch in self._sketches.items()],
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, bucket_hours=0, k=200, min_count=30):
+        """
+        저장된 기준선을 읽습니다. 파일이 없거나 시간대 구간 설정이 달라졌으면 빈 기준선을 반환합니다.
+        """
+        baselines = cls(bucket_hours, k, min_count)
+        if not os.path.exists(path):
+            return baselines
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("bucket_hours") != bucket_hours:
+            print(f"[기준선] 시간대 구간 설정이 바뀌어 기준선을 새로 만듭니다. ({data.get('bucket_hours')} -> {bucket_hours})")
+            return baselines
+        baselines.k = data.get("k", k)
+        updated_until = data.get("updated_until")
+        if isinstance(updated_until, str):
+            # 이전 형식(전체 호선 공통 값): 호선별 값이 생기기 전까지 모든 호선에 적용
+            updated_until = {ALL: updated_until}
+        baselines.updated_until = {line_name: pd.Timestamp(ts).tz_convert(LOCAL_TZ)
+                                   for line_name, ts in (updated_until or {}).items()}
+        for key, sketch in data["sketches"]:
+            baselines._sketches[tuple(key)] = KLLSketch.from_dict(sketch)
+        return baselines
+
+
+def _lookup(lines, values):
+    """호선명 Series -> 호선별 값 Series (values: 호선명 인덱스 Series, 없는 호선은 NaT)"""
+    return pd.Series(values.reindex(lines.to_numpy()).array, index=lines.index)
@@ -0,0 +1,96 @@
+import os
+from src import metrics
+
+# 분석 결과 차트 렌더링
+# 차트 함수는 필요한 데이터만 인자로 받아 PNG 파일을 저장하므로 워커 프로세스에서 병렬로 실행할 수 있습니다.
+# matplotlib/seaborn은 함수 안에서 불러오고, 화면이 없는 환경(워커, cron)을 위해 Agg 백엔드를 사용합니다.
+
+
+def _pyplot():
+    """Agg 백엔드로 matplotlib/seaborn을 불러옵니다."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set_theme(style="whitegrid")
+    return plt, sns
+
+
+def _save(plt, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    plt.savefig(path)
+    plt.close()
+    return path
+
+
+@metrics.ANALYSIS_SECONDS.timed(step="charts.dwell_distribution")
+def plot_dwell_distribution(valid_dwell, threshold, path):
+    """
+    전체 체류 시간 히스토그램
+
+    Args:
+        valid_dwell (pandas.DataFrame): dwell_minutes 컬럼 포함
+        threshold (float): 전체 기준 임계값(분) (참고선)
+        path (str): 저장 경로
+    """
+    plt, sns = _pyplot()
+    plt.figure(figsize=(10, 6))
+    sns.histplot(data=valid_dwell, x='dwell_minutes', bins=30, kde=True, color='skyblue')
+    plt.title('Dwell Time Distribution (All Lines)')
+    plt.xlabel('Dwell Time (minutes)')
+    plt.ylabel('Frequency')
+    plt.axvline(x=threshold, color='r', linestyle='--', label=f'Overall Threshold ({threshold:.1f}m)')
+    plt.legend()
+    return _save(plt, path)
+
+
+@metrics.ANALYSIS_SECONDS.timed(step="charts.line_boxplot")
+def plot_line_boxplot(valid_dwell, line_thresholds, path):
+    """
+    호선별 체류 시간 Box Plot (호선별 임계값 표시)
+
+    Args:
+        valid_dwell (pandas.DataFrame): line_name, dwell_minutes 컬럼 포함
+        line_thresholds (dict): 호선명 -> 임계값(분)
+        path (str): 저장 경로
+    """
+    plt, sns = _pyplot()
+    plt.figure(figsize=(12, 8))
+    # 한글 폰트 문제로 line_name을 그대로 쓰면 깨질 수 있으나 일단 시도 (안되면 네모로 나옴)
+    # 깨짐 방지를 위해 영어 매핑 or 기본 폰트 사용 고려.
+    # 여기선 빠른 확인을 위해 호선명 사용하되, 깨지면 나중에 폰트 설정 필요.
+    order = sorted(valid_dwell['line_name'].astype(str).unique())
+    sns.boxplot(data=valid_dwell, x='line_name', y='dwell_minutes', order=order, palette="Set3")
+    # 호선별 임계값 표시
+    plt.scatter(range(len(order)), [line_thresholds.get(line) for line in order],
+                color='r', marker='_', s=400, zorder=3, label='Line Threshold')
+    plt.title('Dwell Time by Line')
+    plt.xticks(rotation=45)
+    plt.legend()
+    plt.tight_layout()
+    return _save(plt, path)
+
+
+@metrics.ANALYSIS_SECONDS.timed(step="charts.headway_distribution")
+def plot_headway_distribution(headways, line_name, path):
+    """
+    호선 하나의 배차 간격 히스토그램 (몰림/벌어짐 구분)
+
+    Args:
+        headways (pandas.DataFrame): headway_seconds, is_bunching, is_gap 컬럼 포함 (src/headway.py 결과)
+        line_name (str): 제목에 표시할 호선명
+        path (str): 저장 경로
+    """
+    plt, sns = _pyplot()
+    data = headways.dropna(subset=['headway_seconds'])
+    data = data.assign(
+        headway_minutes=data['headway_seconds'] / 60,
+        kind=data['is_bunching'].map({True: 'bunching', False: 'normal'}).where(~data['is_gap'], 'gap'),
+    )
+    plt.figure(figsize=(10, 6))
+    sns.histplot(data=data, x='headway_minutes', hue='kind', bins=40, multiple='stack',
+                 hue_order=['bunching', 'normal', 'gap'], palette={'bunching': 'tomato', 'normal': 'skyblue', 'gap': 'orange'})
+    plt.title(f'Headway Distribution ({line_name})')
+    plt.xlabel('Headway (minutes)')
+    plt.ylabel('Frequency')
+    return _save(plt, path)
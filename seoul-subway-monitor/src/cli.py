@@ -0,0 +1,145 @@
+import argparse
+import importlib
+import sys
+
+# 서울 지하철 모니터링 통합 CLI (collect / sync / analyze / report)
+# 사용법 (프로젝트 루트에서):
+#     python -m src.cli collect [--once]
+#     python -m src.cli sync
+#     python -m src.cli analyze {delay,headway,turnaround,overtake} [--hours N]
+#     python -m src.cli report [--hours N] [--workers N] [--no-charts] [--no-cache]
+#     python -m src.cli report --series {hour,day} [--windows N]
+#
+# 시작 시간을 줄이기 위해 이 모듈은 표준 라이브러리만 불러오고,
+# requests / pandas / pyarrow / matplotlib 등 무거운 의존성은 실행할 하위 명령의 모듈에서만 불러옵니다.
+# (cron으로 짧게 자주 실행하는 작업에서 사용하지 않는 라이브러리 로딩 시간이 반복되지 않도록)
+# 하위 명령별 import 시간은 benchmarks/bench_startup.py로 측정/검사합니다.
+
+# 하위 명령 -> 실행 함수 위치 ("모듈:함수")
+COMMANDS = {
+    "collect": "src.main:main",
+    "sync": "src.local_store:LocalStore",
+    "report": "src.parallel_analysis:run_parallel_analysis",
+}
+SERIES_REPORT = "src.parallel_analysis:run_report_series"  # report --series
+SERIES_DEFAULT_WINDOWS = {"hour": 24, "day": 7}  # report --series의 기본 확인 시간대 수
+
+# analyze 대상 -> 분석 함수 위치
+ANALYSES = {
+    "delay": "src.delay_analysis:analyze_delay",
+    "headway": "src.headway:analyze_interval",
+    "turnaround": "src.turnaround:analyze_turnaround",
+    "overtake": "src.overtake:analyze_overtake",
+}
+
+
+def load(target):
+    """
+    "모듈:이름" 형식의 위치에서 함수(클래스)를 불러옵니다. 모듈 import는 이 시점에 일어납니다.
+
+    Args:
+        target (str): "모듈:이름" 문자열
+
+    Returns:
+        object: 불러온 함수 또는 클래스
+    """
+    module_name, attr = target.split(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def resolve(args):
+    """파싱된 인자에 해당하는 실행 함수 위치를 반환합니다."""
+    if args.command == "analyze":
+        return ANALYSES[args.analysis]
+    if args.command == "report" and args.series:
+        return SERIES_REPORT
+    return COMMANDS[args.command]
+
+
+def _collect(args):
+    # 설정 검증은 가벼운 src.config만으로 수행 (설정이 잘못되면 requests 등을 불러오기 전에 종료)
+    from src.config import Config
+    try:
+        Config.validate()
+    except ValueError as e:
+        print(f"[오류] 초기 설정 실패: {e}")
+        print(".env 파일을 확인하고 올바른 API 키와 URL을 입력해주세요.")
+        return 1
+    load(resolve(args))(once=args.once)
+    return 0
+
+
+def _sync(args):
+    load(resolve(args))(args.root).sync()
+    return 0
+
+
+def _analyze(args):
+    options = {} if args.hours is None else {"hours": args.hours}
+    load(resolve(args))(**options)
+    return 0
+
+
+def _report(args):
+    options = dict(workers=args.workers, lines=args.lines, source=args.source, render_charts=not args.no_charts)
+    if args.no_cache:
+        from src.analysis_cache import AnalysisCache
+        options["cache"] = AnalysisCache(enabled=False)
+    if args.series:
+        load(resolve(args))(freq=args.series, windows=args.windows or SERIES_DEFAULT_WINDOWS[args.series], **options)
+    else:
+        load(resolve(args))(hours=args.hours, **options)
+    return 0
+
+
+def _write_metrics(command):
+    """METRICS_FILE이 설정되어 있으면 실행이 끝난 뒤 지표 스냅샷을 JSON Lines로 추가합니다."""
+    from src.config import Config
+    if Config.METRICS_FILE:
+        from src import metrics
+        metrics.REGISTRY.write_json_lines(Config.METRICS_FILE, source=command)
+
+
+def build_parser():
+    """CLI 인자 파서를 만듭니다."""
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="서울 지하철 실시간 모니터링 통합 CLI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    collect = commands.add_parser("collect", help="실시간 위치 수집기 실행 (1분 주기)")
+    collect.add_argument("--once", action="store_true", help="1회만 수집하고 종료 (cron 실행용)")
+    collect.set_defaults(handler=_collect)
+
+    sync = commands.add_parser("sync", help="Supabase의 새 데이터를 로컬 Parquet 저장소에 추가")
+    sync.add_argument("--root", default=None, help="저장소 폴더 경로 (기본: LOCAL_STORE_DIR)")
+    sync.set_defaults(handler=_sync)
+
+    analyze = commands.add_parser("analyze", help="개별 분석 실행 (결과 CSV 저장)")
+    analyze.add_argument("analysis", choices=sorted(ANALYSES), help="분석 종류")
+    analyze.add_argument("--hours", type=float, default=None, help="분석할 최근 시간 범위(시간) (기본: 분석별 기본값)")
+    analyze.set_defaults(handler=_analyze)
+
+    report = commands.add_parser("report", help="호선별 병렬 지연/배차 간격 분석 후 Markdown 보고서 생성")
+    report.add_argument("--hours", type=float, default=24, help="분석할 최근 시간 범위(시간)")
+    report.add_argument("--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 코어 수)")
+    report.add_argument("--lines", nargs="+", default=None, help="분석할 호선명 (기본: 전체)")
+    report.add_argument("--source", choices=["local", "remote"], default=None, help="데이터 소스 (기본: ANALYSIS_SOURCE)")
+    report.add_argument("--no-charts", action="store_true", help="차트를 그리지 않음")
+    report.add_argument("--no-cache", action="store_true", help="분석 캐시를 사용하지 않고 모두 다시 계산")
+    report.add_argument("--series", choices=["hour", "day"], default=None,
+                        help="시간대별 누적 보고서: 지난 시간대 중 보고서에 없는 것만 분석해 끝에 추가")
+    report.add_argument("--windows", type=int, default=None, help="--series에서 확인할 최근 시간대 수 (기본: hour 24, day 7)")
+    report.set_defaults(handler=_report)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    code = args.handler(args)
+    # 수집기는 주기마다 직접 기록하므로 분석/동기화 명령만 종료 시 기록
+    if args.command != "collect":
+        _write_metrics(args.command)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
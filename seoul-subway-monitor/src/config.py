@@ -4,6 +4,14 @@ from dotenv import load_dotenv
 # .env 파일 로드
 load_dotenv()
 
+# 모니터링할 지하철 호선 목록 (수집기와 분석이 함께 사용, 분석 쪽에서 수집기 모듈을 불러오지 않도록 여기에 둠)
+TARGET_LINES = [
+    "1호선", "2호선", "3호선", "4호선", "5호선",
+    "6호선", "7호선", "8호선", "9호선",
+    "경의중앙선", "수인분당선", "신분당선", "공항철도", "경춘선"
+]
+
+
 class Config:
     """
     프로젝트 설정 관리 클래스
@@ -23,6 +31,123 @@ class Config:
     # 여기서는 'realtimePosition' (실시간 열차 위치) 사용을 가정합니다.
     API_BASE_URL = "http://swopenAPI.seoul.go.kr/api/subway"
 
+    # 수집 동시성 설정
+    # COLLECT_MAX_WORKERS: 호선별 데이터를 동시에 수집할 스레드 수 (1이면 순차 수집)
+    # API_RATE_LIMIT: 초당 최대 API 요청 수 (0 이하이면 제한 없음)
+    # API_TIMEOUT: API 요청 타임아웃(초)
+    COLLECT_MAX_WORKERS = int(os.getenv("COLLECT_MAX_WORKERS", "4"))
+    API_RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "5"))
+    API_TIMEOUT = float(os.getenv("API_TIMEOUT", "10"))
+
+    # 적응형 폴링 설정 (src/scheduler.py, 호선별 수집 간격을 활동량에 맞춰 조절)
+    # ADAPTIVE_POLLING: 사용 여부 (false이면 1분마다 모든 호선 수집)
+    # POLL_DAILY_BUDGET: 하루(한국 시간) API 요청 예산 (기본: 1분 주기 x 14개 호선과 같은 20160회, 0이면 제한 없음)
+    # POLL_MIN_INTERVAL / POLL_MAX_INTERVAL: 호선별 수집 간격의 하한/상한(초, 예산이 모자라면 상한보다 길어질 수 있음)
+    # POLL_PEAK_HOURS: 자주 수집할 출퇴근 시간대 (예: "7-9,18-20" -> 7~9시, 18~20시)
+    # POLL_NIGHT_HOURS: 드물게 수집할 심야 시간대
+    ADAPTIVE_POLLING = os.getenv("ADAPTIVE_POLLING", "true").lower() == "true"
+    POLL_DAILY_BUDGET = int(os.getenv("POLL_DAILY_BUDGET", "20160"))
+    POLL_MIN_INTERVAL = float(os.getenv("POLL_MIN_INTERVAL", "20"))
+    POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", "300"))
+    POLL_PEAK_HOURS = os.getenv("POLL_PEAK_HOURS", "7-9,18-20")
+    POLL_NIGHT_HOURS = os.getenv("POLL_NIGHT_HOURS", "1-5")
+
+    # 수집 파이프라인 설정 (수집 스레드 -> 큐 -> 단일 DB 작성 스레드)
+    # PIPELINE_BATCH_ROWS: 이 건수 이상 모이면 즉시 일괄 삽입
+    # PIPELINE_FLUSH_INTERVAL: 첫 레코드 적재 후 이 시간(초)이 지나면 일괄 삽입
+    # PIPELINE_QUEUE_SIZE: 큐에 보관할 최대 배치(호선 단위) 수
+    # PIPELINE_PUT_TIMEOUT: 큐가 가득 찼을 때 수집 스레드가 기다릴 최대 시간(초)
+    PIPELINE_BATCH_ROWS = int(os.getenv("PIPELINE_BATCH_ROWS", "5000"))
+    PIPELINE_FLUSH_INTERVAL = float(os.getenv("PIPELINE_FLUSH_INTERVAL", "5"))
+    PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "100"))
+    PIPELINE_PUT_TIMEOUT = float(os.getenv("PIPELINE_PUT_TIMEOUT", "5"))
+
+    # 로컬 저장 대기열 설정 (src/spool.py, DB 장애 중 수집분을 디스크에 보관했다가 복구 후 멱등 upsert로 재전송)
+    # 사용 전 docs/migrations/004_add_record_key.sql 적용 필요 (record_key 컬럼과 (created_at, record_key) 고유 인덱스)
+    # SPOOL_ENABLED: 저장 대기열 사용 여부 (사용하면 적재 시각 created_at을 DB 대신 수집기가 정함)
+    # SPOOL_PATH: 대기열 SQLite 파일 경로
+    # SPOOL_MAX_MB: 대기열 최대 크기(MB, 압축 후 본문 기준), 넘으면 가장 오래된 배치부터 버림
+    # SPOOL_DRAIN_ROWS: 재전송 요청 한 번에 묶을 최대 행 수 (장애 복구 시 밀린 분량을 채우는 속도)
+    # SPOOL_RETRY_MAX_SECONDS: 재전송 실패 시 재시도 간격의 최대값(초, 1초부터 두 배씩 증가)
+    SPOOL_ENABLED = os.getenv("SPOOL_ENABLED", "false").lower() == "true"
+    SPOOL_PATH = os.getenv("SPOOL_PATH", "data/spool.sqlite3")
+    SPOOL_MAX_MB = float(os.getenv("SPOOL_MAX_MB", "512"))
+    SPOOL_DRAIN_ROWS = int(os.getenv("SPOOL_DRAIN_ROWS", "20000"))
+    SPOOL_RETRY_MAX_SECONDS = float(os.getenv("SPOOL_RETRY_MAX_SECONDS", "60"))
+
+    # 변경분 수집 설정 (직전 상태와 같은 열차 레코드는 저장하지 않음)
+    # DEDUP_ENABLED: 중복 제거 사용 여부
+    # DEDUP_TTL_SECONDS: 이 시간(초) 동안 보이지 않은 열차는 캐시에서 제거
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_TTL_SECONDS = float(os.getenv("DEDUP_TTL_SECONDS", "900"))
+
+    # 실시간 체류 추적 설정 (수집 즉시 정차 시간을 계산해 지연 경고)
+    # LIVE_DWELL_TRACKING: 수집기에서 체류 추적 사용 여부
+    # DWELL_ALERT_SECONDS: 이 시간(초) 이상 한 역에 머무르면 지연 경고
+    # DWELL_STALE_SECONDS: 이 시간(초) 동안 갱신이 없는 열차는 추적 상태에서 제거
+    LIVE_DWELL_TRACKING = os.getenv("LIVE_DWELL_TRACKING", "true").lower() == "true"
+    DWELL_ALERT_SECONDS = float(os.getenv("DWELL_ALERT_SECONDS", "180"))
+    DWELL_STALE_SECONDS = float(os.getenv("DWELL_STALE_SECONDS", "600"))
+
+    # 실시간 추월/근접 운행 감지 설정 (급행/일반 열차 간섭)
+    # LIVE_OVERTAKE_DETECTION: 수집기에서 추월 감지 사용 여부
+    # OVERTAKE_CLOSE_STATIONS: 앞 열차와 이 역 수 이하로 붙으면 근접 운행으로 집계
+    # STATION_ORDER_FILE: 호선/방향별 역 순서 인덱스 파일 (분석 실행 또는 수집기 종료 시 갱신)
+    LIVE_OVERTAKE_DETECTION = os.getenv("LIVE_OVERTAKE_DETECTION", "true").lower() == "true"
+    OVERTAKE_CLOSE_STATIONS = int(os.getenv("OVERTAKE_CLOSE_STATIONS", "1"))
+    STATION_ORDER_FILE = os.getenv("STATION_ORDER_FILE", "data/station_order.json")
+
+    # 실시간 스냅샷 API 설정 (수집기가 호선별 최신 열차 위치를 메모리에 보관하고 로컬 HTTP/JSON으로 제공)
+    # SNAPSHOT_API_ENABLED: 스냅샷 API 서버 사용 여부
+    # SNAPSHOT_API_HOST / SNAPSHOT_API_PORT: 바인딩 주소와 포트 (기본: 로컬에서만 접근)
+    SNAPSHOT_API_ENABLED = os.getenv("SNAPSHOT_API_ENABLED", "true").lower() == "true"
+    SNAPSHOT_API_HOST = os.getenv("SNAPSHOT_API_HOST", "127.0.0.1")
+    SNAPSHOT_API_PORT = int(os.getenv("SNAPSHOT_API_PORT", "8080"))
+
+    # 계측 지표 설정 (src/metrics.py, Prometheus 형식은 스냅샷 API 서버의 /metrics 에서 제공)
+    # METRICS_FILE: 수집 주기/분석 실행이 끝날 때마다 지표 스냅샷을 JSON Lines로 추가할 파일 (비우면 기록하지 않음)
+    METRICS_FILE = os.getenv("METRICS_FILE", "")
+
+    # DB 저장 요청 설정
+    # DB_WRITE_MODE: minimal(응답 본문 없음) / count(삽입 건수만 반환) / representation(삽입 행 전체 반환)
+    # DB_GZIP_REQUESTS: 요청 본문 gzip 압축 여부 (서버/게이트웨이가 Content-Encoding: gzip을 지원할 때만 사용)
+    # DB_GZIP_MIN_BYTES: 이 크기(바이트) 이상인 본문만 압축
+    # DB_TIMEOUT: DB 요청 타임아웃(초)
+    DB_WRITE_MODE = os.getenv("DB_WRITE_MODE", "minimal")
+    DB_GZIP_REQUESTS = os.getenv("DB_GZIP_REQUESTS", "false").lower() == "true"
+    DB_GZIP_MIN_BYTES = int(os.getenv("DB_GZIP_MIN_BYTES", "1024"))
+    DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "30"))
+
+    # 파티션 유지보수 설정 (docs/schema.sql의 maintain_realtime_partitions 함수를 하루 한 번 호출)
+    # PARTITION_MAINTENANCE: 수집기에서 유지보수 호출 여부 (pg_cron을 쓰는 경우 false)
+    # PARTITION_DAYS_AHEAD: 미리 만들어 둘 일 단위 파티션 수
+    # PARTITION_RETAIN_DAYS: 이 기간(일)이 지난 파티션은 삭제
+    PARTITION_MAINTENANCE = os.getenv("PARTITION_MAINTENANCE", "true").lower() == "true"
+    PARTITION_DAYS_AHEAD = int(os.getenv("PARTITION_DAYS_AHEAD", "7"))
+    PARTITION_RETAIN_DAYS = int(os.getenv("PARTITION_RETAIN_DAYS", "90"))
+
+    # 분석용 로컬 저장소 설정
+    # LOCAL_STORE_DIR: Supabase 데이터를 증분 동기화해 둘 Parquet 저장소 경로
+    # ANALYSIS_SOURCE: 분석 데이터 소스 (local: 동기화 후 로컬 저장소에서 읽기, remote: Supabase 직접 조회)
+    LOCAL_STORE_DIR = os.getenv("LOCAL_STORE_DIR", "data/store")
+    ANALYSIS_SOURCE = os.getenv("ANALYSIS_SOURCE", "local")
+
+    # 체류 시간 기준선 설정 (호선/역별 분위수 스케치로 지연 임계값 계산, 실행마다 누적)
+    # DWELL_BASELINE_FILE: 기준선 저장 파일
+    # DWELL_BASELINE_BUCKET_HOURS: 시간대 구간 크기(시간), 0이면 시간대 구분 없음 (예: 3 -> 0~3시, 3~6시, ...)
+    # DWELL_BASELINE_MIN_COUNT: 기준선으로 쓰기 위한 최소 표본 수 (부족하면 호선 -> 전체 기준선 사용)
+    DWELL_BASELINE_FILE = os.getenv("DWELL_BASELINE_FILE", "data/dwell_baselines.json")
+    DWELL_BASELINE_BUCKET_HOURS = int(os.getenv("DWELL_BASELINE_BUCKET_HOURS", "0"))
+    DWELL_BASELINE_MIN_COUNT = int(os.getenv("DWELL_BASELINE_MIN_COUNT", "30"))
+
+    # 분석 결과/차트 캐시 설정 (src/analysis_cache.py, 데이터 범위와 파라미터가 같으면 재계산/재렌더링 생략)
+    # ANALYSIS_CACHE: 캐시 사용 여부 (local 소스에서만 적용, remote 소스는 항상 다시 계산)
+    # ANALYSIS_CACHE_DIR: 캐시 폴더 경로
+    # ANALYSIS_CACHE_MAX_MB: 캐시 최대 크기(MB), 넘으면 오래 안 쓴 항목부터 삭제
+    ANALYSIS_CACHE = os.getenv("ANALYSIS_CACHE", "true").lower() == "true"
+    ANALYSIS_CACHE_DIR = os.getenv("ANALYSIS_CACHE_DIR", "data/cache")
+    ANALYSIS_CACHE_MAX_MB = int(os.getenv("ANALYSIS_CACHE_MAX_MB", "1024"))
+
     @classmethod
     def validate(cls):
         """필수 환경 변수가 설정되었는지 확인합니다."""
@@ -1,25 +1,80 @@
+import gzip
 import requests
 import json
+import time
+from datetime import datetime, timedelta, timezone
+from requests.adapters import HTTPAdapter
+from src import metrics
 from src.config import Config
 
+# API 수신 시각(recptnDt)은 시간대 정보가 없는 한국 시간
+KST = timezone(timedelta(hours=9))
+
+# 저장 모드별 Prefer 헤더
+# minimal: 응답 본문 없이 201만 반환 (가장 빠름)
+# count: 응답 본문 없이 Content-Range 헤더로 삽입 건수만 반환
+# representation: 삽입된 행 전체를 다시 직렬화해 반환 (디버깅용)
+WRITE_MODE_PREFER = {
+    "minimal": "return=minimal",
+    "count": "return=minimal, count=exact",
+    "representation": "return=representation",
+}
+
+# 멱등 저장(upsert_records)의 충돌 판정 컬럼 (docs/migrations/004_add_record_key.sql의 고유 인덱스)
+# 같은 배치를 다시 보내도 (적재 시각, 레코드 키)가 같으므로 이미 저장된 행은 무시됩니다.
+UPSERT_CONFLICT_COLUMNS = "created_at,record_key"
+
+# 계측 지표 (src/metrics.py)
+TRANSFORM_SECONDS = metrics.histogram("subway_db_transform_seconds", "API 원본 -> DB 레코드 변환 소요 시간(초, 호출 단위)")
+INSERT_SECONDS = metrics.histogram("subway_db_insert_seconds", "일괄 삽입 HTTP 요청 소요 시간(초, 직렬화/압축 포함)")
+INSERT_ROWS = metrics.counter("subway_db_insert_rows_total", "일괄 삽입 요청 행 수 (result: ok / error)", ["result"])
+INSERT_BYTES = metrics.counter("subway_db_insert_bytes_total", "일괄 삽입 요청 본문 전송 바이트 수")
+ERRORS = metrics.counter("subway_db_errors_total", "DB 변환/저장/조회 오류 수 (stage: transform / insert / select, type: 예외 종류 또는 HTTP 상태)", ["stage", "type"])
+
+# 조회 페이지 재시도 (_iter_pages): 실패 시 1초, 2초, 4초 간격으로 다시 시도한 뒤 예외를 올림
+PAGE_RETRIES = 3
+PAGE_RETRY_SECONDS = 1.0
+
 class SupabaseClient:
     """
     Supabase 데이터베이스 연동 클라이언트 (REST API 방식)
     무거운 supabase 라이브러리 없이 requests로 직접 데이터를 저장합니다.
     """
 
-    def __init__(self):
+    def __init__(self, write_mode=None, gzip_requests=None):
+        """
+        Args:
+            write_mode (str, optional): 저장 응답 모드 (minimal / count / representation, 기본: Config.DB_WRITE_MODE)
+            gzip_requests (bool, optional): 요청 본문 gzip 압축 여부 (기본: Config.DB_GZIP_REQUESTS)
+        """
         self.supabase_url = Config.SUPABASE_URL
         self.supabase_key = Config.SUPABASE_KEY
         self.table_name = "realtime_subway_positions"
+        self.timeout = Config.DB_TIMEOUT
+
+        self.write_mode = write_mode or Config.DB_WRITE_MODE
+        if self.write_mode not in WRITE_MODE_PREFER:
+            raise ValueError(f"지원하지 않는 DB_WRITE_MODE입니다: {self.write_mode}")
+        self.gzip_requests = Config.DB_GZIP_REQUESTS if gzip_requests is None else gzip_requests
         
-        # Supabase REST API 헤더 설정
+        # Supabase REST API 헤더 설정 (조회용)
         self.headers = {
             "apikey": self.supabase_key,
             "Authorization": f"Bearer {self.supabase_key}",
             "Content-Type": "application/json",
-            "Prefer": "return=representation"  # 삽입된 데이터 반환 요청
         }
+        # 저장용 헤더: 삽입 행을 되돌려 받지 않도록 Prefer 설정
+        self.write_headers = dict(self.headers, Prefer=WRITE_MODE_PREFER[self.write_mode])
+
+        # 커넥션 풀을 유지하는 재사용 세션 (매 저장마다 TLS 연결을 새로 맺지 않음)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # 최근 저장 요청의 본문 크기 (압축 전 / 전송)
+        self.last_payload_bytes = 0
+        self.last_sent_bytes = 0
 
     def insert_data(self, raw_data_list):
         """
@@ -31,49 +86,66 @@ class SupabaseClient:
         Returns:
             int: 삽입된 레코드 수
         """
-        if not raw_data_list:
-            return 0
+        return self.insert_records(self.transform(raw_data_list))
+
+    def transform(self, raw_data_list):
+        """
+        API 원본 데이터 리스트를 DB 스키마(snake_case 컬럼)에 맞는 레코드로 변환합니다.
+        수신 시각은 한국 시간 기준 timestamptz 문자열로, 코드값(ID, 상태, 방향, 급행)은 정수로 변환해
+        분석 시점에 문자열을 다시 해석하지 않도록 합니다.
+
+        Args:
+            raw_data_list (list): API로부터 받은 원본 데이터 리스트
+
+        Returns:
+            list: 변환된 레코드 리스트 (변환 실패 항목은 제외)
+        """
+        with TRANSFORM_SECONDS.time():
+            return self._transform(raw_data_list)
 
+    def _transform(self, raw_data_list):
         refined_data = []
-        for item in raw_data_list:
+        for item in raw_data_list or []:
             try:
                 # 데이터 변환 로직
                 is_last_train = True if str(item.get('lstcarAt')) == '1' else False
                 
                 record = {
-                    "line_id": item.get('subwayId'),
+                    "line_id": _to_int(item.get('subwayId')),
                     "line_name": item.get('subwayNm'),
-                    "station_id": item.get('statnId'),
+                    "station_id": _to_int(item.get('statnId')),
                     "station_name": item.get('statnNm'),
                     "train_number": item.get('trainNo'),
-                    "last_rec_date": item.get('lastRecptnDt'),
-                    "last_rec_time": item.get('recptnDt'),
-                    "direction_type": item.get('updnLine'),
-                    "dest_station_id": item.get('statnTid'),
+                    "last_rec_date": _to_date(item.get('lastRecptnDt')),
+                    "last_rec_time": _to_kst_timestamp(item.get('recptnDt')),
+                    "direction_type": _to_int(item.get('updnLine')),
+                    "dest_station_id": _to_int(item.get('statnTid')),
                     "dest_station_name": item.get('statnTnm'),
-                    "train_status": item.get('trainSttus'),
-                    "is_express": item.get('directAt'),
+                    "train_status": _to_int(item.get('trainSttus')),
+                    "is_express": _to_int(item.get('directAt')),
                     "is_last_train": is_last_train
                 }
                 refined_data.append(record)
             except Exception as e:
+                ERRORS.inc(stage="transform", type=type(e).__name__)
                 print(f"[DB 변환 오류] {e}")
                 continue
 
-        if not refined_data:
-            return 0
+        return refined_data
+
+    def insert_records(self, records):
+        """
+        이미 변환된 레코드 리스트를 한 번의 요청으로 일괄 삽입합니다.
+        여러 호선의 레코드를 모아 한 번에 저장할 때 사용합니다.
 
+        Args:
+            records (list): transform()으로 변환된 레코드 리스트
+
+        Returns:
+            int: 삽입된 레코드 수 (실패 시 0)
+        """
         try:
-            # Supabase REST API 호출 (Bulk Insert)
-            # URL: {SUPABASE_URL}/rest/v1/{TABLE_NAME}
-            url = f"{self.supabase_url}/rest/v1/{self.table_name}"
-            
-            response = requests.post(url, headers=self.headers, json=refined_data)
-            response.raise_for_status()
-            
-            inserted_rows = response.json()
-            return len(inserted_rows)
-            
+            return self.write_records(records)
         except requests.exceptions.HTTPError as e:
             print(f"[DB 삽입 오류] HTTP 상태 {e.response.status_code}: {e.response.text}")
             return 0
@@ -81,6 +153,96 @@ class SupabaseClient:
             print(f"[DB 삽입 오류] 저장 실패: {e}")
             return 0
 
+    def upsert_records(self, records):
+        """
+        created_at, record_key가 붙은 레코드를 멱등하게 일괄 저장합니다. (로컬 저장 대기열의 재전송용)
+        이미 저장된 (created_at, record_key) 행은 건너뛰므로, 응답을 받지 못해 같은 배치를 다시 보내도 중복되지 않습니다.
+        실패하면 예외를 그대로 올려 호출자가 재시도 여부를 판단하게 합니다.
+
+        Args:
+            records (list): src.spool.stamp_records()로 적재 시각/레코드 키를 붙인 레코드 리스트
+
+        Returns:
+            int: 요청한 레코드 수 (write_mode가 count/representation이면 실제 새로 삽입된 수)
+
+        Raises:
+            requests.exceptions.RequestException: 요청 실패 또는 HTTP 오류 응답
+        """
+        return self.write_records(records, on_conflict=UPSERT_CONFLICT_COLUMNS)
+
+    def write_records(self, records, on_conflict=None):
+        """
+        레코드를 POST 한 번으로 저장합니다. (insert_records / upsert_records 공통, 실패 시 예외)
+
+        Args:
+            records (list): 저장할 레코드 리스트
+            on_conflict (str, optional): 충돌 판정 컬럼 (주면 중복 행은 무시하는 upsert로 요청)
+
+        Returns:
+            int: 삽입된 레코드 수
+        """
+        if not records:
+            return 0
+
+        # Supabase REST API 호출 (Bulk Insert)
+        # URL: {SUPABASE_URL}/rest/v1/{TABLE_NAME}
+        url = f"{self.supabase_url}/rest/v1/{self.table_name}"
+        params = None
+        try:
+            with INSERT_SECONDS.time():
+                body, headers = self._encode_body(records)
+                if on_conflict:
+                    params = {"on_conflict": on_conflict}
+                    headers = dict(headers, Prefer=f"resolution=ignore-duplicates, {headers['Prefer']}")
+                INSERT_BYTES.inc(len(body))
+
+                response = self.session.post(url, headers=headers, params=params, data=body, timeout=self.timeout)
+                response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            INSERT_ROWS.inc(len(records), result="error")
+            ERRORS.inc(stage="insert", type=f"HTTP {e.response.status_code}")
+            raise
+        except Exception as e:
+            INSERT_ROWS.inc(len(records), result="error")
+            ERRORS.inc(stage="insert", type=type(e).__name__)
+            raise
+
+        INSERT_ROWS.inc(len(records), result="ok")
+        return self._inserted_count(response, records)
+
+    def _encode_body(self, records):
+        """
+        레코드를 JSON 본문으로 직렬화하고, 설정 시 gzip으로 압축합니다.
+
+        Returns:
+            tuple: (요청 본문 bytes, 요청 헤더 dict)
+        """
+        body = json.dumps(records, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        headers = self.write_headers
+        self.last_payload_bytes = len(body)
+
+        if self.gzip_requests and len(body) >= Config.DB_GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=5)
+            headers = dict(headers, **{"Content-Encoding": "gzip"})
+
+        self.last_sent_bytes = len(body)
+        return body, headers
+
+    def _inserted_count(self, response, records):
+        """
+        저장 모드에 맞춰 응답에서 삽입 건수를 구합니다.
+        minimal 모드는 응답 본문이 없으므로 2xx 응답이면 전송한 건수가 모두 저장된 것으로 봅니다.
+        """
+        if self.write_mode == "representation":
+            return len(response.json())
+
+        # count 모드: Content-Range: */{건수} 또는 0-{n}/{건수}
+        content_range = response.headers.get("Content-Range", "")
+        total = content_range.rpartition("/")[2]
+        if total.isdigit():
+            return int(total)
+        return len(records)
+
     def fetch_data(self, limit=1000):
         """
         저장된 데이터를 조회합니다.
@@ -101,7 +263,7 @@ class SupabaseClient:
                 "limit": str(limit)
             }
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=self.timeout)
             response.raise_for_status()
             
             return response.json()
@@ -109,6 +271,183 @@ class SupabaseClient:
             print(f"[DB 조회 오류] 데이터 조회 실패: {e}")
             return []
 
+    def run_partition_maintenance(self, days_ahead=None, retain_days=None):
+        """
+        파티션 유지보수 함수(maintain_realtime_partitions)를 RPC로 호출합니다.
+        앞으로 사용할 일 단위 파티션을 미리 만들고, 보관 기간이 지난 파티션을 삭제합니다.
+
+        Args:
+            days_ahead (int, optional): 미리 만들 파티션 일수 (기본: Config.PARTITION_DAYS_AHEAD)
+            retain_days (int, optional): 보관 기간(일) (기본: Config.PARTITION_RETAIN_DAYS)
+
+        Returns:
+            dict: {'created': 생성한 파티션 수, 'dropped': 삭제한 파티션 수}, 실패 시 빈 딕셔너리
+        """
+        payload = {
+            "days_ahead": days_ahead if days_ahead is not None else Config.PARTITION_DAYS_AHEAD,
+            "retain_days": retain_days if retain_days is not None else Config.PARTITION_RETAIN_DAYS,
+        }
+        try:
+            url = f"{self.supabase_url}/rest/v1/rpc/maintain_realtime_partitions"
+            response = self.session.post(url, headers=self.headers, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            result = response.json()
+            print(f"[DB 유지보수] 파티션 생성 {result.get('created', 0)}개, 삭제 {result.get('dropped', 0)}개")
+            return result
+        except Exception as e:
+            print(f"[DB 유지보수 오류] 파티션 관리 실패: {e}")
+            return {}
+
+    def iter_rows(self, start=None, end=None, lines=None, columns=None, page_size=1000, after=None):
+        """
+        저장된 데이터를 오래된 순서(created_at, id 오름차순)로 페이지 단위 조회하며 한 건씩 반환하는 제너레이터.
+        OFFSET 대신 마지막 행의 (created_at, id)를 커서로 쓰는 키셋 페이지네이션을 사용하므로
+        조회 범위가 커져도 페이지마다 일정한 비용으로 조회됩니다.
+
+        Args:
+            start (datetime | str, optional): 조회 시작 시각 (created_at >= start)
+            end (datetime | str, optional): 조회 종료 시각 (created_at < end)
+            lines (list, optional): 조회할 호선명 목록 (예: ['1호선', '2호선'])
+            columns (list, optional): 조회할 컬럼 목록 (기본: 전체). 커서용 created_at, id는 항상 포함
+            page_size (int): 한 번의 요청으로 가져올 행 수
+            after (tuple, optional): (created_at, id) 커서. 이 행 이후부터 조회 (증분 동기화용)
+
+        Yields:
+            dict: 조회된 행
+
+        Raises:
+            requests.RequestException, ValueError: 페이지 조회가 재시도 후에도 실패한 경우 (이미 반환한 행까지는 유효)
+        """
+        for page in self._iter_pages(start, end, lines, columns, page_size, after):
+            yield from page
+
+    def iter_frames(self, start=None, end=None, lines=None, columns=None, chunk_size=5000, after=None):
+        """
+        iter_rows()와 같은 조건으로 조회하되, 페이지마다 pandas DataFrame 청크를 반환합니다.
+        컬럼은 분석용 타입(category, int8, datetime)으로 변환됩니다. (src/schema.py 참고)
+        전체 데이터를 한 번에 메모리에 올리지 않고 청크 단위로 처리할 때 사용합니다.
+
+        Args:
+            chunk_size (int): 청크(페이지) 당 행 수
+            (나머지 인자는 iter_rows()와 동일)
+
+        Yields:
+            pandas.DataFrame: 조회된 행 청크
+        """
+        # 분석 코드에서만 필요한 pandas는 사용 시점에 불러옴 (수집기 구동 시간 단축)
+        import pandas as pd
+        from src.schema import coerce_frame
+
+        for page in self._iter_pages(start, end, lines, columns, chunk_size, after):
+            with metrics.ANALYSIS_SECONDS.time(step="db_client.dataframe"):
+                frame = coerce_frame(pd.DataFrame.from_records(page))
+            yield frame
+
+    def _iter_pages(self, start, end, lines, columns, page_size, after):
+        """키셋 페이지네이션으로 페이지(행 리스트)를 차례로 조회합니다."""
+        url = f"{self.supabase_url}/rest/v1/{self.table_name}"
+
+        select = "*"
+        if columns:
+            select = ",".join(dict.fromkeys(list(columns) + ["created_at", "id"]))
+
+        # 고정 조건 (시간 범위)
+        conditions = []
+        if start is not None:
+            conditions.append(f'created_at.gte."{_format_ts(start)}"')
+        if end is not None:
+            conditions.append(f'created_at.lt."{_format_ts(end)}"')
+
+        cursor = after
+        while True:
+            filters = list(conditions)
+            if cursor is not None:
+                # (created_at, id) > (커서 created_at, 커서 id)
+                ts, row_id = _format_ts(cursor[0]), cursor[1]
+                filters.append(f'or(created_at.gt."{ts}",and(created_at.eq."{ts}",id.gt.{row_id}))')
+
+            params = {
+                "select": select,
+                "order": "created_at.asc,id.asc",
+                "limit": str(page_size),
+            }
+            if filters:
+                params["and"] = f"({','.join(filters)})"
+            if lines:
+                quoted = ",".join(f'"{line}"' for line in lines)
+                params["line_name"] = f"in.({quoted})"
+
+            page = self._get_page(url, params, cursor)
+
+            if not page:
+                return
+
+            yield page
+
+            if len(page) < page_size:
+                return
+            cursor = (page[-1]["created_at"], page[-1]["id"])
+
+    def _get_page(self, url, params, cursor, retries=PAGE_RETRIES):
+        """
+        페이지 하나를 조회합니다. 실패하면 지수 백오프로 retries번 다시 시도하고, 그래도 실패하면 예외를 그대로 올립니다.
+        (중간 페이지 오류를 조회 끝으로 처리하면 호출하는 쪽이 잘린 데이터를 전체로 착각하므로)
+
+        Raises:
+            requests.RequestException, ValueError: 재시도 후에도 조회/JSON 해석에 실패한 경우
+        """
+        for attempt in range(retries + 1):
+            try:
+                response = self.session.get(url, headers=self.headers, params=params, timeout=self.timeout)
+                response.raise_for_status()
+                return response.json()
+            except (requests.RequestException, ValueError) as e:
+                ERRORS.inc(stage="select", type=type(e).__name__)
+                if attempt == retries:
+                    print(f"[DB 조회 오류] 페이지 조회 실패 (커서: {cursor}), 재시도 {retries}회 초과: {e}")
+                    raise
+                delay = PAGE_RETRY_SECONDS * 2 ** attempt
+                print(f"[DB 조회 오류] 페이지 조회 실패 (커서: {cursor}), {delay:g}초 후 재시도: {e}")
+                time.sleep(delay)
+
+
+def _to_int(value):
+    """API 코드값 문자열을 정수로 변환합니다. (비어 있거나 숫자가 아니면 None)"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_date(value):
+    """'20240101' 형식의 수신 날짜를 'YYYY-MM-DD'로 변환합니다. (비어 있거나 형식이 다르면 None)"""
+    value = str(value or "")
+    if len(value) == 8 and value.isdigit():
+        return f"{value[:4]}-{value[4:6]}-{value[6:]}"
+    return None
+
+
+def _to_kst_timestamp(value):
+    """
+    '2024-01-01 12:00:00' 형식의 수신 시각(한국 시간)을 timestamptz용 ISO 8601 문자열로 변환합니다.
+    형식이 다르면 None (원본 문자열을 보내면 timestamptz 변환 오류로 일괄 삽입 전체가 거부되므로)
+    """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=KST).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_ts(value):
+    """조회 조건에 사용할 시각을 ISO 8601 문자열로 변환합니다. (시간대 없는 datetime은 로컬 시간으로 간주)"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.astimezone()
+        return value.isoformat()
+    return str(value)
+
 if __name__ == "__main__":
     try:
         Config.validate()
@@ -0,0 +1,111 @@
+import threading
+import time
+
+
+class ChangeFilter:
+    """
+    열차별 최근 상태 캐시를 이용한 변경분 필터
+    같은 열차(호선 + 열차번호)의 역 ID, 운행 상태, 수신 시각이 직전 수집과 모두 같으면
+    중복 레코드로 보고 저장하지 않습니다.
+    일정 시간(TTL) 동안 보이지 않은 열차(운행 종료)는 캐시에서 제거합니다.
+    """
+
+    # 변경 여부를 판단하는 컬럼 (이 값들이 모두 같으면 동일 스냅샷으로 간주)
+    STATE_COLUMNS = ("station_id", "train_status", "last_rec_time")
+
+    def __init__(self, ttl_seconds=900):
+        """
+        Args:
+            ttl_seconds (float): 마지막 관측 후 캐시에서 제거하기까지의 시간(초)
+        """
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._last_state = {}  # (line_id, train_number) -> (상태 튜플, 마지막 관측 시각)
+
+        # 주기별 카운터
+        self.cycle_seen = 0
+        self.cycle_forwarded = 0
+
+    def filter(self, records):
+        """
+        변경된 레코드만 골라 반환합니다. (여러 수집 스레드에서 동시에 호출 가능)
+        새 상태는 여기서 기록하지 않으므로, 저장 파이프라인이 받아들인 뒤 commit()으로 기록해야 합니다.
+        (큐가 가득 차 버려진 배치의 상태가 남으면 이후 같은 스냅샷이 중복으로 걸러져 저장되지 않음)
+        변경이 없는 열차는 마지막 관측 시각만 갱신합니다.
+
+        Args:
+            records (list): transform()으로 변환된 레코드 리스트
+
+        Returns:
+            list: 직전 상태와 달라진 레코드 리스트
+        """
+        now = time.monotonic()
+        changed = []
+        pending = {}  # 이번 묶음 안에서 이미 고른 열차 상태 (같은 열차가 두 번 들어온 경우)
+
+        with self._lock:
+            for record in records:
+                key = (record.get("line_id"), record.get("train_number"))
+                state = tuple(record.get(col) for col in self.STATE_COLUMNS)
+
+                previous = pending.get(key) or self._last_state.get(key)
+                if previous is None or previous[0] != state:
+                    changed.append(record)
+                    pending[key] = (state, now)
+                else:
+                    self._last_state[key] = (state, now)
+
+            self.cycle_seen += len(records)
+            self.cycle_forwarded += len(changed)
+
+        return changed
+
+    def commit(self, records):
+        """
+        저장 파이프라인에 넘어간 레코드의 상태를 기록합니다. (filter() 결과를 put()이 받아들인 뒤 호출)
+
+        Args:
+            records (list): filter()가 반환한 레코드 리스트
+        """
+        now = time.monotonic()
+        with self._lock:
+            for record in records:
+                key = (record.get("line_id"), record.get("train_number"))
+                self._last_state[key] = (tuple(record.get(col) for col in self.STATE_COLUMNS), now)
+
+    def evict(self):
+        """
+        TTL이 지난 열차 상태를 캐시에서 제거합니다.
+
+        Returns:
+            int: 제거된 열차 수
+        """
+        deadline = time.monotonic() - self.ttl_seconds
+        with self._lock:
+            expired = [key for key, (_, seen_at) in self._last_state.items() if seen_at < deadline]
+            for key in expired:
+                del self._last_state[key]
+        return len(expired)
+
+    def end_cycle(self):
+        """
+        이번 주기의 카운터를 반환하고 초기화합니다. 만료된 열차 상태도 함께 정리합니다.
+
+        Returns:
+            dict: seen(수신), forwarded(저장 전달), suppressed(중복 제거), suppression_ratio, tracked_trains, evicted
+        """
+        evicted = self.evict()
+        with self._lock:
+            seen, forwarded = self.cycle_seen, self.cycle_forwarded
+            self.cycle_seen = 0
+            self.cycle_forwarded = 0
+            tracked = len(self._last_state)
+
+        return {
+            "seen": seen,
+            "forwarded": forwarded,
+            "suppressed": seen - forwarded,
+            "suppression_ratio": (seen - forwarded) / seen if seen else 0.0,
+            "tracked_trains": tracked,
+            "evicted": evicted,
+        }
@@ -1,52 +1,39 @@
-import pandas as pd
-from src.db_client import SupabaseClient
-import sys
+from datetime import datetime, timedelta
+from src.dwell import DWELL_COLUMNS, compute_dwell_events
+from src.local_store import load_frames
 
-def analyze_delay():
+def analyze_delay(hours=1):
+    """
+    최근 데이터로 열차별 체류 시간을 계산하고 장기 정차(지연 의심) 열차를 보고합니다.
+
+    Args:
+        hours (float): 분석할 최근 시간 범위(시간)
+    """
     print("=== 2. 실시간 열차 지연 및 체류 시간 분석 시 ===")
     
-    # 1. DB에서 최근 데이터 조회
-    db = SupabaseClient()
-    print("최신 데이터를 조회 중입니다...")
-    
-    # 최근 1시간 정도의 트렌드를 보기 위해 넉넉하게 조회 (10,000건)
-    data = db.fetch_data(limit=10000)
+    # 1. 최근 데이터 조회 (기본: 로컬 저장소를 증분 동기화한 뒤 읽기)
+    print(f"최근 {hours}시간 데이터를 조회 중입니다...")
     
-    if not data:
-        print("[오류] 분석할 데이터가 없습니다.")
-        return
-
-    df = pd.DataFrame(data)
-    print(f"총 {len(df)}건의 데이터를 로드했습니다.")
+    # 최근 1시간 정도의 트렌드를 보기 위해 시간 범위로 조회
+    # 필요한 컬럼만 페이지 단위로 받아 청크별로 집계하므로 전체 원본을 메모리에 올리지 않음
+    start = datetime.now() - timedelta(hours=hours)
+    frames = load_frames(start=start, columns=DWELL_COLUMNS)
     
-    # 2. 데이터 전처리
-    # 날짜/시간 변환 (last_rec_time이 문자열이므로 datetime으로 변환)
+    # 2~4. 열차별 + 역별 체류 시간 계산 (증분 체류 추적기로 레코드를 순서대로 흘려 정차 이벤트 생성)
+    # 동일 열차(train_number)가 한 역(station_name)에 머무른 구간의 '최초 시각'과 '최종 시각' 계산
+    # 주의: 열차 번호는 하루 동안 고유하다고 가정 (자정이 지나면 바뀔 수 있음)
+    # DB 저장 시점(created_at)이 더 정확할 수 있으나, API 원본의 수신 시간(last_rec_time)을 우선 사용
     try:
-        # DB 저장 시점(created_at)이 더 정확할 수 있으나, API 원본의 수신 시간(last_rec_time)을 우선 사용
-        # last_rec_time 예: "2024-01-01 12:00:00"
-        df['timestamp'] = pd.to_datetime(df['last_rec_time'])
+        dwell_stats, total_rows = compute_dwell_events(frames)
     except Exception as e:
-        print(f"[오류] 날짜 형식 변환 실패: {e}")
+        print(f"[오류] 체류 시간 계산 실패: {e}")
         return
 
-    # 3. 그룹화: 열차별 + 역별 체류 시간 계산
-    # 동일 열차(train_number)가 동일 역(station_name)에서 관측된 '최초 시각'과 '최종 시각' 계산
-    # 주의: 열차 번호는 하루 동안 고유하다고 가정 (자정이 지나면 바뀔 수 있음)
-    
-    # 분석 대상 컬럼
-    group_cols = ['line_name', 'station_name', 'train_number', 'direction_type']
-    
-    # 그룹별 집계
-    dwell_stats = df.groupby(group_cols).agg(
-        arrival_time=('timestamp', 'min'),    # 해당 역에서 처음 포착된 시간
-        last_seen_time=('timestamp', 'max'),  # 해당 역에서 마지막으로 포착된 시간
-        status=('train_status', 'last'),      # 가장 최근 상태 코드 (0:진입, 1:도착 등)
-        count=('train_number', 'count')       # 데이터 포착 횟수
-    ).reset_index()
+    if dwell_stats is None:
+        print("[오류] 분석할 데이터가 없습니다.")
+        return
 
-    # 4. 체류 시간(분) 계산
-    dwell_stats['dwell_seconds'] = (dwell_stats['last_seen_time'] - dwell_stats['arrival_time']).dt.total_seconds()
-    dwell_stats['dwell_minutes'] = dwell_stats['dwell_seconds'] / 60
+    print(f"총 {total_rows}건의 데이터를 로드했습니다.")
     
     # 5. 지연 의심 차량 필터링 및 리포트
     # 조건 A: 체류 시간이 3분 이상 (일반적인 정차 시간 초과)
@@ -67,10 +54,12 @@ def analyze_delay():
         print("-" * 80)
         
         # 상태 코드 매핑 (보기 쉽게)
-        status_map = {'0': '진입', '1': '도착', '2': '출발', '99': '운행중'}
+        status_map = {0: '진입', 1: '도착', 2: '출발', 3: '전역출발', 99: '운행중'}
         
         for _, row in delayed_trains.head(20).iterrows():
-            status_str = status_map.get(str(row['status']), str(row['status']))
+            # 상태 코드가 비어 있던 행은 로드 시 -1로 채워지므로(src/schema.py) '-'로 표시
+            status = int(row['status'])
+            status_str = status_map.get(status, '-' if status == -1 else str(status))
             arrival_str = row['arrival_time'].strftime("%H:%M")
             print(f"{row['line_name']:<10} | {row['station_name']:<10} | {row['train_number']:<8} | {status_str:<5} | {row['dwell_minutes']:<10.1f} | {arrival_str:<8}")
             
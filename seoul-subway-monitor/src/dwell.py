@@ -0,0 +1,289 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from src import metrics
+
+# 체류 시간 계산 그룹 기준: 호선, 역, 열차번호, 방향
+GROUP_COLS = ['line_name', 'station_name', 'train_number', 'direction_type']
+
+# 체류 시간 계산에 필요한 컬럼만 조회 (불필요한 컬럼 전송/메모리 절약)
+DWELL_COLUMNS = GROUP_COLS + ['last_rec_time', 'train_status']
+
+# 정차 이벤트 컬럼 (기존 배치 집계 결과와 같은 구성)
+EVENT_COLUMNS = GROUP_COLS + ['arrival_time', 'last_seen_time', 'status', 'count', 'dwell_seconds', 'dwell_minutes']
+
+KST = timezone(timedelta(hours=9))
+
+# 실시간 추적기(DwellTracker)는 순수 파이썬으로 동작하므로, pandas는 배치 분석 함수 안에서만 불러옵니다.
+# (수집기가 이 모듈을 불러올 때 pandas 로딩 시간이 시작 시간에 더해지지 않도록)
+
+
+class _OpenStop:
+    """열차 한 대가 현재 머무르고 있는 역의 정차 상태"""
+    __slots__ = ("station_name", "arrival", "last_seen", "status", "count", "alerted")
+
+    def __init__(self, station_name, ts, status):
+        self.station_name = station_name
+        self.arrival = ts
+        self.last_seen = ts
+        self.status = status
+        self.count = 1
+        self.alerted = False
+
+
+class DwellTracker:
+    """
+    증분 체류 시간 계산기
+    위치 레코드를 도착 순서대로 받아 열차(호선, 열차번호, 방향)별로 현재 정차 중인 역 상태만 유지하고,
+    열차가 다른 역으로 이동하면 이전 역의 정차를 닫아 정차 이벤트로 내보냅니다.
+    오랫동안 갱신이 없는 열차(운행 종료, 수신 중단)는 정차를 닫고 상태에서 제거하므로
+    메모리 사용량은 운행 중인 열차 수에 비례합니다.
+
+    시각은 모두 epoch 초(float)로 다루며, 기준은 수신 시각(last_rec_time)입니다.
+    """
+
+    name = "체류 추적"
+
+    def __init__(self, alert_seconds=180, stale_seconds=600, min_count=2, on_alert=None):
+        """
+        Args:
+            alert_seconds (float): 이 시간(초) 이상 같은 역에 머무르면 지연 경고 (정차 중에도 즉시 발생)
+            stale_seconds (float): 이 시간(초) 동안 갱신이 없는 열차는 정차를 닫고 상태에서 제거
+            min_count (int): 경고를 내기 위한 최소 관측 횟수 (한 번만 찍힌 건 통과 중일 수 있음)
+            on_alert (callable, optional): 경고 발생 시 호출할 함수 (인자: 진행 중인 정차 이벤트 dict)
+        """
+        self.alert_seconds = alert_seconds
+        self.stale_seconds = stale_seconds
+        self.min_count = min_count
+        self.on_alert = on_alert
+
+        self._open = {}              # (line_name, train_number, direction_type) -> _OpenStop
+        self._watermark = 0.0        # 지금까지 본 가장 늦은 수신 시각
+        self._next_evict = 0.0
+        self._lock = threading.Lock()
+
+        # 주기별 카운터 (수집기 연동용)
+        self._cycle_closed = 0
+        self._cycle_alerts = 0
+        self.late_records = 0        # 이미 지나간 역에 대한 늦은 레코드 (무시)
+
+    def feed(self, line_name, station_name, train_number, direction_type, ts, status):
+        """
+        위치 레코드 한 건을 반영합니다.
+
+        Args:
+            ts (float): 수신 시각 (epoch 초)
+            (나머지 인자는 레코드의 같은 이름 컬럼 값)
+
+        Returns:
+            list: 이번 레코드로 닫힌 정차 이벤트 리스트 (보통 비어 있거나 1건)
+        """
+        closed = []
+        key = (line_name, train_number, direction_type)
+        stop = self._open.get(key)
+
+        if stop is None:
+            self._open[key] = _OpenStop(station_name, ts, status)
+        elif stop.station_name == station_name:
+            # 같은 역에서 계속 관측됨: 정차 갱신
+            if ts < stop.arrival:
+                stop.arrival = ts
+            if ts >= stop.last_seen:
+                stop.last_seen = ts
+                stop.status = status
+            stop.count += 1
+            if (not stop.alerted and stop.count >= self.min_count
+                    and stop.last_seen - stop.arrival >= self.alert_seconds):
+                stop.alerted = True
+                self._cycle_alerts += 1
+                if self.on_alert:
+                    self.on_alert(self._event(key, stop))
+        elif ts < stop.last_seen:
+            # 이미 다음 역으로 넘어간 뒤 도착한 이전 역 레코드
+            self.late_records += 1
+        else:
+            # 다른 역으로 이동: 이전 역 정차를 닫음
+            closed.append(self._event(key, stop))
+            self._open[key] = _OpenStop(station_name, ts, status)
+
+        if ts > self._watermark:
+            self._watermark = ts
+            if ts >= self._next_evict:
+                closed.extend(self.evict())
+                self._next_evict = ts + min(self.stale_seconds, 60)
+
+        self._cycle_closed += len(closed)
+        return closed
+
+    def feed_record(self, record):
+        """
+        변환된 레코드(dict) 한 건을 반영합니다. 수신 시각은 ISO 문자열 또는 datetime을 받을 수 있습니다.
+
+        Returns:
+            list: 닫힌 정차 이벤트 리스트
+        """
+        ts = _to_epoch(record.get("last_rec_time"))
+        if ts is None:
+            return []
+        return self.feed(record.get("line_name"), record.get("station_name"), record.get("train_number"),
+                         record.get("direction_type"), ts, record.get("train_status"))
+
+    def evict(self):
+        """
+        워터마크 기준 stale_seconds 동안 갱신이 없는 열차의 정차를 닫고 상태에서 제거합니다.
+
+        Returns:
+            list: 닫힌 정차 이벤트 리스트
+        """
+        deadline = self._watermark - self.stale_seconds
+        stale = [key for key, stop in self._open.items() if stop.last_seen < deadline]
+        return [self._event(key, self._open.pop(key)) for key in stale]
+
+    def flush(self):
+        """
+        진행 중인 모든 정차를 닫아 반환합니다. (배치 분석 종료 시 사용)
+
+        Returns:
+            list: 닫힌 정차 이벤트 리스트
+        """
+        closed = [self._event(key, stop) for key, stop in self._open.items()]
+        self._open.clear()
+        return closed
+
+    def open_stops(self):
+        """
+        현재 정차 중인 열차의 진행 중 이벤트를 반환합니다.
+
+        Returns:
+            list: 진행 중인 정차 이벤트 리스트
+        """
+        return [self._event(key, stop) for key, stop in self._open.items()]
+
+    def suspect_counts(self):
+        """
+        호선별 지연 의심 열차 수 (지연 경고 기준을 넘겨 아직 정차 중인 열차)
+
+        Returns:
+            dict: 호선명 -> 열차 수
+        """
+        with self._lock:
+            counts = {}
+            for (line_name, _, _), stop in self._open.items():
+                if stop.alerted:
+                    counts[line_name] = counts.get(line_name, 0) + 1
+        return counts
+
+    def _event(self, key, stop):
+        line_name, train_number, direction_type = key
+        dwell_seconds = stop.last_seen - stop.arrival
+        return {
+            "line_name": line_name,
+            "station_name": stop.station_name,
+            "train_number": train_number,
+            "direction_type": direction_type,
+            "arrival_time": stop.arrival,
+            "last_seen_time": stop.last_seen,
+            "status": stop.status,
+            "count": stop.count,
+            "dwell_seconds": dwell_seconds,
+            "dwell_minutes": dwell_seconds / 60,
+        }
+
+    # 수집기 연동 (main.job의 observers) -------------------------------------
+
+    def observe(self, line, records):
+        """수집 스레드에서 호선별 레코드를 받아 반영합니다."""
+        with self._lock:
+            for record in records:
+                self.feed_record(record)
+
+    def end_cycle(self):
+        """이번 주기 요약 문자열을 반환하고 카운터를 초기화합니다."""
+        with self._lock:
+            summary = (f"정차 중 {len(self._open)}대, 정차 종료 {self._cycle_closed}건, "
+                       f"지연 경고 {self._cycle_alerts}건")
+            self._cycle_closed = 0
+            self._cycle_alerts = 0
+        return summary
+
+
+@metrics.ANALYSIS_SECONDS.timed(step="dwell.compute_events")
+def compute_dwell_events(frames, **tracker_options):
+    """
+    DataFrame 청크를 차례로 DwellTracker에 흘려 정차 이벤트 DataFrame을 만듭니다.
+    전체 원본 대신 운행 중인 열차 상태와 닫힌 이벤트만 메모리에 유지합니다.
+
+    Args:
+        frames (iterable): 호선별로 시간순 정렬된 DataFrame 청크 (iter_frames 결과)
+        **tracker_options: DwellTracker 생성 옵션
+
+    Returns:
+        tuple: (정차 이벤트 DataFrame 또는 None, 처리한 원본 행 수)
+            이벤트에는 is_open 컬럼이 추가됩니다. (True: 데이터 끝에서 아직 정차 중이라 도중에 잘린 이벤트,
+            체류 시간이 실제보다 짧을 수 있으므로 누적 기준선에는 반영하지 않음 - DwellBaselines.update)
+    """
+    from src.schema import EPOCH, coerce_frame
+
+    tracker = DwellTracker(**tracker_options)
+    events = []
+    total_rows = 0
+
+    for chunk in frames:
+        if chunk.empty:
+            continue
+        total_rows += len(chunk)
+
+        # 로더에서 분석용 타입으로 변환되지 않은 청크만 변환 (src/schema.py)
+        chunk = coerce_frame(chunk)
+        epoch = (chunk['last_rec_time'] - EPOCH).dt.total_seconds().to_numpy()
+
+        for line_name, station_name, train_number, direction_type, ts, status in zip(
+                chunk['line_name'], chunk['station_name'], chunk['train_number'],
+                chunk['direction_type'], epoch, chunk['train_status']):
+            closed = tracker.feed(line_name, station_name, train_number, direction_type, ts, status)
+            if closed:
+                events.extend(closed)
+
+    # 데이터 끝 기준으로 오래 갱신이 없던 열차는 정상 종료로 닫고, 남은 정차만 "진행 중"으로 구분
+    events.extend(tracker.evict())
+    closed_count = len(events)
+    events.extend(tracker.flush())
+    if not events:
+        return None, total_rows
+    df = event_frame(events)
+    df['is_open'] = df.index >= closed_count
+    return df, total_rows
+
+
+@metrics.ANALYSIS_SECONDS.timed(step="dwell.event_frame")
+def event_frame(events):
+    """정차 이벤트 리스트를 DataFrame으로 변환합니다. (epoch 초 -> 한국 시간 datetime)"""
+    import pandas as pd
+    from src.schema import LOCAL_TZ
+
+    df = pd.DataFrame(events, columns=EVENT_COLUMNS)
+    for col in ('arrival_time', 'last_seen_time'):
+        df[col] = pd.to_datetime(df[col], unit='s', utc=True).dt.tz_convert(LOCAL_TZ)
+    return df
+
+
+def format_event(event):
+    """정차 이벤트를 한 줄 문자열로 변환합니다. (경고 출력용)"""
+    arrival = datetime.fromtimestamp(event["arrival_time"], KST).strftime("%H:%M:%S")
+    return (f"{event['line_name']} {event['station_name']} 열차 {event['train_number']} "
+            f"(방향 {event['direction_type']}) {event['dwell_minutes']:.1f}분 정차 중 (최초 포착 {arrival})")
+
+
+def _to_epoch(value):
+    """ISO 문자열/datetime을 epoch 초로 변환합니다. (시간대 없는 값은 한국 시간으로 간주)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=KST)
+    return value.timestamp()
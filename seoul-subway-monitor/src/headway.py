@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from src import metrics
+from src.local_store import load_frames
+from src.schema import coerce_frame
+
+# 배차 간격 계산에 필요한 컬럼
+HEADWAY_COLUMNS = ['line_name', 'station_name', 'train_number', 'direction_type', 'last_rec_time']
+
+# 역/방향 그룹 기준
+STATION_COLS = ['line_name', 'station_name', 'direction_type']
+
+
+def _codes(series):
+    """정렬/비교용 정수 코드 배열 (category는 코드, 그 외는 값 그대로)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy()
+    return series.to_numpy()
+
+
+def _epoch_ns(series):
+    """시각 컬럼을 epoch 나노초 정수 배열로 변환합니다. (시간대 있는 컬럼도 객체 배열 없이 변환)"""
+    return series.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+
+def _changed(*arrays):
+    """정렬된 배열에서 직전 행과 키가 달라지는 위치를 True로 표시합니다."""
+    changed = np.zeros(len(arrays[0]), dtype=bool)
+    changed[0] = True
+    for arr in arrays:
+        changed[1:] |= arr[1:] != arr[:-1]
+    return changed
+
+
+def detect_arrivals(df):
+    """
+    위치 레코드에서 열차의 역 도착 시각을 추출합니다. (반복문 없이 정렬/비교만 사용)
+    열차(호선, 열차번호, 방향)별로 시간순 정렬한 뒤 직전 관측과 역이 달라지는 첫 관측을 도착으로 봅니다.
+
+    Args:
+        df (pandas.DataFrame): HEADWAY_COLUMNS를 포함한 위치 레코드
+
+    Returns:
+        pandas.DataFrame: 도착 이벤트 (STATION_COLS, train_number, arrival_time)
+    """
+    df = coerce_frame(df)
+    if df.empty:
+        return pd.DataFrame(columns=STATION_COLS + ['train_number', 'arrival_time'])
+
+    line = _codes(df['line_name'])
+    train = _codes(df['train_number'])
+    direction = df['direction_type'].to_numpy()
+    station = _codes(df['station_name'])
+    ts = _epoch_ns(df['last_rec_time'])
+
+    # 열차별 시간순 정렬 (np.lexsort는 마지막 키가 1순위)
+    order = np.lexsort((ts, direction, train, line))
+    new_visit = _changed(line[order], train[order], direction[order], station[order])
+
+    arrivals = df.iloc[order[new_visit]]
+    return (arrivals[STATION_COLS + ['train_number', 'last_rec_time']]
+            .rename(columns={'last_rec_time': 'arrival_time'})
+            .reset_index(drop=True))
+
+
+def compute_headways(arrivals):
+    """
+    역/방향별로 연속된 두 열차의 도착 간격을 계산합니다.
+
+    Args:
+        arrivals (pandas.DataFrame): detect_arrivals() 결과
+
+    Returns:
+        pandas.DataFrame: arrivals에 prev_train_number, headway_seconds 컬럼을 더한 결과
+            (역/방향의 첫 열차는 headway_seconds가 NaN)
+    """
+    if arrivals.empty:
+        return arrivals.assign(prev_train_number=pd.Series(dtype=object), headway_seconds=pd.Series(dtype=float))
+
+    line = _codes(arrivals['line_name'])
+    station = _codes(arrivals['station_name'])
+    direction = arrivals['direction_type'].to_numpy()
+    ts = _epoch_ns(arrivals['arrival_time'])
+
+    order = np.lexsort((ts, direction, station, line))
+    sorted_df = arrivals.iloc[order].reset_index(drop=True)
+    first = _changed(line[order], station[order], direction[order])
+
+    ts_sorted = ts[order]
+    headway = np.empty(len(order), dtype=float)
+    headway[0] = np.nan
+    headway[1:] = (ts_sorted[1:] - ts_sorted[:-1]) / 1e9
+    headway[first] = np.nan
+
+    trains = sorted_df['train_number'].to_numpy()
+    prev_train = np.empty(len(order), dtype=object)
+    prev_train[1:] = trains[:-1]
+    prev_train[first] = None
+
+    return sorted_df.assign(prev_train_number=prev_train, headway_seconds=headway)
+
+
+def flag_irregular(headways, bunch_ratio=0.5, gap_ratio=1.8):
+    """
+    역/방향별 중앙값 배차 간격과 비교해 몰림(bunching)과 벌어짐(gap)을 표시합니다.
+
+    Args:
+        headways (pandas.DataFrame): compute_headways() 결과
+        bunch_ratio (float): 간격이 중앙값 x bunch_ratio 미만이면 몰림
+        gap_ratio (float): 간격이 중앙값 x gap_ratio 초과이면 벌어짐
+
+    Returns:
+        pandas.DataFrame: median_headway, headway_ratio, is_bunching, is_gap 컬럼을 더한 결과
+    """
+    median = headways.groupby(STATION_COLS, observed=True)['headway_seconds'].transform('median')
+    ratio = headways['headway_seconds'] / median
+    return headways.assign(
+        median_headway=median,
+        headway_ratio=ratio,
+        is_bunching=ratio < bunch_ratio,
+        is_gap=ratio > gap_ratio,
+    )
+
+
+@metrics.ANALYSIS_SECONDS.timed(step="headway.summarize_stations")
+def summarize_stations(flagged):
+    """
+    역/방향별 배차 정기성 요약 (간격 중앙값, 변동계수, 몰림/벌어짐 횟수)
+
+    Returns:
+        pandas.DataFrame: 불규칙 횟수가 많은 순으로 정렬된 요약
+    """
+    valid = flagged.dropna(subset=['headway_seconds'])
+    summary = valid.groupby(STATION_COLS, observed=True).agg(
+        arrivals=('headway_seconds', 'size'),
+        median_headway=('headway_seconds', 'median'),
+        mean_headway=('headway_seconds', 'mean'),
+        std_headway=('headway_seconds', 'std'),
+        bunching=('is_bunching', 'sum'),
+        gaps=('is_gap', 'sum'),
+    ).reset_index()
+    summary['cv'] = summary['std_headway'] / summary['mean_headway']
+    summary['irregular'] = summary['bunching'] + summary['gaps']
+    return summary.sort_values(['irregular', 'cv'], ascending=False, ignore_index=True)
+
+
+@metrics.ANALYSIS_SECONDS.timed(step="headway.analyze")
+def analyze_headways(df, bunch_ratio=0.5, gap_ratio=1.8):
+    """
+    위치 레코드 -> 도착 추출 -> 간격 계산 -> 불규칙 표시를 한 번에 수행합니다.
+
+    Returns:
+        pandas.DataFrame: flag_irregular() 결과
+    """
+    return flag_irregular(compute_headways(detect_arrivals(df)), bunch_ratio, gap_ratio)
+
+
+def analyze_interval(hours=3):
+    """
+    최근 데이터로 역별 배차 간격 정기성을 분석하고 몰림/벌어짐이 잦은 구간을 보고합니다.
+
+    Args:
+        hours (float): 분석할 최근 시간 범위(시간)
+    """
+    print("=== 1. 배차 간격 정기성 분석 ===")
+    start = datetime.now() - timedelta(hours=hours)
+    frames = list(load_frames(start=start, columns=HEADWAY_COLUMNS))
+    if not frames:
+        print("[오류] 분석할 데이터가 없습니다.")
+        return
+
+    df = coerce_frame(pd.concat(frames, ignore_index=True))
+    print(f"총 {len(df)}건의 데이터를 로드했습니다.")
+
+    flagged = analyze_headways(df)
+    summary = summarize_stations(flagged)
+    print(f"\n[분석 결과] 도착 {flagged['headway_seconds'].notna().sum()}건, "
+          f"몰림 {int(flagged['is_bunching'].sum())}건, 벌어짐 {int(flagged['is_gap'].sum())}건")
+
+    print("\n[배차 불규칙 구간 Top 20]")
+    print(f"{'호선':<10} | {'역명':<12} | {'방향':<4} | {'중앙 간격(분)':<12} | {'변동계수':<8} | {'몰림':<4} | {'벌어짐':<4}")
+    print("-" * 80)
+    for _, row in summary.head(20).iterrows():
+        print(f"{row['line_name']:<10} | {row['station_name']:<12} | {row['direction_type']:<4} | "
+              f"{row['median_headway'] / 60:<12.1f} | {row['cv']:<8.2f} | {row['bunching']:<4} | {row['gaps']:<4}")
+
+    output_file = "analysis_result_headway.csv"
+    summary.to_csv(output_file, index=False, encoding='utf-8-sig')
+    print(f"\n역별 배차 간격 요약이 '{output_file}'에 저장되었습니다.")
+
+
+if __name__ == "__main__":
+    analyze_interval()
@@ -0,0 +1,275 @@
+import argparse
+import json
+import os
+from hashlib import blake2b
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from src import metrics
+from src.config import Config
+from src.schema import LOCAL_TZ, coerce_frame
+
+# 파티션 구조: {root}/date=YYYY-MM-DD/line_id=XXXX/part-{첫 행 id}-{n}.parquet
+# date는 적재 시각(created_at)의 한국 시간 기준 날짜
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string()), ("line_id", pa.string())]), flavor="hive")
+STATE_FILE = "_sync_state.json"
+
+
+class LocalStore:
+    """
+    Supabase 데이터를 로컬 Parquet 파일로 보관하는 컬럼 저장소
+    sync()는 마지막으로 받은 행(high-water mark) 이후의 데이터만 내려받아 날짜/호선별 파티션에 추가하고,
+    iter_frames()는 필요한 컬럼과 파티션만 읽어(컬럼 프루닝, 조건 푸시다운) 분석에 넘겨줍니다.
+    """
+
+    def __init__(self, root=None):
+        """
+        Args:
+            root (str, optional): 저장소 폴더 경로 (기본: Config.LOCAL_STORE_DIR)
+        """
+        self.root = root or Config.LOCAL_STORE_DIR
+        self.state_path = os.path.join(self.root, STATE_FILE)
+        self._time_ranges = {}  # (파일 경로, 크기, 수정 시각) -> created_at 범위 (fingerprint용)
+
+    def load_state(self):
+        """
+        마지막 동기화 위치를 읽습니다.
+
+        Returns:
+            tuple | None: (created_at, id) 커서, 동기화 이력이 없으면 None
+        """
+        if not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        return state["created_at"], state["id"]
+
+    def _save_state(self, created_at, row_id, rows):
+        # 임시 파일에 쓴 뒤 교체 (중간에 중단되어도 상태 파일이 깨지지 않도록)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created_at": created_at, "id": int(row_id), "last_sync_rows": rows}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def sync(self, db=None, page_size=5000, flush_rows=200000):
+        """
+        high-water mark 이후 새로 적재된 행만 Supabase에서 내려받아 Parquet 파티션에 추가합니다.
+
+        Args:
+            db (SupabaseClient, optional): 조회에 사용할 DB 클라이언트
+            page_size (int): 한 번에 조회할 행 수
+            flush_rows (int): 이 건수만큼 모이면 Parquet 파일로 기록 (작은 파일 난립 방지)
+
+        Returns:
+            int: 새로 저장한 행 수
+        """
+        # 로컬 저장소만 읽는 분석 실행에서는 requests를 불러오지 않도록 동기화할 때만 import
+        from src.db_client import SupabaseClient
+
+        db = db or SupabaseClient()
+        os.makedirs(self.root, exist_ok=True)
+
+        cursor = self.load_state()
+        print(f"[동기화] 시작 (기준 위치: {cursor[0] if cursor else '처음부터'})")
+
+        buffer = []
+        buffered_rows = 0
+        total = 0
+
+        try:
+            for frame in db.iter_frames(after=cursor, chunk_size=page_size):
+                buffer.append(frame)
+                buffered_rows += len(frame)
+                if buffered_rows >= flush_rows:
+                    total += self._write(pd.concat(buffer, ignore_index=True))
+                    buffer, buffered_rows = [], 0
+        finally:
+            # 조회가 중간에 실패해도 받은 만큼은 기록하고 high-water mark를 옮겨 다음 동기화가 이어서 받도록 함
+            if buffer:
+                total += self._write(pd.concat(buffer, ignore_index=True))
+
+        print(f"[동기화] 완료: {total}건 추가")
+        return total
+
+    def _write(self, df):
+        """DataFrame을 날짜/호선 파티션에 기록하고 high-water mark를 갱신합니다."""
+        last = df.iloc[-1]
+        cursor_created_at, cursor_id = last["created_at"], last["id"]
+        if isinstance(cursor_created_at, pd.Timestamp):
+            cursor_created_at = cursor_created_at.isoformat()
+
+        # 분석용 타입으로 저장 (category는 Parquet 사전 인코딩, 코드값은 int8)
+        df = coerce_frame(df)
+        df["date"] = df["created_at"].dt.tz_convert(LOCAL_TZ).dt.strftime("%Y-%m-%d")
+        df["line_id"] = df["line_id"].astype(str)
+
+        # 파일명에 첫 행 id를 넣어 경로 순서 = 적재 순서가 되도록 함
+        first_id = int(df["id"].iloc[0])
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        # 청크 내 값이 모두 비어 있는 컬럼은 null 타입으로 추론되므로 문자열로 고정 (파일 간 스키마 충돌 방지)
+        for i, field in enumerate(table.schema):
+            if pa.types.is_null(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+        ds.write_dataset(
+            table, self.root, format="parquet", partitioning=PARTITIONING,
+            basename_template=f"part-{first_id:015d}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+        self._save_state(cursor_created_at, cursor_id, len(df))
+        return len(df)
+
+    def iter_frames(self, start=None, end=None, lines=None, columns=None, batch_size=65536):
+        """
+        로컬 저장소에서 조건에 맞는 데이터를 DataFrame 청크로 읽습니다.
+        SupabaseClient.iter_frames()와 같은 형태로 사용할 수 있으며, 호선별로는 적재 순서가 유지됩니다.
+
+        Args:
+            start (datetime, optional): 조회 시작 시각 (created_at >= start)
+            end (datetime, optional): 조회 종료 시각 (created_at < end)
+            lines (list, optional): 조회할 호선명 목록
+            columns (list, optional): 읽을 컬럼 목록 (기본: 전체)
+            batch_size (int): 청크 당 최대 행 수
+
+        Yields:
+            pandas.DataFrame: 조회된 행 청크
+        """
+        if not os.path.isdir(self.root):
+            return
+
+        dataset = ds.dataset(self.root, format="parquet", partitioning=PARTITIONING,
+                             exclude_invalid_files=True, ignore_prefixes=["_", "."])
+
+        # 조건 푸시다운: 날짜 파티션으로 파일을 먼저 거르고, 행 조건은 Parquet 통계로 거름
+        condition = None
+        if start is not None:
+            start = _to_utc(start)
+            condition = _and(condition, ds.field("date") >= start.tz_convert(LOCAL_TZ).strftime("%Y-%m-%d"))
+            condition = _and(condition, ds.field("created_at") >= pa.scalar(start))
+        if end is not None:
+            end = _to_utc(end)
+            condition = _and(condition, ds.field("date") <= end.tz_convert(LOCAL_TZ).strftime("%Y-%m-%d"))
+            condition = _and(condition, ds.field("created_at") < pa.scalar(end))
+        if lines:
+            condition = _and(condition, ds.field("line_name").isin(list(lines)))
+
+        # 경로(날짜 -> 호선 -> 첫 행 id) 순서로 읽어 적재 순서를 보장
+        fragments = sorted(dataset.get_fragments(filter=condition), key=lambda fragment: fragment.path)
+        for fragment in fragments:
+            for batch in fragment.to_batches(schema=dataset.schema, columns=columns,
+                                             filter=condition, batch_size=batch_size):
+                if batch.num_rows:
+                    with metrics.ANALYSIS_SECONDS.time(step="local_store.dataframe"):
+                        frame = coerce_frame(batch.to_pandas())
+                    yield frame
+
+    def fingerprint(self, start=None, end=None):
+        """
+        조회 범위의 데이터가 들어 있는 Parquet 파일 목록 요약값 (분석 캐시 키, src/analysis_cache.py)
+        저장소는 파일을 추가만 하므로 범위에 새 행이 들어오지 않는 한 같은 값을 반환합니다.
+        파일 footer의 created_at 통계로 범위와 겹치는 파일만 골라, 오늘 파티션에 새 파일이 추가되어도
+        이미 지난 시간대의 값은 바뀌지 않습니다. (장애 후 늦게 저장된 행은 수집 시각 기준이라 해당 시간대만 바뀜)
+
+        Args:
+            start, end (datetime, optional): 조회 범위 (iter_frames()와 동일)
+
+        Returns:
+            str: 32자리 16진수 요약값
+        """
+        start = _to_utc(start) if start is not None else None
+        end = _to_utc(end) if end is not None else None
+        first = start.tz_convert(LOCAL_TZ).strftime("%Y-%m-%d") if start is not None else ""
+        last = end.tz_convert(LOCAL_TZ).strftime("%Y-%m-%d") if end is not None else "9999-12-31"
+
+        digest = blake2b(digest_size=16)
+        if not os.path.isdir(self.root):
+            return digest.hexdigest()
+        for date_dir in sorted(os.listdir(self.root)):
+            if not date_dir.startswith("date=") or not first <= date_dir[5:] <= last:
+                continue
+            for folder, _, files in sorted(os.walk(os.path.join(self.root, date_dir))):
+                for name in sorted(files):
+                    if not name.endswith(".parquet"):
+                        continue
+                    path = os.path.join(folder, name)
+                    stat = os.stat(path)
+                    low, high = self._time_range(path, stat)
+                    if (start is not None and high is not None and high < start) or \
+                            (end is not None and low is not None and low >= end):
+                        continue
+                    digest.update(f"{os.path.relpath(path, self.root)}\x1f{stat.st_size}\x1f{stat.st_mtime_ns}\n"
+                                  .encode("utf-8"))
+        return digest.hexdigest()
+
+    def _time_range(self, path, stat):
+        """Parquet footer 통계의 created_at (최소, 최대) (통계가 없으면 None, 파일별로 한 번만 읽음)"""
+        ranges = self._time_ranges
+        memo_key = (path, stat.st_size, stat.st_mtime_ns)
+        if memo_key not in ranges:
+            import pyarrow.parquet as pq
+            metadata = pq.ParquetFile(path).metadata
+            low = high = None
+            if "created_at" in metadata.schema.names:
+                column = metadata.schema.names.index("created_at")
+                for i in range(metadata.num_row_groups):
+                    stats = metadata.row_group(i).column(column).statistics
+                    if stats is None or not stats.has_min_max:
+                        low = high = None
+                        break
+                    low = stats.min if low is None else min(low, stats.min)
+                    high = stats.max if high is None else max(high, stats.max)
+            ranges[memo_key] = (pd.Timestamp(low) if low is not None else None,
+                                pd.Timestamp(high) if high is not None else None)
+        return ranges[memo_key]
+
+
+def load_frames(start=None, end=None, lines=None, columns=None, source=None, sync=True, root=None):
+    """
+    분석 스크립트용 데이터 로더.
+    local 소스는 먼저 증분 동기화를 수행한 뒤 로컬 Parquet 저장소에서 읽고,
+    remote 소스는 Supabase에서 직접 페이지 단위로 읽습니다.
+
+    Args:
+        source (str, optional): 'local' 또는 'remote' (기본: Config.ANALYSIS_SOURCE)
+        sync (bool): local 소스를 읽기 전에 증분 동기화할지 여부
+            (병렬 분석 워커처럼 이미 동기화된 저장소를 여러 프로세스가 읽을 때는 False)
+        root (str, optional): 로컬 저장소 경로 (기본: Config.LOCAL_STORE_DIR)
+        (나머지 인자는 LocalStore.iter_frames()와 동일)
+
+    Returns:
+        iterator: DataFrame 청크 이터레이터
+    """
+    source = source or Config.ANALYSIS_SOURCE
+    if source == "remote":
+        from src.db_client import SupabaseClient
+        return SupabaseClient().iter_frames(start=start, end=end, lines=lines, columns=columns)
+    if source != "local":
+        raise ValueError(f"지원하지 않는 ANALYSIS_SOURCE입니다: {source}")
+
+    store = LocalStore(root)
+    if sync:
+        store.sync()
+    return store.iter_frames(start=start, end=end, lines=lines, columns=columns)
+
+
+def _to_utc(value):
+    """datetime/문자열을 UTC Timestamp로 변환합니다. (시간대 없는 값은 로컬 시간으로 간주)"""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = pd.Timestamp(ts.to_pydatetime().astimezone())
+    return ts.tz_convert("UTC")
+
+
+def _and(left, right):
+    return right if left is None else left & right
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 Parquet 저장소 관리")
+    parser.add_argument("command", choices=["sync"], help="sync: Supabase의 새 데이터를 로컬 저장소에 추가")
+    parser.add_argument("--root", default=None, help="저장소 폴더 경로 (기본: LOCAL_STORE_DIR)")
+    args = parser.parse_args()
+
+    if args.command == "sync":
+        LocalStore(args.root).sync()
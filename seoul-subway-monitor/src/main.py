@@ -1,55 +1,196 @@
 import time
 import schedule
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from src.config import Config
+from src import metrics
+from src.config import TARGET_LINES, Config
 from src.api_client import SeoulSubwayClient
 from src.db_client import SupabaseClient
+from src.dedup import ChangeFilter
+from src.dwell import DwellTracker, format_event
+from src.overtake import OvertakeDetector, StationOrderIndex, format_event as format_overtake
+from src.pipeline import IngestPipeline
+from src.rate_limiter import RateLimiter
+from src.scheduler import AdaptivePoller
+from src.snapshot import LiveSnapshot, SnapshotServer
+from src.spool import WriteAheadSpool
 
-# 모니터링할 지하철 호선 목록
-TARGET_LINES = [
-    "1호선", "2호선", "3호선", "4호선", "5호선", 
-    "6호선", "7호선", "8호선", "9호선", 
-    "경의중앙선", "수인분당선", "신분당선", "공항철도", "경춘선"
-]
+# 수집 주기(초), 주기 소요 시간이 이 값을 넘으면 초과로 집계
+CYCLE_SECONDS = 60
 
-def job():
+# 수집기 지표 (src/metrics.py)
+CYCLE_DURATION = metrics.histogram("subway_collector_cycle_seconds", "수집 주기 전체 소요 시간(초)")
+CYCLE_OVERRUNS = metrics.counter("subway_collector_cycle_overruns_total", "소요 시간이 수집 주기를 넘은 횟수")
+ROWS_IN = metrics.counter("subway_collector_rows_in_total", "API에서 수신한 레코드 수", ["line"])
+ROWS_OUT = metrics.counter("subway_collector_rows_out_total", "변경분 필터 후 저장 큐에 넣은 레코드 수", ["line"])
+OBSERVER_SECONDS = metrics.histogram("subway_observer_seconds", "실시간 분석기 observe() 소요 시간(초)", ["observer"])
+OBSERVER_ERRORS = metrics.counter("subway_observer_errors_total", "실시간 분석기 오류 수", ["observer", "type"])
+CYCLE_ERRORS = metrics.counter("subway_collector_errors_total", "수집 주기 전체가 실패한 횟수", ["type"])
+QUEUE_DEPTH = metrics.gauge("subway_pipeline_queue_depth", "주기 종료 시 저장 큐에 대기 중인 항목 수")
+
+def _collect_line(api_client, pipeline, change_filter, observers, line):
+    """
+    단일 호선의 실시간 위치 데이터를 수집하여 파이프라인 큐에 넣습니다. (수집 스레드에서 실행)
+    실시간 분석기(observers)에는 변환된 전체 레코드를 먼저 넘기고,
+    변경분 필터가 주어지면 직전 수집과 달라진 열차 레코드만 큐에 넣습니다.
+
+    Returns:
+        tuple: (호선명, 수신 건수, 큐 적재 건수, 요청 소요 시간(초))
+    """
+    started = time.perf_counter()
+    data = api_client.get_realtime_position(line)
+    elapsed = time.perf_counter() - started
+
+    if not data:
+        return line, 0, 0, elapsed
+
+    records = pipeline.db_client.transform(data)
+    for observer in observers:
+        try:
+            with OBSERVER_SECONDS.time(observer=observer.name):
+                observer.observe(line, records)
+        except Exception as e:
+            OBSERVER_ERRORS.inc(observer=observer.name, type=type(e).__name__)
+            print(f"[실시간 분석 오류] {observer.name} ({line}): {e}")
+
+    if change_filter is not None:
+        records = change_filter.filter(records)
+    queued = len(records) if pipeline.put(records) else 0
+    if queued and change_filter is not None:
+        # 큐에 들어간 경우에만 상태 기록 (버려진 배치는 다음 주기에 다시 변경분으로 보냄)
+        change_filter.commit(records)
+    ROWS_IN.inc(len(data), line=line)
+    ROWS_OUT.inc(queued, line=line)
+    return line, len(data), queued, elapsed
+
+
+def job(api_client=None, pipeline=None, change_filter=None, observers=(), lines=None):
     """
     주기적으로 실행되는 작업 함수.
-    모든 대상 호선의 실시간 위치 데이터를 수집하여 DB에 저장합니다.
+    모든 대상 호선의 실시간 위치 데이터를 동시에 수집하여 저장 파이프라인에 넘깁니다.
+    실제 DB 저장은 파이프라인의 작성 스레드가 여러 호선을 모아 일괄 처리합니다.
+
+    Args:
+        api_client (SeoulSubwayClient, optional): 재사용할 API 클라이언트 (keep-alive 세션 공유)
+        pipeline (IngestPipeline, optional): 실행 중인 수집 파이프라인
+        change_filter (ChangeFilter, optional): 주기 간 공유하는 변경분 필터 (없으면 모든 레코드 저장)
+        observers (list, optional): 수집 즉시 레코드를 받는 실시간 분석기 목록
+            (observe(line, records), end_cycle() 메서드와 name 속성을 가진 객체)
+        lines (list, optional): 이번 주기에 수집할 호선 목록 (기본: TARGET_LINES 전체, 적응형 폴링은 수집할 차례인 호선만)
     """
-    print(f"\n[작업 시작] {datetime.now()}")
-    
+    lines = TARGET_LINES if lines is None else lines
+    print(f"\n[작업 시작] {datetime.now()}" + ("" if lines is TARGET_LINES else f" ({', '.join(lines)})"))
+    cycle_started = time.perf_counter()
+
+    # 클라이언트/파이프라인을 전달받지 못한 경우(단독 실행) 이번 주기 동안만 사용하고 정리
+    owns_pipeline = pipeline is None
     try:
-        api_client = SeoulSubwayClient()
-        db_client = SupabaseClient()
-        
-        total_inserted = 0
-        
-        for line in TARGET_LINES:
-            # 1. API 데이터 수집
-            data = api_client.get_realtime_position(line)
-            
-            if not data:
+        if api_client is None:
+            api_client = SeoulSubwayClient(rate_limiter=RateLimiter(Config.API_RATE_LIMIT))
+        if owns_pipeline:
+            pipeline = IngestPipeline(SupabaseClient()).start()
+
+        workers = max(Config.COLLECT_MAX_WORKERS, 1)
+        total_queued = 0
+
+        # 1. API 데이터 수집 (모든 호선 병렬 요청, 요청 속도는 RateLimiter가 제한)
+        fetch_started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="collector") as executor:
+            results = list(executor.map(lambda line: _collect_line(api_client, pipeline, change_filter, observers, line), lines))
+        fetch_elapsed = time.perf_counter() - fetch_started
+
+        # 2. 이번 주기 수집분을 바로 저장하도록 작성 스레드에 플러시 요청
+        pipeline.flush()
+        if owns_pipeline:
+            pipeline.close()
+
+        for line, received, queued, elapsed in results:
+            if not received:
                 continue
-                
-            # 2. DB 저장
-            count = db_client.insert_data(data)
-            total_inserted += count
-            
-            print(f"- {line}: {len(data)}건 수신 -> {count}건 저장")
-            
-            # API 호출 간 약간의 딜레이 (부하 방지)
-            time.sleep(0.5)
-            
-        print(f"[작업 완료] 총 {total_inserted}건 데이터 저장 완료.")
-        
+            total_queued += queued
+            print(f"- {line}: {received}건 수신 -> {queued}건 저장 대기 (요청 {elapsed:.2f}초)")
+
+        cycle_elapsed = time.perf_counter() - cycle_started
+        CYCLE_DURATION.observe(cycle_elapsed)
+        if cycle_elapsed > CYCLE_SECONDS:
+            CYCLE_OVERRUNS.inc()
+            print(f"[주기 초과] 수집 주기({CYCLE_SECONDS}초)보다 오래 걸렸습니다: {cycle_elapsed:.2f}초")
+        QUEUE_DEPTH.set(pipeline.depth())
+        stats = pipeline.stats.snapshot()
+        print(f"[작업 완료] 총 {total_queued}건 데이터 저장 요청 완료.")
+        print(f"[주기 통계] 전체 {cycle_elapsed:.2f}초 (수집 {fetch_elapsed:.2f}초, 스레드 {workers}개)")
+        if change_filter is not None:
+            dedup = change_filter.end_cycle()
+            print(f"[중복 제거] {dedup['seen']}건 중 {dedup['suppressed']}건 제외 ({dedup['suppression_ratio']:.1%}), "
+                  f"추적 열차 {dedup['tracked_trains']}대, 만료 {dedup['evicted']}대")
+        for observer in observers:
+            print(f"[{observer.name}] {observer.end_cycle()}")
+        print(f"[저장 통계] 큐 대기 {pipeline.depth()}개 | 최근 플러시 {stats['last_flush_rows']}건/{stats['last_flush_seconds']:.2f}초/{stats['last_sent_bytes'] / 1024:.1f}KB | "
+              f"누적 {stats['written_rows']}건 저장 ({stats['rows_per_second']:.1f}건/초), "
+              f"실패 {stats['failed_rows']}건, 버림 {stats['dropped_rows']}건, 대기 발생 {stats['blocked_puts']}회")
+        if pipeline.spool is not None:
+            spool = pipeline.spool.depth()
+            print(f"[저장 대기열] 재전송 대기 {spool['rows']}건 (가장 오래된 배치 {spool['oldest_age_seconds']:.0f}초 전, "
+                  f"파일 {spool['file_bytes'] / 1024 ** 2:.1f}MB), 재시도 {stats['retries']}회, 거부 보관 {spool['dead_rows']}건")
+        if Config.METRICS_FILE:
+            metrics.REGISTRY.write_json_lines(Config.METRICS_FILE, source="collector")
+
     except Exception as e:
+        CYCLE_ERRORS.inc(type=type(e).__name__)
         print(f"[치명적 오류] 작업 실행 중 예외 발생: {e}")
 
-def main():
+def _build_observers():
+    """설정에 따라 수집기에 붙일 실시간 분석기 목록을 만듭니다."""
+    observers = []
+    if Config.LIVE_DWELL_TRACKING:
+        observers.append(DwellTracker(
+            alert_seconds=Config.DWELL_ALERT_SECONDS,
+            stale_seconds=Config.DWELL_STALE_SECONDS,
+            on_alert=lambda event: print(f"[지연 경고] {format_event(event)}"),
+        ))
+    if Config.LIVE_OVERTAKE_DETECTION:
+        observers.append(OvertakeDetector(
+            StationOrderIndex.load(Config.STATION_ORDER_FILE),
+            close_stations=Config.OVERTAKE_CLOSE_STATIONS,
+            on_event=lambda event: print(f"[추월 감지] {format_overtake(event)}"),
+        ))
+    if Config.SNAPSHOT_API_ENABLED:
+        observers.append(LiveSnapshot())
+    return observers
+
+def _build_poller(observers):
+    """적응형 폴링 스케줄러를 만듭니다. (체류 추적기가 있으면 지연 의심 열차 수를 활동량에 반영)"""
+    tracker = next((observer for observer in observers if isinstance(observer, DwellTracker)), None)
+    return AdaptivePoller(
+        TARGET_LINES, Config.POLL_DAILY_BUDGET,
+        base_interval=CYCLE_SECONDS,
+        min_interval=Config.POLL_MIN_INTERVAL,
+        max_interval=Config.POLL_MAX_INTERVAL,
+        peak_hours=Config.POLL_PEAK_HOURS,
+        night_hours=Config.POLL_NIGHT_HOURS,
+        suspects=tracker.suspect_counts if tracker is not None else None,
+    )
+
+def _start_snapshot_server(observers):
+    """스냅샷 observer가 있으면 HTTP 서버를 시작합니다. (포트를 열 수 없으면 서버 없이 계속 수집)"""
+    for observer in observers:
+        if isinstance(observer, LiveSnapshot):
+            try:
+                server = SnapshotServer(observer, Config.SNAPSHOT_API_HOST, Config.SNAPSHOT_API_PORT).start()
+            except OSError as e:
+                print(f"[오류] 스냅샷 API 서버 시작 실패: {e}")
+                return None
+            print(f"스냅샷 API 서버가 시작되었습니다. ({server.address}/lines)")
+            return server
+    return None
+
+def main(once=False):
     """
     메인 실행 함수.
     설정 검증 후 스케줄러를 가동합니다.
+
+    Args:
+        once (bool): True이면 스케줄러 없이 1회만 수집하고 종료 (cron 등 외부 스케줄러에서 실행할 때)
     """
     print("=== 서울 지하철 실시간 모니터링 시스템 가동 ===")
     
@@ -62,22 +203,67 @@ def main():
         print(".env 파일을 확인하고 올바른 API 키와 URL을 입력해주세요.")
         return
 
-    # 2. 초기 1회 실행
-    job()
-    
-    # 3. 스케줄 설정 (1분마다 실행)
-    schedule.every(1).minutes.do(job)
-    
-    print("스케줄러가 시작되었습니다. (주기: 1분)")
-    print("Ctrl+C를 눌러 종료할 수 있습니다.")
-    
-    while True:
-        try:
-            schedule.run_pending()
-            time.sleep(1)
-        except KeyboardInterrupt:
-            print("\n시스템을 종료합니다.")
-            break
+    # 2. 클라이언트, 저장 파이프라인, 변경분 필터 생성 (keep-alive 세션, 요청 속도 제한기, 작성 스레드, 열차 상태 캐시를 모든 주기에서 공유)
+    api_client = SeoulSubwayClient(rate_limiter=RateLimiter(Config.API_RATE_LIMIT))
+    # DB 장애 대비 로컬 저장 대기열 (이전 실행에서 남은 배치는 시작하자마자 재전송)
+    spool = WriteAheadSpool(Config.SPOOL_PATH, int(Config.SPOOL_MAX_MB * 1024 ** 2)) if Config.SPOOL_ENABLED else None
+    pipeline = IngestPipeline(SupabaseClient(), spool=spool).start()
+    change_filter = ChangeFilter(Config.DEDUP_TTL_SECONDS) if Config.DEDUP_ENABLED else None
+    observers = _build_observers()
+
+    # 적응형 폴링: 호선별 간격을 활동량에 맞춰 정하고 하루 요청 예산 안에서 배분 (observer로 활동량 수집)
+    poller = None
+    if Config.ADAPTIVE_POLLING and not once:
+        poller = _build_poller(observers)
+        observers.append(poller)
+
+    # 3. 초기 1회 실행 (모든 호선)
+    job(api_client, pipeline, change_filter, observers, lines=poller.due() if poller else None)
+
+    server = None
+    if not once:
+        # 4. 스케줄 설정 (고정 주기: 1분마다 모든 호선 / 적응형: 아래 루프에서 수집할 차례인 호선만)
+        #    및 스냅샷 API 서버 시작 (/metrics 로 지표도 제공)
+        server = _start_snapshot_server(observers)
+        if poller is None:
+            schedule.every(CYCLE_SECONDS).seconds.do(job, api_client, pipeline, change_filter, observers)
+
+        # 5. 파티션 유지보수 (시작 시 1회 + 매일 04:00, 미리 파티션 생성 및 오래된 파티션 삭제)
+        if Config.PARTITION_MAINTENANCE:
+            pipeline.db_client.run_partition_maintenance()
+            schedule.every().day.at("04:00").do(pipeline.db_client.run_partition_maintenance)
+
+        if poller is None:
+            print("스케줄러가 시작되었습니다. (주기: 1분)")
+        else:
+            print(f"스케줄러가 시작되었습니다. (적응형 폴링: 호선별 {Config.POLL_MIN_INTERVAL:g}~{Config.POLL_MAX_INTERVAL:g}초, "
+                  f"하루 요청 예산 {Config.POLL_DAILY_BUDGET}회)")
+        print("Ctrl+C를 눌러 종료할 수 있습니다.")
+
+        while True:
+            try:
+                schedule.run_pending()
+                if poller is not None:
+                    lines = poller.due()
+                    if lines:
+                        job(api_client, pipeline, change_filter, observers, lines=lines)
+                time.sleep(1)
+            except KeyboardInterrupt:
+                print("\n시스템을 종료합니다.")
+                break
+
+    # 남은 레코드 저장 후 종료
+    if server is not None:
+        server.close()
+    pipeline.close()
+    api_client.close()
+    if spool is not None:
+        spool.close()
+
+    # 수집 중 학습한 역 순서 저장 (다음 실행 시 바로 사용)
+    for observer in observers:
+        if isinstance(observer, OvertakeDetector):
+            observer.order.save(Config.STATION_ORDER_FILE)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,276 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+
+# 수집기/분석 계측 지표 (카운터, 게이지, 히스토그램)
+# 모듈마다 지표를 한 번 등록해 두고 요청/주기마다 값만 더하므로, 호출 비용은 잠금 한 번과 dict 조회 정도입니다.
+# (운영 중에도 항상 켜 두는 것을 전제로 함)
+# 내보내기: Prometheus 텍스트 형식(to_prometheus, 스냅샷 API 서버의 /metrics) 또는 JSON Lines 파일(write_json_lines)
+
+# 기본 히스토그램 구간(초): 수 ms짜리 변환부터 수십 초짜리 수집 주기까지
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class _Metric:
+    """라벨 값 조합별로 값을 보관하는 지표 공통 부분"""
+
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}  # 라벨 값 튜플 -> 값
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def items(self):
+        """(라벨 dict, 값) 목록"""
+        with self._lock:
+            values = [(key, list(value) if isinstance(value, list) else value) for key, value in self._values.items()]
+        return [(dict(zip(self.labels, key)), value) for key, value in values]
+
+
+class Counter(_Metric):
+    """누적 카운터 (증가만 함)"""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """현재 값 (큐 깊이 등)"""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """
+    고정 구간 히스토그램 (소요 시간 분포)
+    값마다 구간별 개수, 합계, 건수만 갱신하므로 메모리는 라벨 조합 수 x 구간 수로 고정됩니다.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [구간별 개수..., +Inf 구간 개수, 합계, 건수]
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def time(self, **labels):
+        """with 블록의 소요 시간을 기록하는 타이머"""
+        return _Timer(self, labels)
+
+    def timed(self, **labels):
+        """함수 실행 시간을 기록하는 데코레이터"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with _Timer(self, labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def quantile(self, q, **labels):
+        """
+        구간 경계로 근사한 분위수 (값이 없으면 None)
+
+        Returns:
+            float | None: 누적 비율이 q 이상이 되는 첫 구간의 상한 (마지막 구간이면 inf)
+        """
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            counts = list(state[:-2]) if state else None
+        if not counts or not sum(counts):
+            return None
+        target = q * sum(counts)
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+
+class _Timer:
+    """Histogram.time()이 반환하는 컨텍스트 매니저"""
+    __slots__ = ("histogram", "labels", "started", "seconds")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.started
+        self.histogram.observe(self.seconds, **self.labels)
+        return False
+
+
+class Registry:
+    """지표 등록소 (같은 이름으로 다시 등록하면 기존 지표를 반환)"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, help_text, labels, **options):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labels, **options)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"이미 다른 종류로 등록된 지표입니다: {name} ({metric.kind})")
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self._register(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help_text, labels, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def metrics(self):
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+    def to_prometheus(self):
+        """Prometheus 텍스트 노출 형식(0.0.4)으로 변환합니다."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, value in metric.items():
+                if metric.kind != "histogram":
+                    lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float("inf"),), value[:-2]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    lines.append(f"{metric.name}_bucket{_format_labels(dict(labels, le=le))} {cumulative}")
+                lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(value[-2])}")
+                lines.append(f"{metric.name}_count{_format_labels(labels)} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """
+        모든 지표의 현재 값을 JSON 직렬화 가능한 목록으로 반환합니다.
+        히스토그램은 buckets(구간 상한), counts(구간별 개수, 마지막은 +Inf), sum, count로 표현합니다.
+        """
+        result = []
+        for metric in self.metrics():
+            for labels, value in metric.items():
+                item = {"name": metric.name, "type": metric.kind, "labels": labels}
+                if metric.kind == "histogram":
+                    item.update(buckets=list(metric.buckets), counts=list(value[:-2]), sum=value[-2], count=value[-1])
+                else:
+                    item["value"] = value
+                result.append(item)
+        return result
+
+    def write_json_lines(self, path, **extra):
+        """
+        현재 지표 스냅샷을 JSON 한 줄로 파일 끝에 추가합니다.
+
+        Args:
+            path (str): JSON Lines 파일 경로
+            **extra: 함께 기록할 값 (예: source="collector")
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        line = json.dumps({"time": time.time(), **extra, "metrics": self.snapshot()}, ensure_ascii=False)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def merge(self, snapshot):
+        """
+        다른 프로세스에서 만든 snapshot() 결과를 더합니다. (병렬 분석 워커의 지표를 부모 프로세스로 모을 때)
+        카운터/히스토그램은 더하고 게이지는 덮어씁니다. 등록되지 않은 지표는 같은 정의로 새로 등록합니다.
+        """
+        for item in snapshot:
+            labels = item["labels"]
+            if item["type"] == "counter":
+                self.counter(item["name"], "", list(labels)).inc(item["value"], **labels)
+            elif item["type"] == "gauge":
+                self.gauge(item["name"], "", list(labels)).set(item["value"], **labels)
+            elif item["type"] == "histogram":
+                metric = self.histogram(item["name"], "", list(labels), buckets=item["buckets"])
+                key = metric._key(labels)
+                with metric._lock:
+                    state = metric._values.setdefault(key, [0] * (len(metric.buckets) + 1) + [0.0, 0])
+                    for i, count in enumerate(item["counts"]):
+                        state[i] += count
+                    state[-2] += item["sum"]
+                    state[-1] += item["count"]
+
+    def reset(self):
+        """등록된 지표 값을 모두 비웁니다. (벤치마크용, 지표 정의는 유지)"""
+        for metric in self.metrics():
+            with metric._lock:
+                metric._values.clear()
+
+
+def _escape_help(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        return repr(value)
+    return str(value)
+
+
+# 기본 등록소 (모듈에서 바로 사용)
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+# 분석 단계별 소요 시간 (DataFrame 구성, groupby 집계, 차트 렌더링 등, step: "모듈.단계")
+ANALYSIS_SECONDS = histogram("subway_analysis_step_seconds", "분석 단계별 소요 시간(초)", ["step"])
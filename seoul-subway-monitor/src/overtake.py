@@ -0,0 +1,512 @@
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from src import metrics
+from src.config import Config
+from src.dwell import KST, _to_epoch
+
+# 실시간 감지기(OvertakeDetector)는 순수 파이썬으로 동작하므로 numpy/pandas는 배치 분석 함수 안에서만 불러옵니다.
+
+# 추월/근접 분석에 필요한 컬럼 (created_at: 같은 수집 시점 레코드를 한 스냅샷으로 묶는 기준)
+OVERTAKE_COLUMNS = [
+    'line_id', 'line_name', 'station_id', 'station_name', 'train_number',
+    'direction_type', 'train_status', 'is_express', 'last_rec_time', 'created_at',
+]
+
+# 같은 역 안에서의 진행 순서 (3:전역출발 < 0:진입 < 1:도착 < 2:출발, 그 외 코드는 도착으로 간주)
+STATUS_ORDER = {3: 0, 0: 1, 1: 2, 2: 3}
+
+EVENT_COLUMNS = [
+    'event', 'time', 'line_id', 'line_name', 'direction_type',
+    'train_number', 'station_id', 'station_name', 'is_express',
+    'other_train_number', 'other_station_id', 'other_station_name', 'other_is_express', 'gap_stations',
+]
+
+
+class StationOrderIndex:
+    """
+    호선/방향별 역 순서 인덱스
+    열차가 실제로 이동한 역 순서(A -> B)를 세어 두고, 우세한 이동만 간선으로 하는 그래프에서
+    시작역으로부터의 최장 거리를 역 순위로 사용합니다. (급행이 건너뛴 역이 있어도 순위가 유지됨)
+    지선이 있는 호선은 서로 다른 지선의 역이 같은 순위 축에 놓이므로 지선 간 비교는 근사치입니다.
+    """
+
+    def __init__(self, min_transitions=2):
+        """
+        Args:
+            min_transitions (int): 간선으로 인정할 최소 이동 관측 횟수 (잘못 찍힌 위치 무시)
+        """
+        self.min_transitions = min_transitions
+        self._counts = defaultdict(lambda: defaultdict(int))  # (line_id, direction) -> {(from, to): 횟수}
+        self._ranks = {}                                       # (line_id, direction) -> {station_id: 순위}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df, min_transitions=2):
+        """
+        위치 레코드에서 열차별 연속 관측의 역 이동을 배열 연산으로 세어 인덱스를 만듭니다.
+
+        Args:
+            df (pandas.DataFrame): line_id, station_id, train_number, direction_type, last_rec_time 컬럼 포함
+        """
+        import numpy as np
+        from src.schema import coerce_frame
+
+        index = cls(min_transitions)
+        df = coerce_frame(df)
+        if df.empty:
+            return index
+
+        line = df['line_id'].astype('category')
+        train = df['train_number'].astype('category')
+        station = df['station_id'].astype('category')
+        line_codes, train_codes, station_codes = (s.cat.codes.to_numpy() for s in (line, train, station))
+        direction = df['direction_type'].to_numpy()
+        ts = df['last_rec_time'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+        # 열차별 시간순 정렬 후 같은 방향으로 연속 관측된 행끼리만 이동으로 셈 (회차 전후 운행은 끊김)
+        order = np.lexsort((ts, train_codes, line_codes))
+        line_s, train_s, dir_s, station_s = line_codes[order], train_codes[order], direction[order], station_codes[order]
+        moved = ((line_s[1:] == line_s[:-1]) & (train_s[1:] == train_s[:-1]) & (dir_s[1:] == dir_s[:-1])
+                 & (station_s[1:] != station_s[:-1]) & (station_s[1:] >= 0) & (station_s[:-1] >= 0))
+        pairs = np.stack([line_s[1:][moved], dir_s[1:][moved], station_s[:-1][moved], station_s[1:][moved]], axis=1)
+        if not len(pairs):
+            return index
+
+        unique, counts = np.unique(pairs.astype(np.int64), axis=0, return_counts=True)
+        lines, stations = line.cat.categories.to_numpy(), station.cat.categories.to_numpy()
+        for (l, d, a, b), count in zip(unique, counts):
+            index._counts[(str(lines[l]), int(d))][(str(stations[a]), str(stations[b]))] += int(count)
+        return index
+
+    @classmethod
+    def load(cls, path, min_transitions=2):
+        """save()로 저장한 JSON 파일에서 인덱스를 읽습니다. (파일이 없으면 빈 인덱스)"""
+        index = cls(min_transitions)
+        if not os.path.exists(path):
+            return index
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        for key, edges in data.items():
+            line_id, direction = key.rsplit('|', 1)
+            counts = index._counts[(line_id, int(direction))]
+            for a, b, count in edges:
+                counts[(a, b)] += count
+        return index
+
+    def save(self, path):
+        """역 이동 횟수를 JSON 파일로 저장합니다. (임시 파일에 쓴 뒤 교체)"""
+        with self._lock:
+            data = {f"{line_id}|{direction}": [[a, b, count] for (a, b), count in edges.items()]
+                    for (line_id, direction), edges in self._counts.items()}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def merge(self, other):
+        """다른 인덱스의 역 이동 횟수를 더합니다."""
+        with self._lock:
+            for key, edges in other._counts.items():
+                counts = self._counts[key]
+                for pair, count in edges.items():
+                    counts[pair] += count
+                self._ranks.pop(key, None)
+
+    def add_transition(self, line_id, direction, from_station, to_station, count=1):
+        """역 이동 관측을 추가합니다. (해당 호선/방향의 순위는 다음 조회 때 다시 계산)"""
+        key = (str(line_id), direction)
+        with self._lock:
+            self._counts[key][(str(from_station), str(to_station))] += count
+            self._ranks.pop(key, None)
+
+    def ranks(self, line_id, direction):
+        """
+        호선/방향의 역 순위 사전을 반환합니다. (진행 방향으로 갈수록 큰 값)
+
+        Returns:
+            dict: {station_id(str): 순위(int)}
+        """
+        key = (str(line_id), direction)
+        with self._lock:
+            ranks = self._ranks.get(key)
+            if ranks is None:
+                ranks = self._ranks[key] = self._build(self._counts.get(key, {}))
+            return ranks
+
+    def rank(self, line_id, direction, station_id):
+        """역 한 곳의 순위 (모르는 역이면 None)"""
+        return self.ranks(line_id, direction).get(str(station_id))
+
+    def _build(self, counts):
+        """이동 횟수로 간선을 고르고 위상 정렬 순서로 최장 거리 순위를 계산합니다."""
+        edges = defaultdict(list)
+        indegree = defaultdict(int)
+        nodes = set()
+        for (a, b), count in counts.items():
+            nodes.update((a, b))
+            # 반대 방향 이동보다 많이 관측되고 최소 횟수를 넘는 이동만 간선으로 사용
+            if count >= self.min_transitions and count > counts.get((b, a), 0):
+                edges[a].append(b)
+                indegree[b] += 1
+
+        ranks = {node: 0 for node in nodes}
+        remaining = set(nodes)
+        ready = sorted(node for node in nodes if indegree[node] == 0)
+        while remaining:
+            if not ready:
+                # 순환(잘못 찍힌 위치 등)이 남으면 남은 진입 간선이 가장 적은 역부터 풀어냄
+                ready = [min(remaining, key=lambda node: (indegree[node], node))]
+            node = ready.pop()
+            if node not in remaining:
+                continue
+            remaining.discard(node)
+            for nxt in edges[node]:
+                if nxt in remaining:
+                    ranks[nxt] = max(ranks[nxt], ranks[node] + 1)
+                    indegree[nxt] -= 1
+                    if indegree[nxt] == 0:
+                        ready.append(nxt)
+        return ranks
+
+
+def _inversions(values):
+    """
+    i < j 이면서 values[i] > values[j]인 위치 쌍 (i, j)를 병합 정렬로 찾습니다.
+    O(n log n + 쌍 수)이며, 순서가 바뀌지 않은 스냅샷은 호출 전에 걸러냅니다.
+    """
+    pairs = []
+
+    def merge_sort(items):
+        if len(items) <= 1:
+            return items
+        mid = len(items) // 2
+        left, right = merge_sort(items[:mid]), merge_sort(items[mid:])
+        merged = []
+        i = 0
+        for item in right:
+            while i < len(left) and left[i][0] <= item[0]:
+                merged.append(left[i])
+                i += 1
+            # 왼쪽에 남은 값은 모두 item보다 크므로 item과 역전 쌍
+            pairs.extend((left[k][1], item[1]) for k in range(i, len(left)))
+            merged.append(item)
+        merged.extend(left[i:])
+        return merged
+
+    merge_sort([(value, i) for i, value in enumerate(values)])
+    return pairs
+
+
+class OvertakeDetector:
+    """
+    급행/일반 열차 추월 및 근접 운행 감지기
+    호선 스냅샷(같은 시점의 열차 위치 목록)을 시간순으로 받아 호선/방향별 열차 위치를 유지하고,
+    스냅샷마다 열차를 역 순위로 정렬(O(n log n))해
+    - 근접 운행: 앞 열차와의 간격이 close_stations 역 이하가 된 시점
+    - 추월: 직전 스냅샷보다 순서가 뒤바뀐 열차 쌍 (역전 쌍을 병합 정렬로 O(n log n + k)에 탐색)
+    을 이벤트로 내보냅니다. 변경분만 저장된 데이터도 처리할 수 있도록 마지막 위치를 stale_seconds 동안 유지합니다.
+
+    시각은 모두 epoch 초(float)입니다.
+    """
+
+    name = "추월 감지"
+
+    def __init__(self, order_index=None, close_stations=1, stale_seconds=300, learn=True, on_event=None):
+        """
+        Args:
+            order_index (StationOrderIndex, optional): 역 순서 인덱스 (없으면 빈 인덱스에서 학습)
+            close_stations (int): 앞 열차와 이 역 수 이하로 붙으면 근접 운행
+            stale_seconds (float): 이 시간(초) 동안 갱신이 없는 열차는 위치 목록에서 제거
+            learn (bool): 관측된 역 이동으로 역 순서 인덱스를 계속 갱신할지 여부
+            on_event (callable, optional): 추월 이벤트 발생 시 호출할 함수 (인자: 이벤트 dict)
+        """
+        self.order = order_index or StationOrderIndex()
+        self.close_stations = close_stations
+        self.stale_seconds = stale_seconds
+        self.learn = learn
+        self.on_event = on_event
+
+        self._positions = defaultdict(dict)  # (line_id, direction) -> {train: [station_id, station_name, status, express, seen]}
+        self._prev_stations = {}             # (line_id, direction) -> {train: 직전 스냅샷 역 ID}
+        self._close_pairs = {}               # (line_id, direction) -> {(뒤 열차, 앞 열차)}
+        self._line_names = {}
+        self._next_evict = 0.0
+        self._lock = threading.Lock()
+
+        # 주기별 카운터 (수집기 연동용)
+        self._cycle_overtakes = 0
+        self._cycle_close = 0
+
+    def update(self, line_id, ts, rows, line_name=None):
+        """
+        호선 스냅샷 하나를 반영합니다.
+
+        Args:
+            line_id: 호선 ID
+            ts (float): 스냅샷 시각 (epoch 초)
+            rows (iterable): (train_number, direction_type, station_id, station_name, train_status, is_express) 튜플
+            line_name (str, optional): 호선명 (이벤트 표시용)
+
+        Returns:
+            list: 이번 스냅샷에서 발생한 이벤트 dict 리스트
+        """
+        line_id = str(line_id)
+        if line_name is not None:
+            self._line_names[line_id] = line_name
+
+        touched = set()
+        for train, direction, station_id, station_name, status, express in rows:
+            if direction is None or direction < 0 or station_id is None:
+                continue
+            station_id = str(station_id)
+            key = (line_id, direction)
+            positions = self._positions[key]
+            previous = positions.get(train)
+            if previous is None:
+                # 방향이 바뀐(회차) 열차는 반대 방향 목록에서 제거
+                self._positions[(line_id, 1 - direction)].pop(train, None)
+            elif self.learn and previous[0] != station_id:
+                self.order.add_transition(line_id, direction, previous[0], station_id)
+            positions[train] = [station_id, station_name, status, express, ts]
+            touched.add(key)
+
+        events = []
+        for key in touched:
+            events.extend(self._scan(key, ts))
+        return events
+
+    def _scan(self, key, ts):
+        """호선/방향 하나의 현재 위치를 정렬해 근접 운행/추월 이벤트를 찾습니다."""
+        positions = self._positions[key]
+        if ts >= self._next_evict:
+            self.evict(ts)
+            self._next_evict = ts + min(self.stale_seconds, 60)
+
+        ranks = self.order.ranks(*key)
+        ordered = []  # (역 순위, 역 안 진행 순서, 열차) - 뒤에서 앞 순
+        for train, (station_id, _, status, _, _) in positions.items():
+            rank = ranks.get(station_id)
+            if rank is not None:
+                ordered.append((rank, STATUS_ORDER.get(status, 2), train))
+        ordered.sort()
+
+        events = []
+
+        # 근접 운행: 정렬 순서상 인접한 두 열차의 역 간격
+        close_pairs = set()
+        for (rank_behind, _, behind), (rank_ahead, _, ahead) in zip(ordered, ordered[1:]):
+            if rank_ahead - rank_behind <= self.close_stations:
+                close_pairs.add((behind, ahead))
+                if (behind, ahead) not in self._close_pairs.get(key, ()):
+                    events.append(self._event('close', key, ts, behind, ahead, rank_ahead - rank_behind))
+        self._close_pairs[key] = close_pairs
+
+        # 추월: 두 스냅샷에 모두 있는 열차를 현재 순위로 정렬했을 때 직전 순위의 역전 쌍
+        # (직전 위치도 현재 순위표로 환산해 학습 중 순위표가 바뀌어도 실제 이동만 비교)
+        previous = {train: ranks.get(station_id) for train, station_id in self._prev_stations.get(key, {}).items()}
+        common = sorted((rank, previous[train], train) for rank, _, train in ordered
+                        if previous.get(train) is not None)
+        prev_values = [prev for _, prev, _ in common]
+        if any(a > b for a, b in zip(prev_values, prev_values[1:])):
+            for i, j in _inversions(prev_values):
+                passed, overtaker = common[i], common[j]
+                events.append(self._event('overtake', key, ts, overtaker[2], passed[2], overtaker[0] - passed[0]))
+        self._prev_stations[key] = {train: positions[train][0] for _, _, train in ordered}
+
+        for event in events:
+            if event['event'] == 'overtake':
+                self._cycle_overtakes += 1
+                if self.on_event:
+                    self.on_event(event)
+            else:
+                self._cycle_close += 1
+        return events
+
+    def evict(self, ts):
+        """ts 기준 stale_seconds 동안 갱신이 없는 열차를 모든 호선/방향 위치 목록에서 제거합니다."""
+        deadline = ts - self.stale_seconds
+        for positions in self._positions.values():
+            for train in [t for t, p in positions.items() if p[4] < deadline]:
+                del positions[train]
+
+    def _event(self, kind, key, ts, train, other, gap):
+        line_id, direction = key
+        positions = self._positions[key]
+        mine, theirs = positions[train], positions[other]
+        return {
+            "event": kind,
+            "time": ts,
+            "line_id": line_id,
+            "line_name": self._line_names.get(line_id),
+            "direction_type": direction,
+            "train_number": train,
+            "station_id": mine[0],
+            "station_name": mine[1],
+            "is_express": mine[3],
+            "other_train_number": other,
+            "other_station_id": theirs[0],
+            "other_station_name": theirs[1],
+            "other_is_express": theirs[3],
+            "gap_stations": gap,
+        }
+
+    # 수집기 연동 (main.job의 observers) -------------------------------------
+
+    def observe(self, line, records):
+        """수집 스레드에서 호선별 레코드(한 스냅샷)를 받아 반영합니다."""
+        if not records:
+            return
+        times = [t for t in (_to_epoch(r.get("last_rec_time")) for r in records) if t is not None]
+        rows = [(r.get("train_number"), r.get("direction_type"), r.get("station_id"), r.get("station_name"),
+                 r.get("train_status"), r.get("is_express")) for r in records]
+        with self._lock:
+            self.update(records[0].get("line_id"), max(times) if times else 0.0, rows, line_name=line)
+
+    def end_cycle(self):
+        """이번 주기 요약 문자열을 반환하고 카운터를 초기화합니다."""
+        with self._lock:
+            tracked = sum(len(p) for p in self._positions.values())
+            summary = f"추적 열차 {tracked}대, 추월 {self._cycle_overtakes}건, 근접 운행 {self._cycle_close}건"
+            self._cycle_overtakes = 0
+            self._cycle_close = 0
+        return summary
+
+
+@metrics.ANALYSIS_SECONDS.timed(step="overtake.detect")
+def detect_overtakes(df, order_index=None, **detector_options):
+    """
+    위치 이력을 (호선, 적재 시각) 스냅샷 단위로 시간순 재생해 추월/근접 운행 이벤트를 찾습니다.
+
+    Args:
+        df (pandas.DataFrame): OVERTAKE_COLUMNS를 포함한 위치 레코드
+        order_index (StationOrderIndex, optional): 역 순서 인덱스 (없으면 df에서 만듦)
+        **detector_options: OvertakeDetector 생성 옵션
+
+    Returns:
+        tuple: (이벤트 DataFrame, 사용한 StationOrderIndex)
+    """
+    import numpy as np
+    from src.schema import EPOCH, coerce_frame
+
+    df = coerce_frame(df)
+    if order_index is None:
+        order_index = StationOrderIndex.from_frame(df)
+    detector = OvertakeDetector(order_index, learn=False, **detector_options)
+    if df.empty:
+        return event_frame([]), order_index
+
+    line = df['line_id'].astype('category')
+    line_codes = line.cat.codes.to_numpy()
+    snapshot = (df['created_at'] - EPOCH).dt.total_seconds().to_numpy()
+    order = np.lexsort((line_codes, snapshot))
+    line_s, snap_s = line_codes[order], snapshot[order]
+    starts = np.flatnonzero(np.r_[True, (line_s[1:] != line_s[:-1]) | (snap_s[1:] != snap_s[:-1])])
+    stops = np.r_[starts[1:], len(order)]
+
+    columns = [df[c].to_numpy()[order].tolist() for c in
+               ('train_number', 'direction_type', 'station_id', 'station_name', 'train_status', 'is_express')]
+    rows = list(zip(*columns))
+    line_names = df['line_name'].to_numpy()[order] if 'line_name' in df else None
+    lines = line.cat.categories.to_numpy()
+
+    events = []
+    for start, stop in zip(starts, stops):
+        events.extend(detector.update(
+            lines[line_s[start]], float(snap_s[start]), rows[start:stop],
+            line_name=line_names[start] if line_names is not None else None,
+        ))
+    return event_frame(events), order_index
+
+
+@metrics.ANALYSIS_SECONDS.timed(step="overtake.event_frame")
+def event_frame(events):
+    """추월/근접 이벤트 리스트를 DataFrame으로 변환합니다. (epoch 초 -> 한국 시간 datetime)"""
+    import pandas as pd
+    from src.schema import LOCAL_TZ
+
+    df = pd.DataFrame(events, columns=EVENT_COLUMNS)
+    df['time'] = pd.to_datetime(df['time'], unit='s', utc=True).dt.tz_convert(LOCAL_TZ)
+    return df
+
+
+def format_event(event):
+    """추월 이벤트를 한 줄 문자열로 변환합니다. (경고 출력용)"""
+    at = datetime.fromtimestamp(event["time"], KST).strftime("%H:%M:%S")
+    kind = {1: "급행", 7: "특급"}.get(event["is_express"], "일반")
+    other_kind = {1: "급행", 7: "특급"}.get(event["other_is_express"], "일반")
+    return (f"{event['line_name'] or event['line_id']} (방향 {event['direction_type']}) {kind} {event['train_number']}"
+            f"({event['station_name']})이 {other_kind} {event['other_train_number']}({event['other_station_name']}) 추월 ({at})")
+
+
+@metrics.ANALYSIS_SECONDS.timed(step="overtake.summarize_interference")
+def summarize_interference(events):
+    """
+    호선/방향별 급행-일반 간섭 요약
+    - 추월 횟수, 급행이 일반 열차에 붙어 운행한 횟수(express_blocked), 전체 근접 운행 횟수
+
+    Returns:
+        pandas.DataFrame: 급행 지연(express_blocked)이 많은 순으로 정렬된 요약
+    """
+    import pandas as pd
+
+    if events.empty:
+        return pd.DataFrame(columns=['line_name', 'direction_type', 'overtakes', 'express_blocked', 'close_following'])
+    express_behind = (events['is_express'] > 0) & (events['other_is_express'] == 0)
+    summary = events.assign(
+        overtakes=events['event'] == 'overtake',
+        express_blocked=(events['event'] == 'close') & express_behind,
+        close_following=events['event'] == 'close',
+    ).groupby(['line_name', 'direction_type'], observed=True)[['overtakes', 'express_blocked', 'close_following']].sum()
+    return summary.reset_index().sort_values(['express_blocked', 'overtakes'], ascending=False, ignore_index=True)
+
+
+def analyze_overtake(hours=24):
+    """
+    최근 데이터로 급행/일반 열차 추월과 근접 운행을 분석합니다.
+
+    Args:
+        hours (float): 분석할 최근 시간 범위(시간)
+    """
+    # 수집기(main.py)가 이 모듈을 불러올 때 pandas와 Parquet 저장소 모듈(pyarrow.dataset)까지 읽지 않도록 여기서 import
+    import pandas as pd
+    from src.local_store import load_frames
+    from src.schema import coerce_frame
+
+    print("=== 4. 급행/일반 열차 간섭 분석 ===")
+    start = datetime.now() - timedelta(hours=hours)
+    frames = list(load_frames(start=start, columns=OVERTAKE_COLUMNS))
+    if not frames:
+        print("[오류] 분석할 데이터가 없습니다.")
+        return
+
+    df = coerce_frame(pd.concat(frames, ignore_index=True))
+    print(f"총 {len(df)}건의 데이터를 로드했습니다.")
+
+    # 저장된 역 순서 인덱스에 이번 데이터의 이동을 더해 사용하고, 수집기가 쓸 수 있도록 다시 저장
+    order_index = StationOrderIndex.load(Config.STATION_ORDER_FILE)
+    order_index.merge(StationOrderIndex.from_frame(df))
+    order_index.save(Config.STATION_ORDER_FILE)
+
+    events, _ = detect_overtakes(df, order_index)
+    summary = summarize_interference(events)
+    print(f"\n[분석 결과] 추월 {int((events['event'] == 'overtake').sum())}건, "
+          f"근접 운행 {int((events['event'] == 'close').sum())}건")
+
+    print("\n[호선/방향별 간섭 요약]")
+    print(f"{'호선':<10} | {'방향':<4} | {'추월':<6} | {'급행 지연':<8} | {'근접 운행':<8}")
+    print("-" * 50)
+    for _, row in summary.iterrows():
+        print(f"{row['line_name']:<10} | {row['direction_type']:<4} | {row['overtakes']:<6} | "
+              f"{row['express_blocked']:<8} | {row['close_following']:<8}")
+
+    output_file = "analysis_result_overtake.csv"
+    events.to_csv(output_file, index=False, encoding='utf-8-sig')
+    print(f"\n추월/근접 이벤트가 '{output_file}'에 저장되었습니다.")
+
+
+if __name__ == "__main__":
+    analyze_overtake()
@@ -0,0 +1,591 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from src import charts, metrics
+from src.analysis_cache import AnalysisCache, cache_key
+from src.baseline import DwellBaselines
+from src.config import TARGET_LINES, Config
+from src.dwell import DWELL_COLUMNS, GROUP_COLS, compute_dwell_events
+from src.headway import compute_headways, detect_arrivals, flag_irregular, summarize_stations
+from src.local_store import LocalStore, _to_utc, load_frames
+from src.report import OUTPUT_IMG_DIR, REPORT_FILE, SERIES_REPORT_FILE, append_window_report, create_report, \
+    reported_windows
+
+# 호선별 분석에 필요한 컬럼 (체류 시간 + 배차 간격)
+LINE_COLUMNS = DWELL_COLUMNS
+
+# 분석 캐시에 저장하는 호선별 결과 항목 (기준선 스케치는 실행 시점의 updated_until에 따라 달라지므로 제외)
+CACHED_FIELDS = ('line_name', 'rows', 'dwell', 'headway_summary', 'bunching', 'gaps', 'headway_chart')
+
+# 열린 조회 범위(현재까지)를 나눠 캐시하는 구간 길이와, 구간 경계에 걸친 정차/배차 간격을 위해 앞뒤로 더 읽는 여유 시간
+# 구간 끝 + 여유 시간까지 데이터가 들어온 구간만 닫힌 것으로 보고 캐시하며, 나머지(열린 꼬리)는 매번 계산합니다.
+SEGMENT_STEP = timedelta(hours=1)
+SEGMENT_MARGIN = timedelta(minutes=20)
+
+# 구간 끝 + 여유 시간에도 끝나지 않은 정차를 다시 찾을 때 쓰는 키 (같은 열차가 같은 역에 같은 시각 도착 = 같은 정차)
+OPEN_STOP_KEY = GROUP_COLS + ['arrival_time']
+
+# 누적 보고서 시간대 단위 -> (길이, 라벨 형식)
+SERIES_WINDOWS = {
+    "hour": (timedelta(hours=1), "%Y-%m-%d %H:00"),
+    "day": (timedelta(days=1), "%Y-%m-%d"),
+}
+
+
+def _load_line(line_name, start, end, source, root, columns=LINE_COLUMNS):
+    frames = list(load_frames(start=start, end=end, lines=[line_name], columns=columns,
+                              source=source, sync=False, root=root))
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+
+def _between(times, low, high):
+    mask = times >= low
+    return mask if high is None else mask & (times < high)
+
+
+def line_events(df, start, end, margin=None):
+    """
+    호선 하나의 위치 레코드로 조회 범위의 정차 이벤트와 배차 간격(불규칙 표시 전)을 계산합니다.
+    margin을 주면 df에서 범위 앞뒤 margin까지만 잘라(created_at 기준) 계산한 뒤 범위 안에 도착한 것만 남기므로,
+    범위를 구간으로 나눠 계산해도 경계에 걸친 정차와 배차 간격이 잘리지 않고 구간 결과가 앞뒤 데이터에 따라 바뀌지 않습니다.
+
+    Args:
+        df (pandas.DataFrame | None): 호선 하나의 위치 레코드 (margin을 주면 created_at 포함, 범위 + 여유 시간을 덮어야 함)
+        start, end (datetime): 조회 시간 범위 (end가 None이면 현재까지, margin이 없으면 df 전체를 범위로 봄)
+        margin (timedelta, optional): 범위 앞뒤로 함께 계산할 여유 시간
+
+    Returns:
+        dict: rows(범위 안 원본 행 수), dwell(정차 이벤트, 없으면 None), headways(compute_headways 결과, 없으면 None)
+    """
+    empty = {'rows': 0, 'dwell': None, 'headways': None}
+    if df is None:
+        return empty
+    rows = len(df)
+    if margin:
+        low, high = _to_utc(start), None if end is None else _to_utc(end)
+        rows = int(_between(df['created_at'], low, high).sum())
+        if not rows:
+            return empty
+        df = df[_between(df['created_at'], low - margin, None if high is None else high + margin)]
+
+    dwell_df, _ = compute_dwell_events([df])
+    headways = compute_headways(detect_arrivals(df))
+    if margin:
+        if dwell_df is not None:
+            dwell_df = dwell_df[_between(dwell_df['arrival_time'], low, high)].reset_index(drop=True)
+        headways = headways[_between(headways['arrival_time'], low, high)].reset_index(drop=True)
+    return {'rows': rows, 'dwell': dwell_df, 'headways': headways}
+
+
+def _resume_open_stops(df, open_stops, since, stale_seconds=600):
+    """
+    닫힌 구간 끝에서 진행 중이던 정차를 도착 이후 이어지는 데이터로 다시 계산합니다.
+    정차마다 해당 열차가 역을 떠난 첫 관측(또는 stale_seconds 넘게 관측이 끊기기 직전)까지만 계산하므로,
+    정차가 길거나 운행이 끝난 열차라도 호선 전체를 다시 계산하지 않습니다.
+    관측이 끊긴 정차는 DwellTracker.evict()처럼 마지막 관측 시각에 닫힌 것으로 봅니다.
+
+    Args:
+        df (pandas.DataFrame | None): 호선 위치 레코드 (created_at 포함, since 이후를 덮어야 함)
+        open_stops (pandas.DataFrame): 다시 계산할 정차 (OPEN_STOP_KEY 컬럼)
+        since (datetime): 가장 이른 도착 시각 - 여유 시간
+        stale_seconds (float): DwellTracker의 같은 설정
+
+    Returns:
+        pandas.DataFrame | None: 다시 계산한 정차 이벤트 (is_open 포함)
+    """
+    if df is None:
+        return None
+    rows = df[df['train_number'].isin(open_stops['train_number'].unique()) & (df['created_at'] >= _to_utc(since))]
+
+    trains = dict(list(rows.groupby(['train_number', 'direction_type'], observed=True, sort=False)))
+    pieces, stale = [], []
+    for stop in open_stops.itertuples(index=False):
+        train = trains.get((stop.train_number, stop.direction_type), rows.iloc[:0])
+        train = train[train['last_rec_time'] >= stop.arrival_time].sort_values('last_rec_time', kind='stable')
+        moved = (train['station_name'] != stop.station_name).to_numpy()
+        quiet = (train['last_rec_time'].diff().dt.total_seconds() > stale_seconds).to_numpy()
+        cut = np.flatnonzero(moved | quiet)
+        if cut.size and quiet[cut[0]] and not moved[cut[0]]:
+            pieces.append(train.iloc[:cut[0]])
+            stale.append(True)
+        else:
+            pieces.append(train.iloc[:cut[0] + 1] if cut.size else train)
+            stale.append(False)
+
+    # 한 번에 계산 (같은 열차의 정차가 여럿이면 겹치는 행은 한 번만, 원래 적재 순서대로)
+    kept = pd.concat(pieces)
+    events, _ = compute_dwell_events([kept[~kept.index.duplicated()].sort_index()])
+    if events is None:
+        return None
+    events = events.merge(open_stops.assign(stale=stale), on=OPEN_STOP_KEY)
+    events['is_open'] &= ~events.pop('stale')
+    return events
+
+
+def analyze_line(line_name, start, end, source, root, watermark, bucket_hours, min_count, image_dir=None,
+                 segments=None, cache=None):
+    """
+    호선 하나의 체류 시간, 배차 간격, 체류 기준선을 계산합니다. (워커 프로세스에서 실행)
+    데이터는 워커가 직접 해당 호선만 읽으므로 프로세스 간에는 결과만 전달됩니다.
+    segments를 주면 각 닫힌 구간의 정차/배차 간격은 분석 캐시에서 읽고, 캐시에 없는 구간과 start부터의 열린 꼬리만
+    한 번에 읽어 구간별로 계산합니다. (몰림/벌어짐 판정과 요약은 합친 전체 범위 기준)
+    구간 끝 + 여유 시간에도 끝나지 않은 정차는 체류 시간이 잘린 값이므로 구간 결과에 넣지 않고 키만 저장해 두었다가,
+    실행마다 해당 열차의 이어지는 데이터로 다시 계산합니다. (끝까지 진행 중이면 is_open으로 기준선에서 제외)
+
+    Args:
+        line_name (str): 분석할 호선명
+        start, end (datetime): 조회 시간 범위 (segments를 주면 마지막 닫힌 구간 이후의 꼬리)
+        source (str): 'local' 또는 'remote'
+        root (str): 로컬 저장소 경로 (local 소스)
+        watermark (dict): 저장된 기준선의 호선별 updated_until (이미 반영된 이벤트 제외)
+        bucket_hours, min_count: DwellBaselines 설정
+        image_dir (str, optional): 호선별 배차 간격 차트 저장 폴더 (None이면 그리지 않음)
+        segments (list, optional): start 이전의 닫힌 구간 [(시작, 끝, 캐시 키), ...] (split_segments 참고)
+        cache (AnalysisCache, optional): 구간 결과를 읽고 저장할 분석 캐시
+
+    Returns:
+        dict: 호선 분석 결과 (rows, dwell, headway_summary, bunching, gaps, baselines, headway_chart, seconds,
+            segments, cached_segments)
+    """
+    started = time.perf_counter()
+    result = {'line_name': line_name, 'rows': 0, 'dwell': None, 'headway_summary': None,
+              'bunching': 0, 'gaps': 0, 'baselines': None, 'headway_chart': None, 'seconds': 0.0,
+              'segments': len(segments or ()), 'cached_segments': 0}
+
+    if segments is None:
+        parts = [line_events(_load_line(line_name, start, end, source, root), start, end)]
+    else:
+        parts, missing = [], []
+        for segment in segments:
+            part = cache.load("segment", segment[2]) if cache is not None else None
+            if part is None:
+                missing.append(segment)
+            else:
+                parts.append(part)
+        result['cached_segments'] = len(parts)
+
+        # 캐시에 없는 구간부터 꼬리까지 한 번에 읽어 구간별로 나눠 계산
+        # (캐시된 구간에 진행 중이던 정차가 있으면 그 도착 시각부터 함께 읽음)
+        first = _to_utc(missing[0][0] if missing else start) - SEGMENT_MARGIN
+        for part in parts:
+            if part.get('open') is not None:
+                first = min(first, _to_utc(part['open']['arrival_time'].min()) - SEGMENT_MARGIN)
+        df = _load_line(line_name, first, end, source, root, LINE_COLUMNS + ['created_at'])
+        for seg_start, seg_end, key in missing:
+            part = line_events(df, seg_start, seg_end, SEGMENT_MARGIN)
+            dwell = part['dwell']
+            if dwell is not None and dwell['is_open'].any():
+                # 여유 시간 끝까지 진행 중인 정차는 여유 시간에서 잘린 값이므로 저장하지 않고 키만 남김
+                part['open'] = dwell.loc[dwell['is_open'], OPEN_STOP_KEY].reset_index(drop=True)
+                part['dwell'] = dwell[~dwell['is_open']].reset_index(drop=True)
+            if cache is not None:
+                cache.store("segment", key, part)
+            parts.append(part)
+        parts.append(line_events(df, start, end, SEGMENT_MARGIN))
+
+        open_stops = [part['open'] for part in parts if part.get('open') is not None]
+        if open_stops:
+            open_stops = pd.concat(open_stops, ignore_index=True)
+            since = open_stops['arrival_time'].min() - SEGMENT_MARGIN
+            parts.append({'rows': 0, 'dwell': _resume_open_stops(df, open_stops, since), 'headways': None})
+
+    result['rows'] = sum(part['rows'] for part in parts)
+    if not result['rows']:
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    dwell_frames = [part['dwell'] for part in parts if part['dwell'] is not None and not part['dwell'].empty]
+    dwell_df = pd.concat(dwell_frames, ignore_index=True) if dwell_frames else None
+    valid = dwell_df[dwell_df['dwell_seconds'] >= 10] if dwell_df is not None else None
+
+    baselines = DwellBaselines(bucket_hours, min_count=min_count)
+    baselines.updated_until = dict(watermark)
+    baselines.update(valid)
+
+    headways = flag_irregular(pd.concat([part['headways'] for part in parts if part['headways'] is not None],
+                                        ignore_index=True))
+    if image_dir and headways['headway_seconds'].notna().any():
+        result['headway_chart'] = charts.plot_headway_distribution(
+            headways, line_name, os.path.join(image_dir, f"headway_{line_name}.png"))
+
+    result.update({
+        'dwell': valid,
+        'headway_summary': summarize_stations(headways),
+        'bunching': int(headways['is_bunching'].sum()),
+        'gaps': int(headways['is_gap'].sum()),
+        'baselines': baselines,
+        'seconds': time.perf_counter() - started,
+    })
+    return result
+
+
+def split_segments(start, now, step=SEGMENT_STEP, margin=SEGMENT_MARGIN):
+    """
+    열린 조회 범위(start ~ 현재)를 정시 경계로 나눠 닫힌 구간 목록과 열린 꼬리의 시작 시각을 반환합니다.
+    구간 경계가 start와 정시로만 정해지므로 같은 구간은 실행 시각이 달라도 같은 캐시 키를 가집니다.
+
+    Args:
+        start (datetime): 조회 시작 시각
+        now (datetime): 기준 시각 (구간 끝 + margin이 이 시각 이전인 구간만 닫힌 것으로 봄)
+        step (timedelta): 구간 길이 (하루를 나누어떨어지게)
+        margin (timedelta): 구간 앞뒤로 더 읽을 여유 시간
+
+    Returns:
+        tuple: ([(구간 시작, 구간 끝), ...], 꼬리 시작 시각)
+    """
+    start = pd.Timestamp(start)
+    segments = []
+    seg_end = start.floor(step) + step
+    while _to_utc(seg_end + margin) <= _to_utc(now):
+        segments.append((start, seg_end))
+        start, seg_end = seg_end, seg_end + step
+    return segments, start
+
+
+def _with_metrics(func, *args):
+    """
+    워커 프로세스에서 func를 실행하고 (결과, 이번 작업의 지표 스냅샷)을 반환합니다.
+    워커의 지표 등록소는 부모와 분리되어 있으므로 작업마다 비우고 실행한 뒤 부모 프로세스에서 합칩니다.
+    """
+    metrics.REGISTRY.reset()
+    result = func(*args)
+    return result, metrics.REGISTRY.snapshot()
+
+
+def _fold_baselines(dwell, watermark, bucket_hours, min_count):
+    """캐시에서 읽은 호선 결과의 체류 이벤트로 기준선 스케치를 다시 만듭니다. (analyze_line과 같은 방식)"""
+    baselines = DwellBaselines(bucket_hours, min_count=min_count)
+    baselines.updated_until = dict(watermark)
+    baselines.update(dwell)
+    return baselines
+
+
+def analyze_window(start, end, lines, baselines, workers, source, root=None, cache=None, render_charts=True,
+                   line_charts=True, image_dir=OUTPUT_IMG_DIR, chart_suffix="", store=None, now=None):
+    """
+    조회 범위 하나를 호선별로 나눠 계산하고, 기준선에 합친 뒤 지연 판정과 전체 차트까지 만듭니다.
+    local 소스의 닫힌 범위(end가 now 이전)는 (호선, 조회 범위, 저장소 파일 요약값)이 같은 결과를 분석 캐시에서 읽고,
+    차트도 입력 데이터가 같으면 저장된 PNG를 복사하므로 데이터가 바뀌지 않은 호선/차트는 다시 계산하거나 그리지 않습니다.
+    열린 범위(end가 None이거나 now 이후)는 결과가 실행마다 달라 통째로 저장하지 않고, 정시 단위의 닫힌 구간으로 나눠
+    구간별 정차/배차 간격만 캐시한 뒤 마지막 열린 꼬리만 다시 계산합니다. (split_segments, analyze_line)
+    워커 프로세스 풀은 캐시에 없는 작업이 있을 때만 만듭니다.
+
+    Args:
+        start, end (datetime): 조회 시간 범위 (end가 None이면 현재까지)
+        lines (list): 분석할 호선명 목록
+        baselines (DwellBaselines): 누적 기준선 (호선별 결과를 합침, 저장은 호출하는 쪽에서)
+        workers (int): 워커 프로세스 수
+        source (str): 'local' 또는 'remote'
+        root (str, optional): 로컬 저장소 경로
+        cache (AnalysisCache, optional): 분석 캐시 (None이면 사용하지 않음)
+        render_charts (bool): 전체 차트 생성 여부
+        line_charts (bool): 호선별 배차 간격 차트 생성 여부 (render_charts가 True일 때만)
+        image_dir (str): 차트 저장 폴더
+        chart_suffix (str): 전체 차트 파일명 뒤에 붙일 문자열 (시간대별 누적 보고서용)
+        store (LocalStore, optional): 저장소 요약값 계산에 쓸 LocalStore (여러 시간대를 이어서 분석할 때 재사용)
+        now (datetime, optional): 닫힌 범위/구간을 판단할 기준 시각 (기본: 현재 시각)
+
+    Returns:
+        dict: results(호선별 결과 목록), valid_dwell, outliers, line_stats, images(차트 설명 -> 경로),
+            cached_lines, cached_segments
+    """
+    cache = cache or AnalysisCache(enabled=False)
+    line_image_dir = image_dir if render_charts and line_charts else None
+    watermark = dict(baselines.updated_until)  # 병합 전 값 (병합하면서 바뀌므로 복사)
+    now = now or datetime.now()
+    closed = end is not None and _to_utc(end) <= _to_utc(now)
+
+    # remote 소스는 데이터가 바뀌었는지 알 수 없으므로 캐시하지 않음
+    fingerprint = segments = None
+    if cache.enabled and source == "local":
+        store = store or LocalStore(root)
+        if closed:
+            fingerprint = [os.path.abspath(store.root), store.fingerprint(start, end)]
+        else:
+            # 닫힌 구간마다 (여유 시간 포함) 저장소 요약값을 구해 두고, 호선별 키는 아래에서 만듦
+            closed_segments, start = split_segments(start, now)
+            segments = [(seg_start, seg_end, [os.path.abspath(store.root), store.fingerprint(
+                seg_start - SEGMENT_MARGIN, seg_end + SEGMENT_MARGIN)]) for seg_start, seg_end in closed_segments]
+    window = [pd.Timestamp(start).isoformat(), None if end is None else pd.Timestamp(end).isoformat()]
+    # 열린 범위의 전체 차트는 다시 읽히지 않으므로 캐시하지 않음
+    chart_cache = cache if closed else AnalysisCache(enabled=False)
+
+    pool = None
+    results, cached_lines = [], 0
+    try:
+        # 1. 호선별 계산 (캐시에 없는 호선만 워커에서 데이터 읽기 + 체류 + 배차 간격 + 기준선 + 호선 차트)
+        futures = {}
+        for line in lines:
+            key = cache_key("line", line, window, fingerprint) if fingerprint else None
+            cached = cache.load("line", key) if key else None
+            if cached is not None and line_image_dir:
+                # 호선 차트 없이 저장된 결과이거나 차트 파일이 캐시에 없으면 다시 계산
+                chart = cached['headway_chart']
+                if chart is None or (chart and not cache.fetch_file(
+                        "chart", key, os.path.join(line_image_dir, f"headway_{line}.png"))):
+                    cached = None
+            if cached is not None:
+                cached_lines += 1
+                results.append(dict(cached, seconds=0.0, cached=True, baselines=_fold_baselines(
+                    cached['dwell'], watermark, baselines.bucket_hours, baselines.min_count)))
+                continue
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            line_segments = None
+            if segments is not None:
+                line_segments = [(seg_start, seg_end, cache_key(
+                    "segment", line, [_to_utc(seg_start).isoformat(), _to_utc(seg_end).isoformat()],
+                    SEGMENT_MARGIN.total_seconds(), segment_fingerprint))
+                    for seg_start, seg_end, segment_fingerprint in segments]
+            future = pool.submit(_with_metrics, analyze_line, line, start, end, source, root, watermark,
+                                 baselines.bucket_hours, baselines.min_count, line_image_dir,
+                                 line_segments, cache if segments is not None else None)
+            futures[future] = (line, key)
+
+        for future in as_completed(futures):
+            line, key = futures[future]
+            try:
+                result, worker_metrics = future.result()
+            except Exception as e:
+                print(f"[오류] {line} 분석 실패: {e}")
+                continue
+            metrics.REGISTRY.merge(worker_metrics)
+            results.append(result)
+            if key:
+                entry = {field: result[field] for field in CACHED_FIELDS}
+                if line_image_dir and not entry['headway_chart']:
+                    entry['headway_chart'] = False  # 차트를 그리려 했으나 배차 간격이 없어 그리지 않음
+                cache.store("line", key, entry)
+                if result['headway_chart']:
+                    cache.keep_file("chart", key, result['headway_chart'])
+
+        for result in sorted(results, key=lambda r: lines.index(r['line_name'])):
+            if result.get('cached'):
+                note = "(캐시)"
+            elif result.get('segments'):
+                note = f"({result['seconds']:.2f}초, 캐시 구간 {result['cached_segments']}/{result['segments']}개)"
+            else:
+                note = f"({result['seconds']:.2f}초)"
+            print(f"- {result['line_name']}: {result['rows']}건, "
+                  f"정차 {0 if result['dwell'] is None else len(result['dwell'])}건, "
+                  f"몰림 {result['bunching']}건, 벌어짐 {result['gaps']}건 {note}")
+
+        # 2. 결과 병합 (기준선 스케치 병합 후 호선별 임계값으로 지연 판정)
+        for result in results:
+            if result['baselines'] is not None:
+                baselines.merge(result['baselines'])
+
+        dwell_frames = [r['dwell'] for r in results if r['dwell'] is not None and not r['dwell'].empty]
+        valid_dwell = pd.concat(dwell_frames, ignore_index=True) if dwell_frames else None
+        outliers = line_stats = None
+        images = {}
+        if valid_dwell is not None:
+            valid_dwell['threshold_minutes'] = baselines.thresholds(valid_dwell) / 60
+            outliers = valid_dwell[valid_dwell['dwell_minutes'] > valid_dwell['threshold_minutes']] \
+                .sort_values('dwell_minutes', ascending=False)
+            line_stats = baselines.summary()
+
+            # 3. 전체 차트 (입력이 같으면 캐시된 PNG 사용, 아니면 워커 프로세스에서 병렬 렌더링, 필요한 컬럼만 전달)
+            if render_charts:
+                chart_data = valid_dwell[['line_name', 'dwell_minutes']]
+                line_thresholds = (line_stats.set_index('line_name')['threshold'] / 60).to_dict()
+                jobs = [
+                    ("Dwell Time Dist", charts.plot_dwell_distribution, baselines.threshold() / 60, "dwell_dist"),
+                    ("Line Boxplot", charts.plot_line_boxplot, line_thresholds, "line_boxplot"),
+                ]
+                chart_futures = []
+                for caption, func, param, name in jobs:
+                    path = images[caption] = os.path.join(image_dir, f"{name}{chart_suffix}.png")
+                    key = chart_cache.chart_key(func, chart_data, param)
+                    if chart_cache.fetch_file("chart", key, path):
+                        continue
+                    if pool is None:
+                        pool = ProcessPoolExecutor(max_workers=min(workers, len(jobs)))
+                    chart_futures.append((key, path, pool.submit(_with_metrics, func, chart_data, param, path)))
+                for key, path, future in chart_futures:
+                    try:
+                        metrics.REGISTRY.merge(future.result()[1])
+                    except Exception as e:
+                        print(f"[오류] 차트 생성 실패: {e}")
+                        continue
+                    chart_cache.keep_file("chart", key, path)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return {
+        'results': results,
+        'valid_dwell': valid_dwell,
+        'outliers': outliers,
+        'line_stats': line_stats,
+        'images': images,
+        'cached_lines': cached_lines,
+        'cached_segments': sum(r.get('cached_segments', 0) for r in results),
+    }
+
+
+def _prepare(lines, workers, source, root, sync, baseline_file, cache):
+    """run_parallel_analysis / run_report_series 공통 준비 (호선 목록, 워커 수, 동기화, 기준선, 캐시)"""
+    if not lines:
+        lines = TARGET_LINES
+    lines = list(lines)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(lines)))
+    if source == "local" and sync:
+        LocalStore(root).sync()
+    baselines = DwellBaselines.load(baseline_file, bucket_hours=Config.DWELL_BASELINE_BUCKET_HOURS,
+                                    min_count=Config.DWELL_BASELINE_MIN_COUNT)
+    if cache is None:
+        cache = AnalysisCache(enabled=Config.ANALYSIS_CACHE)
+    return lines, workers, baselines, cache
+
+
+def _prune_cache(cache):
+    removed = cache.prune(Config.ANALYSIS_CACHE_MAX_MB * 1024 ** 2) if cache.enabled else 0
+    if removed:
+        print(f"[캐시] 크기 제한({Config.ANALYSIS_CACHE_MAX_MB}MB)으로 오래된 항목 {removed}개 삭제")
+
+
+def run_parallel_analysis(hours=24, workers=None, lines=None, source=None, root=None, start=None, end=None,
+                          sync=True, render_charts=True, baseline_file=None, image_dir=OUTPUT_IMG_DIR,
+                          report_file=REPORT_FILE, cache=None, now=None):
+    """
+    호선별로 데이터를 나눠 프로세스 풀에서 체류 시간/배차 간격/기준선을 계산하고 결과를 합칩니다.
+    합친 기준선으로 호선별 지연(이상치)을 판정한 뒤 전체 차트도 워커 프로세스에서 병렬로 그립니다.
+    데이터가 바뀌지 않은 호선 결과와 차트는 분석 캐시에서 가져옵니다. (analyze_window 참고)
+    최근 범위는 시작 시각을 정시로 내려 맞추므로, 이전 실행에서 계산한 1시간 구간을 그대로 다시 씁니다.
+
+    Args:
+        hours (float): 분석할 최근 시간 범위(시간, 시작 시각은 정시로 내림) (start를 주면 무시)
+        workers (int, optional): 워커 프로세스 수 (기본: CPU 코어 수)
+        lines (list, optional): 분석할 호선명 목록 (기본: 수집 대상 전체 호선)
+        source (str, optional): 'local' 또는 'remote' (기본: Config.ANALYSIS_SOURCE)
+        root (str, optional): 로컬 저장소 경로 (기본: Config.LOCAL_STORE_DIR)
+        start, end (datetime, optional): 조회 시간 범위 직접 지정
+        sync (bool): local 소스를 분석 전에 한 번 동기화할지 여부
+        render_charts (bool): 차트 생성 여부
+        baseline_file (str, optional): 체류 기준선 파일 (기본: Config.DWELL_BASELINE_FILE)
+        image_dir (str): 차트 저장 폴더
+        report_file (str): Markdown 보고서 경로
+        cache (AnalysisCache, optional): 분석 캐시 (기본: Config.ANALYSIS_CACHE 설정에 따라 생성)
+        now (datetime, optional): 기준 시각 (기본: 현재 시각)
+
+    Returns:
+        dict: 실행 요약 (wall_seconds, line_seconds, rows, events, outliers, workers, cached_lines, cached_segments)
+    """
+    source = source or Config.ANALYSIS_SOURCE
+    baseline_file = baseline_file or Config.DWELL_BASELINE_FILE
+    now = now or datetime.now()
+    start = start or pd.Timestamp(now - timedelta(hours=hours)).floor(SEGMENT_STEP).to_pydatetime()
+
+    wall_started = time.perf_counter()
+    lines, workers, baselines, cache = _prepare(lines, workers, source, root, sync, baseline_file, cache)
+    print(f"[병렬 분석] 호선 {len(lines)}개, 워커 {workers}개 ({source})")
+
+    window = analyze_window(start, end, lines, baselines, workers, source, root, cache, render_charts,
+                            image_dir=image_dir, now=now)
+    baselines.save(baseline_file)
+    results, valid_dwell, outliers = window['results'], window['valid_dwell'], window['outliers']
+
+    # 4. 결과 저장
+    if valid_dwell is None:
+        create_report(None, None, None, report_file)
+    else:
+        create_report(valid_dwell, outliers, window['line_stats'], report_file)
+        summaries = [r['headway_summary'] for r in results if r['headway_summary'] is not None]
+        if summaries:
+            pd.concat(summaries, ignore_index=True).to_csv("analysis_result_headway.csv", index=False, encoding='utf-8-sig')
+    _prune_cache(cache)
+
+    wall = time.perf_counter() - wall_started
+    line_seconds = sum(r['seconds'] for r in results)
+    print(f"[병렬 분석 완료] 전체 {wall:.2f}초 (호선별 계산 합계 {line_seconds:.2f}초, "
+          f"캐시 {window['cached_lines']}개 호선/{window['cached_segments']}개 구간, "
+          f"정차 {0 if valid_dwell is None else len(valid_dwell)}건, 지연 {0 if outliers is None else len(outliers)}건)")
+    return {
+        'wall_seconds': wall,
+        'line_seconds': line_seconds,
+        'rows': sum(r['rows'] for r in results),
+        'events': 0 if valid_dwell is None else len(valid_dwell),
+        'outliers': 0 if outliers is None else len(outliers),
+        'workers': workers,
+        'cached_lines': window['cached_lines'],
+        'cached_segments': window['cached_segments'],
+    }
+
+
+def run_report_series(freq="day", windows=7, workers=None, lines=None, source=None, root=None, sync=True,
+                      render_charts=True, baseline_file=None, image_dir=OUTPUT_IMG_DIR,
+                      report_file=SERIES_REPORT_FILE, cache=None, now=None):
+    """
+    시간대별 누적 보고서를 갱신합니다. 최근 windows개의 지난 시간대(시간/일 단위) 중
+    보고서에 아직 없는 시간대만 차례로 분석해 보고서 끝에 섹션으로 추가하고, 이미 쓴 섹션은 다시 쓰지 않습니다.
+    시간대마다 호선별 결과와 차트가 분석 캐시에 남으므로, 같은 시간대를 다른 보고서나 재실행에서 다시 읽어도 계산하지 않습니다.
+    (아직 끝나지 않은 현재 시간대는 다음 실행에서 추가)
+
+    Args:
+        freq (str): 시간대 단위 ('hour' 또는 'day')
+        windows (int): 확인할 최근 시간대 수
+        report_file (str): 누적 보고서 경로 (기본: SERIES_REPORT_FILE)
+        now (datetime, optional): 기준 시각 (기본: 현재 시각)
+        (나머지 인자는 run_parallel_analysis()와 동일, 차트는 image_dir/series 폴더에 시간대별로 저장)
+
+    Returns:
+        dict: 실행 요약 (wall_seconds, added, skipped, cached_lines)
+    """
+    if freq not in SERIES_WINDOWS:
+        raise ValueError(f"지원하지 않는 시간대 단위입니다: {freq} (hour 또는 day)")
+    step, label_format = SERIES_WINDOWS[freq]
+    source = source or Config.ANALYSIS_SOURCE
+    baseline_file = baseline_file or Config.DWELL_BASELINE_FILE
+
+    now = now or datetime.now()
+    boundary = now.replace(minute=0, second=0, microsecond=0)
+    if freq == "day":
+        boundary = boundary.replace(hour=0)
+    done = reported_windows(report_file)
+    pending = [(boundary - step * (i + 1), boundary - step * i) for i in reversed(range(windows))]
+    pending = [(start, end) for start, end in pending if start.strftime(label_format) not in done]
+
+    wall_started = time.perf_counter()
+    if not pending:
+        print(f"[누적 보고서] 새로 추가할 시간대가 없습니다. ({report_file})")
+        return {'wall_seconds': time.perf_counter() - wall_started, 'added': 0, 'skipped': windows, 'cached_lines': 0}
+
+    lines, workers, baselines, cache = _prepare(lines, workers, source, root, sync, baseline_file, cache)
+    print(f"[누적 보고서] 시간대 {len(pending)}개 추가 (호선 {len(lines)}개, 워커 {workers}개, {source})")
+
+    store = LocalStore(root) if source == "local" else None
+    cached_lines = 0
+    for start, end in pending:
+        label = start.strftime(label_format)
+        print(f"\n[{label}]")
+        window = analyze_window(start, end, lines, baselines, workers, source, root, cache, render_charts,
+                                line_charts=False, image_dir=os.path.join(image_dir, "series"),
+                                chart_suffix="_" + label.replace(" ", "_").replace(":", ""), store=store, now=now)
+        cached_lines += window['cached_lines']
+        title = f"{label} ~ {end.strftime('%H:00')}" if freq == "hour" else label
+        append_window_report(label, title, window['valid_dwell'], window['outliers'], window['images'], report_file)
+    baselines.save(baseline_file)
+    _prune_cache(cache)
+
+    wall = time.perf_counter() - wall_started
+    print(f"\n[누적 보고서 완료] 시간대 {len(pending)}개 추가, 전체 {wall:.2f}초 (캐시 {cached_lines}개 호선) -> {report_file}")
+    return {'wall_seconds': wall, 'added': len(pending), 'skipped': windows - len(pending), 'cached_lines': cached_lines}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="호선별 병렬 지연/배차 간격 분석")
+    parser.add_argument("--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--hours", type=float, default=24, help="분석할 최근 시간 범위(시간)")
+    parser.add_argument("--lines", nargs="+", default=None, help="분석할 호선명 (기본: 전체)")
+    parser.add_argument("--source", choices=["local", "remote"], default=None, help="데이터 소스 (기본: ANALYSIS_SOURCE)")
+    parser.add_argument("--no-charts", action="store_true", help="차트를 그리지 않음")
+    parser.add_argument("--no-cache", action="store_true", help="분석 캐시를 사용하지 않음")
+    args = parser.parse_args()
+
+    run_parallel_analysis(hours=args.hours, workers=args.workers, lines=args.lines, source=args.source,
+                          render_charts=not args.no_charts, cache=AnalysisCache(enabled=False) if args.no_cache else None)
@@ -0,0 +1,333 @@
+import queue
+import threading
+import time
+from src import metrics
+from src.config import Config
+from src.spool import stamp_records
+
+# 작성 스레드에 보내는 제어 신호
+_FLUSH = object()
+_STOP = object()
+
+# 파이프라인 지표 (src/metrics.py)
+FLUSH_SECONDS = metrics.histogram("subway_pipeline_flush_seconds", "작성 스레드의 일괄 삽입(플러시) 소요 시간(초)")
+PIPELINE_ROWS = metrics.counter("subway_pipeline_rows_total", "파이프라인 처리 레코드 수 (result: enqueued/written/failed/dropped)", ["result"])
+BLOCKED_PUTS = metrics.counter("subway_pipeline_blocked_puts_total", "큐가 가득 차 수집 스레드가 대기한 횟수")
+SPOOL_RETRIES = metrics.counter("subway_spool_retries_total", "저장 대기열 재전송이 실패해 다시 시도한 횟수")
+SPOOL_PENDING = metrics.gauge("subway_spool_pending_rows", "저장 대기열에서 재전송을 기다리는 행 수")
+SPOOL_BYTES = metrics.gauge("subway_spool_bytes", "저장 대기열 배치 본문 크기 합계(바이트, 압축 후)")
+
+# 재전송 실패 중 대기열을 막지 않고 거부된 배치로 돌릴 HTTP 상태 (잘못된 행 등 다시 보내도 실패하는 요청)
+# 408/429는 일시적인 상태이므로 재시도
+_RETRYABLE_CLIENT_ERRORS = (408, 429)
+
+
+class PipelineStats:
+    """
+    수집 파이프라인 지표 (큐 적재량, 플러시 지연, 처리량 등)
+    생산자(수집 스레드)와 소비자(작성 스레드)가 함께 갱신하므로 락으로 보호합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.enqueued_rows = 0       # 큐에 적재된 레코드 수
+        self.written_rows = 0        # DB 저장에 성공한 레코드 수
+        self.failed_rows = 0         # DB 저장에 실패한 레코드 수
+        self.dropped_rows = 0        # 큐가 가득 차거나 저장 대기열 크기 제한으로 버려진 레코드 수
+        self.blocked_puts = 0        # 큐가 가득 차 생산자가 대기한 횟수 (백프레셔)
+        self.blocked_seconds = 0.0   # 생산자가 대기한 누적 시간
+        self.flush_count = 0         # DB 요청(POST) 횟수
+        self.flush_seconds = 0.0     # DB 요청 누적 소요 시간
+        self.last_flush_seconds = 0.0
+        self.last_flush_rows = 0
+        self.payload_bytes = 0       # 저장 요청 본문 누적 크기 (압축 전)
+        self.sent_bytes = 0          # 저장 요청 본문 누적 전송 크기 (압축 후)
+        self.last_sent_bytes = 0
+        self.retries = 0             # 저장 대기열 재전송 실패(재시도) 횟수
+
+    def add(self, **deltas):
+        with self._lock:
+            for name, value in deltas.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def record_flush(self, rows, written, elapsed, payload_bytes=0, sent_bytes=0):
+        with self._lock:
+            self.payload_bytes += payload_bytes
+            self.sent_bytes += sent_bytes
+            self.last_sent_bytes = sent_bytes
+            self.flush_count += 1
+            self.flush_seconds += elapsed
+            self.last_flush_seconds = elapsed
+            self.last_flush_rows = rows
+            self.written_rows += written
+            self.failed_rows += rows - written
+
+    def snapshot(self):
+        """현재 지표를 딕셔너리로 반환합니다."""
+        with self._lock:
+            uptime = max(time.monotonic() - self.started_at, 1e-9)
+            return {
+                "enqueued_rows": self.enqueued_rows,
+                "written_rows": self.written_rows,
+                "failed_rows": self.failed_rows,
+                "dropped_rows": self.dropped_rows,
+                "blocked_puts": self.blocked_puts,
+                "blocked_seconds": self.blocked_seconds,
+                "flush_count": self.flush_count,
+                "last_flush_seconds": self.last_flush_seconds,
+                "last_flush_rows": self.last_flush_rows,
+                "last_sent_bytes": self.last_sent_bytes,
+                "payload_bytes": self.payload_bytes,
+                "sent_bytes": self.sent_bytes,
+                "retries": self.retries,
+                "avg_flush_seconds": self.flush_seconds / self.flush_count if self.flush_count else 0.0,
+                "rows_per_second": self.written_rows / uptime,
+            }
+
+
+class IngestPipeline:
+    """
+    생산자/소비자 구조의 수집 파이프라인
+    수집 스레드는 변환된 레코드를 제한된 크기의 큐에 넣기만 하고,
+    단일 작성 스레드가 큐를 비우며 여러 호선의 레코드를 모아 한 번에 일괄 삽입합니다.
+    DB 저장이 느려도 API 수집 주기가 밀리지 않습니다.
+
+    저장 대기열(src/spool.py)을 주면 작성 스레드는 배치를 디스크 대기열에 추가만 하고,
+    재전송 스레드가 대기열을 오래된 순서로 멱등 upsert합니다. DB 장애 중에는 대기열에 쌓아 두고
+    지수 백오프로 재시도하다가, 복구되면 drain_rows 건씩 묶어 밀린 분량을 채웁니다.
+    """
+
+    def __init__(self, db_client, batch_rows=None, flush_interval=None, queue_size=None, put_timeout=None,
+                 spool=None, drain_rows=None, retry_max=None):
+        """
+        Args:
+            db_client (SupabaseClient): 일괄 삽입에 사용할 DB 클라이언트
+            batch_rows (int, optional): 이 건수 이상 모이면 즉시 플러시
+            flush_interval (float, optional): 첫 레코드가 들어온 뒤 이 시간(초)이 지나면 플러시
+            queue_size (int, optional): 큐에 보관할 최대 배치(호선 단위) 수
+            put_timeout (float, optional): 큐가 가득 찼을 때 생산자가 기다릴 최대 시간(초)
+            spool (WriteAheadSpool, optional): DB 저장 전에 배치를 기록할 로컬 저장 대기열 (없으면 바로 일괄 삽입)
+            drain_rows (int, optional): 재전송 요청 한 번에 묶을 최대 행 수
+            retry_max (float, optional): 재전송 실패 시 재시도 간격의 최대값(초)
+        """
+        self.db_client = db_client
+        self.batch_rows = batch_rows or Config.PIPELINE_BATCH_ROWS
+        self.flush_interval = flush_interval if flush_interval is not None else Config.PIPELINE_FLUSH_INTERVAL
+        self.put_timeout = put_timeout if put_timeout is not None else Config.PIPELINE_PUT_TIMEOUT
+        self.queue = queue.Queue(maxsize=queue_size or Config.PIPELINE_QUEUE_SIZE)
+        self.stats = PipelineStats()
+        self._writer = None
+
+        self.spool = spool
+        self.drain_rows = drain_rows or Config.SPOOL_DRAIN_ROWS
+        self.retry_max = retry_max if retry_max is not None else Config.SPOOL_RETRY_MAX_SECONDS
+        self._drainer = None
+        self._wake = threading.Event()
+        self._closing = False
+        self._retry_delay = 0.0
+
+    def start(self):
+        """작성 스레드(저장 대기열이 있으면 재전송 스레드도)를 시작합니다."""
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._run_writer, name="db-writer", daemon=True)
+            self._writer.start()
+        if self.spool is not None and self._drainer is None:
+            # 이전 실행에서 남은 배치가 있으면 바로 재전송
+            self._closing = False
+            self._wake.set()
+            self._drainer = threading.Thread(target=self._run_drainer, name="spool-drainer", daemon=True)
+            self._drainer.start()
+        return self
+
+    def put(self, records):
+        """
+        변환된 레코드 묶음을 큐에 넣습니다. (수집 스레드에서 호출)
+        큐가 가득 차면 put_timeout 동안 대기하고, 그래도 자리가 없으면 버립니다.
+
+        Args:
+            records (list): transform()으로 변환된 레코드 리스트
+
+        Returns:
+            bool: 큐 적재 성공 여부
+        """
+        if not records:
+            return True
+
+        try:
+            self.queue.put_nowait(records)
+        except queue.Full:
+            # 백프레셔: 작성 스레드가 밀리고 있음
+            started = time.monotonic()
+            try:
+                self.queue.put(records, timeout=self.put_timeout)
+            except queue.Full:
+                self.stats.add(blocked_puts=1, blocked_seconds=time.monotonic() - started,
+                               dropped_rows=len(records))
+                BLOCKED_PUTS.inc()
+                PIPELINE_ROWS.inc(len(records), result="dropped")
+                print(f"[파이프라인 경고] 큐가 가득 차 {len(records)}건을 버렸습니다. (큐 {self.queue.qsize()}개 대기)")
+                return False
+            self.stats.add(blocked_puts=1, blocked_seconds=time.monotonic() - started)
+            BLOCKED_PUTS.inc()
+
+        self.stats.add(enqueued_rows=len(records))
+        PIPELINE_ROWS.inc(len(records), result="enqueued")
+        return True
+
+    def flush(self):
+        """작성 스레드에 즉시 플러시를 요청합니다. (대기하지 않음)"""
+        try:
+            self.queue.put_nowait(_FLUSH)
+        except queue.Full:
+            # 큐가 가득 찬 경우 작성 스레드가 이미 크기 기준으로 플러시 중
+            pass
+
+    def close(self, timeout=None):
+        """
+        남은 레코드를 모두 저장한 뒤 작성 스레드를 종료합니다.
+        저장 대기열을 쓰는 경우 DB가 응답하는 동안 대기열을 비우고, 실패하면 남은 배치는 다음 실행에서 재전송합니다.
+
+        Args:
+            timeout (float, optional): 종료를 기다릴 최대 시간(초, 스레드별)
+        """
+        if self._writer is not None:
+            self.queue.put(_STOP)
+            self._writer.join(timeout)
+            self._writer = None
+        if self._drainer is not None:
+            self._closing = True
+            self._wake.set()
+            self._drainer.join(timeout)
+            self._drainer = None
+            pending = self.spool.pending_rows()
+            if pending:
+                print(f"[저장 대기열] 전송하지 못한 {pending}건은 {self.spool.path}에 보관되어 다음 실행 시 재전송합니다.")
+
+    def depth(self):
+        """현재 큐에 대기 중인 항목 수"""
+        return self.queue.qsize()
+
+    def backlog(self):
+        """저장 대기열에서 재전송을 기다리는 행 수 (대기열을 쓰지 않으면 0)"""
+        return self.spool.pending_rows() if self.spool is not None else 0
+
+    def _run_writer(self):
+        """큐를 비우며 크기 또는 경과 시간 기준으로 일괄 삽입합니다."""
+        buffer = []
+        first_at = None
+
+        while True:
+            # 버퍼가 비어 있으면 다음 항목까지 무기한 대기, 아니면 플러시 기한까지만 대기
+            timeout = None
+            if first_at is not None:
+                timeout = max(first_at + self.flush_interval - time.monotonic(), 0)
+
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _FLUSH
+
+            if item is _STOP:
+                self._flush(buffer)
+                return
+
+            if item is not _FLUSH:
+                buffer.extend(item)
+                if first_at is None:
+                    first_at = time.monotonic()
+                if len(buffer) < self.batch_rows:
+                    continue
+
+            if buffer:
+                self._flush(buffer)
+            buffer = []
+            first_at = None
+
+    def _flush(self, buffer):
+        if not buffer:
+            return
+        if self.spool is not None:
+            self._spool(buffer)
+            return
+        started = time.perf_counter()
+        written = self.db_client.insert_records(buffer)
+        elapsed = time.perf_counter() - started
+        FLUSH_SECONDS.observe(elapsed)
+        PIPELINE_ROWS.inc(written, result="written")
+        PIPELINE_ROWS.inc(len(buffer) - written, result="failed")
+        self.stats.record_flush(len(buffer), written, elapsed,
+                                payload_bytes=getattr(self.db_client, "last_payload_bytes", 0),
+                                sent_bytes=getattr(self.db_client, "last_sent_bytes", 0))
+
+    def _spool(self, buffer):
+        """
+        배치에 적재 시각(created_at)과 레코드 키를 붙여 저장 대기열에 추가하고 재전송 스레드를 깨웁니다.
+        적재 시각은 수집 스레드가 아닌 이 단일 작성 스레드에서 정하므로, 시각 순서가 대기열 순서(= DB 삽입 순서)와 같아
+        로컬 저장소의 (created_at, id) 증분 동기화가 늦게 도착한 행을 건너뛰지 않습니다.
+        """
+        evicted = self.spool.append(stamp_records(buffer))
+        if evicted:
+            self.stats.add(dropped_rows=evicted)
+            PIPELINE_ROWS.inc(evicted, result="dropped")
+            print(f"[저장 대기열 경고] 크기 제한({self.spool.max_bytes / 1024 ** 2:.0f}MB)을 넘어 가장 오래된 {evicted}건을 버렸습니다.")
+        self._update_spool_gauges()
+        self._wake.set()
+
+    def _update_spool_gauges(self):
+        SPOOL_PENDING.set(self.spool.pending_rows())
+        SPOOL_BYTES.set(self.spool.bytes)
+
+    def _run_drainer(self):
+        """저장 대기열을 비우고, 실패하면 백오프 후 다시 시도합니다. (재전송 스레드)"""
+        while True:
+            # 평소에는 새 배치가 추가될 때까지, 실패한 뒤에는 재시도 간격만큼 대기
+            self._wake.wait(self._retry_delay or None)
+            self._wake.clear()
+            failed = not self._drain()
+            if self._closing and (failed or not self.spool.pending_rows()):
+                return
+
+    def _drain(self):
+        """
+        대기열의 배치를 오래된 순서로 drain_rows 건씩 멱등 upsert합니다.
+
+        Returns:
+            bool: 대기열을 모두 비웠으면 True, 일시적 오류로 중단했으면 False
+        """
+        while True:
+            seqs, records = self.spool.peek(self.drain_rows)
+            if not records:
+                self._retry_delay = 0.0
+                return True
+
+            started = time.perf_counter()
+            try:
+                self.db_client.upsert_records(records)
+            except Exception as e:
+                elapsed = time.perf_counter() - started
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                if status is not None and 400 <= status < 500 and status not in _RETRYABLE_CLIENT_ERRORS:
+                    # 다시 보내도 실패하는 요청: 재전송에서 빼고 대기열 파일에 보관 (대기열이 막히지 않도록)
+                    self.spool.ack(seqs, dead=True)
+                    self.stats.record_flush(len(records), 0, elapsed)
+                    PIPELINE_ROWS.inc(len(records), result="failed")
+                    print(f"[저장 대기열 오류] DB가 {len(records)}건을 거부해 재전송에서 제외했습니다. "
+                          f"(HTTP {status}, {self.spool.path}에 보관): {e}")
+                    continue
+                self._retry_delay = min(max(self._retry_delay * 2, 1.0), self.retry_max)
+                self.stats.add(retries=1)
+                SPOOL_RETRIES.inc()
+                print(f"[저장 대기열] DB 저장 실패, {self._retry_delay:.0f}초 후 재시도 "
+                      f"(대기 {self.spool.pending_rows()}건): {e}")
+                return False
+
+            # 중복으로 무시된 행도 이미 DB에 있는 행이므로 저장된 것으로 집계
+            self.spool.ack(seqs)
+            elapsed = time.perf_counter() - started
+            FLUSH_SECONDS.observe(elapsed)
+            PIPELINE_ROWS.inc(len(records), result="written")
+            self.stats.record_flush(len(records), len(records), elapsed,
+                                    payload_bytes=getattr(self.db_client, "last_payload_bytes", 0),
+                                    sent_bytes=getattr(self.db_client, "last_sent_bytes", 0))
+            self._update_spool_gauges()
@@ -0,0 +1,40 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    스레드 안전한 요청 속도 제한기
+    여러 수집 스레드가 공유하며, 요청 간 최소 간격(1 / rate)을 보장합니다.
+    고정된 time.sleep() 대신 설정된 초당 요청 수만큼만 API를 호출하도록 조절합니다.
+    """
+
+    def __init__(self, rate_per_second):
+        """
+        Args:
+            rate_per_second (float): 초당 허용 요청 수 (0 이하이면 제한 없음)
+        """
+        self.interval = 1.0 / rate_per_second if rate_per_second and rate_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def acquire(self):
+        """
+        다음 요청 슬롯이 올 때까지 대기합니다.
+
+        Returns:
+            float: 실제로 대기한 시간(초)
+        """
+        if self.interval <= 0:
+            return 0.0
+
+        # 슬롯 예약은 락 안에서, 실제 대기는 락 밖에서 수행 (다른 스레드가 막히지 않도록)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
@@ -0,0 +1,123 @@
+import os
+import re
+import pandas as pd
+
+# 리포트/시각화 결과 저장 위치 (프로젝트 루트 기준)
+OUTPUT_IMG_DIR = "docs/images"
+REPORT_FILE = "docs/delay_analysis_report.md"
+SERIES_REPORT_FILE = "docs/delay_report_series.md"  # 시간대별 누적 보고서 (append_window_report)
+
+# 누적 보고서에 이미 쓴 시간대를 표시하는 주석 (다음 실행에서 새 시간대만 추가하기 위해)
+WINDOW_MARKER = re.compile(r"^<!-- window: (.+) -->$", re.MULTILINE)
+
+
+def create_report(df, outliers, line_stats, report_file=REPORT_FILE):
+    """
+    지연 분석 결과를 Markdown 보고서로 저장합니다.
+
+    Args:
+        df (pandas.DataFrame | None): 유효 정차 이벤트 (None이면 분석 불가 보고서)
+        outliers (pandas.DataFrame): 임계값을 넘은 정차 이벤트 (threshold_minutes 포함)
+        line_stats (pandas.DataFrame): 호선별 기준선 요약 (DwellBaselines.summary())
+        report_file (str): 저장 경로
+    """
+    os.makedirs(os.path.dirname(report_file) or ".", exist_ok=True)
+    with open(report_file, "w", encoding="utf-8") as f:
+        f.write("# 🚇 실시간 열차 지연 분석 보고서\n\n")
+        f.write(f"**분석 일시**: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        
+        if df is None:
+            f.write("### ⚠️ 분석 불가\n데이터가 충분하지 않아 분석을 수행할 수 없습니다.\n")
+            return
+
+        # 요약 통계
+        f.write("## 1. 요약 통계 (Summary Statistics)\n")
+        f.write(f"- **총 분석 대상 정차 횟수**: {len(df)}건\n")
+        f.write(f"- **평균 체류 시간**: {df['dwell_minutes'].mean():.2f}분\n")
+        f.write(f"- **탐지된 지연 횟수**: {len(outliers)}건\n\n")
+
+        # 호선별 임계값
+        f.write("### 호선별 지연 임계값 (IQR Threshold)\n")
+        f.write("누적된 호선별 체류 시간 분포 기준이며, 이 시간 이상 정차 시 지연으로 간주합니다.\n\n")
+        f.write("| 호선 | 누적 표본 | Q1(분) | 중앙값(분) | Q3(분) | 임계값(분) |\n")
+        f.write("|:---:|:---:|:---:|:---:|:---:|:---:|\n")
+        for _, row in line_stats.iterrows():
+            f.write(f"| {row['line_name']} | {row['count']} | {row['q1'] / 60:.2f} | {row['median'] / 60:.2f} | "
+                    f"{row['q3'] / 60:.2f} | **{row['threshold'] / 60:.2f}** |\n")
+        f.write("\n")
+
+        # 시각화 결과
+        f.write("## 2. 시각화 (Visualization)\n")
+        f.write("### (1) 전체 체류 시간 분포\n")
+        f.write("대부분의 열차가 얼마나 역에 머무르는지 보여줍니다. 오른쪽 꼬리가 길수록 지연이 많음을 의미합니다.\n\n")
+        f.write("![Dwell Time Dist](images/dwell_dist.png)\n\n")
+        
+        f.write("### (2) 호선별 지연 패턴 비교\n")
+        f.write("어떤 호선이 상대적으로 정차 시간이 긴지 비교합니다.\n\n")
+        f.write("![Line Boxplot](images/line_boxplot.png)\n\n")
+
+        # 상세 데이터
+        f.write("## 3. 주요 지연 발생 구간 (Top 10 Delay Hotspots)\n")
+        _write_outliers(f, outliers, 10)
+
+    print(f"\n[Success] Report generated at: {report_file}")
+
+
+def _write_outliers(f, outliers, limit):
+    """체류 시간 상위 limit건의 지연 표"""
+    if outliers.empty:
+        f.write("✅ **특이 사항 없음**: 임계값을 초과하는 유의미한 지연이 발견되지 않았습니다.\n")
+        return
+    f.write("| 순위 | 호선 | 역명 | 열차번호 | 체류시간(분) | 임계값(분) | 상태 |\n")
+    f.write("|:---:|:---:|:---:|:---:|:---:|:---:|:---:|\n")
+    for i, (_, row) in enumerate(outliers.head(limit).iterrows(), 1):
+        f.write(f"| {i} | {row['line_name']} | {row['station_name']} | {row['train_number']} | **{row['dwell_minutes']:.2f}** | {row['threshold_minutes']:.2f} | {row['status']} |\n")
+
+
+def reported_windows(report_file=SERIES_REPORT_FILE):
+    """
+    누적 보고서에 이미 추가된 시간대 목록
+
+    Returns:
+        set: 시간대 라벨 집합 (보고서가 없으면 빈 집합)
+    """
+    if not os.path.exists(report_file):
+        return set()
+    with open(report_file, encoding="utf-8") as f:
+        return set(WINDOW_MARKER.findall(f.read()))
+
+
+def append_window_report(label, title, df, outliers, images=None, report_file=SERIES_REPORT_FILE, top=5):
+    """
+    시간대 하나의 지연 분석 결과를 누적 보고서 끝에 추가합니다. (기존 내용은 다시 쓰지 않음)
+
+    Args:
+        label (str): 시간대 라벨 (reported_windows()로 중복 추가를 막는 키)
+        title (str): 섹션 제목 (예: "2026-01-07 08:00 ~ 09:00")
+        df (pandas.DataFrame | None): 유효 정차 이벤트 (None이면 데이터 없음으로 기록)
+        outliers (pandas.DataFrame): 임계값을 넘은 정차 이벤트 (threshold_minutes 포함)
+        images (dict, optional): 차트 설명 -> 이미지 경로 (보고서 파일 기준 상대 경로로 링크)
+        report_file (str): 누적 보고서 경로
+        top (int): 지연 표에 넣을 건수
+    """
+    os.makedirs(os.path.dirname(report_file) or ".", exist_ok=True)
+    new_file = not os.path.exists(report_file)
+    with open(report_file, "a", encoding="utf-8") as f:
+        if new_file:
+            f.write("# 🚇 시간대별 열차 지연 분석 보고서\n\n")
+            f.write("지난 시간대가 끝날 때마다 새 섹션이 아래에 추가됩니다. 임계값은 해당 시간대를 분석한 시점의 누적 기준선입니다.\n\n")
+
+        f.write(f"<!-- window: {label} -->\n")
+        f.write(f"## {title}\n")
+        if df is None:
+            f.write("데이터가 없습니다.\n\n")
+            return
+        f.write(f"- **정차 횟수**: {len(df)}건, **평균 체류 시간**: {df['dwell_minutes'].mean():.2f}분, "
+                f"**탐지된 지연 횟수**: {len(outliers)}건\n\n")
+        for caption, path in (images or {}).items():
+            link = os.path.relpath(path, os.path.dirname(report_file) or ".").replace(os.sep, "/")
+            f.write(f"![{caption}]({link})\n")
+        if images:
+            f.write("\n")
+        _write_outliers(f, outliers, top)
+        f.write("\n")
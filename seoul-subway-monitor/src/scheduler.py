@@ -0,0 +1,264 @@
+import threading
+import time
+from datetime import datetime
+from src import metrics
+from src.dwell import KST
+
+# 적응형 폴링 지표 (src/metrics.py)
+PLANNED_INTERVAL = metrics.gauge("subway_poll_interval_seconds", "호선별 계획 폴링 간격(초)", ["line"])
+ACHIEVED_INTERVAL = metrics.gauge("subway_poll_achieved_interval_seconds", "호선별 실제 폴링 간격(초, 지수 이동 평균)", ["line"])
+POLL_REQUESTS = metrics.counter("subway_poll_requests_total", "적응형 스케줄러가 보낸 호선별 수집 요청 수", ["line"])
+BUDGET_REMAINING = metrics.gauge("subway_poll_budget_remaining", "오늘(한국 시간) 남은 API 요청 예산")
+
+# 활동량별 가중치 (가중치가 클수록 자주 수집, 간격 = 기본 간격 / 가중치)
+PEAK_WEIGHT = 2.0          # 출퇴근 시간대
+NIGHT_WEIGHT = 0.25        # 심야 (운행 종료 ~ 첫차 전)
+IDLE_WEIGHT = 0.25         # 직전 수집에서 운행 열차가 없던 호선
+SUSPECT_WEIGHT = 3.0       # 지연 의심 열차가 있는 호선
+LAST_TRAIN_WEIGHT = 2.0    # 막차 운행 중인 호선
+BUSY_RANGE = (0.5, 2.0)    # 운행 열차 수 비율에 따른 가중치 범위
+
+ACHIEVED_ALPHA = 0.2       # 실제 간격 지수 이동 평균의 가중치
+
+
+def parse_hours(text):
+    """
+    시간대 문자열을 시(hour) 집합으로 바꿉니다. 끝 시각은 포함하지 않고, 자정을 넘는 구간도 허용합니다.
+
+    Args:
+        text (str): 예) "7-9,18-20" -> {7, 8, 18, 19}, "23-2" -> {23, 0, 1}
+
+    Returns:
+        set: 0~23 사이 시 집합
+    """
+    hours = set()
+    for part in (text or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        start = int(start)
+        end = int(end) if end else start + 1
+        hour = start % 24
+        while hour != end % 24:
+            hours.add(hour)
+            hour = (hour + 1) % 24
+    return hours
+
+
+class _LineState:
+    """호선 하나의 최근 활동량과 폴링 기록"""
+    __slots__ = ("trains", "last_train", "observed", "last_poll", "next_due", "interval", "achieved", "polls")
+
+    def __init__(self, interval):
+        self.trains = 0
+        self.last_train = False
+        self.observed = False    # 한 번이라도 수집 결과를 받았는지
+        self.last_poll = None
+        self.next_due = 0.0      # 처음에는 바로 수집
+        self.interval = interval
+        self.achieved = None
+        self.polls = 0           # 오늘 요청 수
+
+
+class AdaptivePoller:
+    """
+    호선별 적응형 폴링 스케줄러
+    모든 호선을 1분마다 수집하는 대신, 호선마다 활동량(운행 열차 수, 출퇴근/심야 시간대,
+    지연 의심 열차, 막차 운행)에 따라 폴링 간격을 따로 정하고 하루 API 요청 예산 안에서 배분합니다.
+
+    예산은 "지금 간격을 유지했을 때 오늘 남은 시간 동안 쓸 요청 수"를 시간대별 가중치로 추정해,
+    남은 예산을 넘으면 모든 호선의 간격을 같은 비율로 늘리는 방식으로 지킵니다.
+    (출퇴근 시간대에 예산을 미리 당겨 써서 저녁에 바닥나지 않도록)
+    수집기 observers에 함께 넣어 호선별 수집 결과로 활동량을 갱신하며, 시각은 epoch 초 기준입니다.
+    """
+
+    name = "적응형 폴링"
+
+    def __init__(self, lines, daily_budget, base_interval=60, min_interval=20, max_interval=300,
+                 peak_hours="7-9,18-20", night_hours="1-5", suspects=None, replan_seconds=10, clock=time.time):
+        """
+        Args:
+            lines (list): 수집 대상 호선명 목록
+            daily_budget (int): 하루(한국 시간 기준) API 요청 예산 (0 이하이면 제한 없음)
+            base_interval (float): 가중치 1일 때의 폴링 간격(초)
+            min_interval, max_interval (float): 예산 배분 전 간격의 하한/상한(초)
+                (예산이 모자라면 상한보다 길어질 수 있음)
+            peak_hours, night_hours (str): 출퇴근/심야 시간대 (parse_hours 형식)
+            suspects (callable, optional): 호선명 -> 지연 의심 열차 수 dict를 반환하는 함수 (DwellTracker.suspect_counts)
+            replan_seconds (float): 간격 재계산 주기(초)
+            clock (callable): 현재 시각(epoch 초) 함수 (시뮬레이션용)
+        """
+        self.lines = list(lines)
+        self.daily_budget = daily_budget
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.peak_hours = parse_hours(peak_hours)
+        self.night_hours = parse_hours(night_hours)
+        self.suspects = suspects
+        self.replan_seconds = replan_seconds
+        self.clock = clock
+
+        self._state = {line: _LineState(base_interval) for line in self.lines}
+        self._lock = threading.Lock()
+        self._day = None
+        self.used = 0                # 오늘 사용한 요청 수
+        self.scale = 1.0             # 예산 때문에 늘린 간격 배율
+        self._next_plan = 0.0
+        self._exhausted_logged = False
+
+    # 수집기 연동 (main.job의 observers) -------------------------------------
+
+    def observe(self, line, records):
+        """수집 스레드에서 호선별 레코드를 받아 활동량을 갱신합니다."""
+        state = self._state.get(line)
+        if state is None:
+            return
+        state.trains = len(records)
+        state.last_train = any(record.get("is_last_train") for record in records)
+        state.observed = True
+
+    def end_cycle(self):
+        """예산 사용량과 호선별 실제 수집 간격 요약 문자열을 반환합니다."""
+        with self._lock:
+            achieved = {line: state.achieved for line, state in self._state.items() if state.achieved}
+            budget = f"{self.used}/{self.daily_budget}" if self.daily_budget > 0 else f"{self.used}/무제한"
+            summary = f"오늘 요청 {budget}, 간격 배율 x{self.scale:.2f}"
+        if achieved:
+            fastest = min(achieved, key=achieved.get)
+            slowest = max(achieved, key=achieved.get)
+            summary += (f", 실제 간격 {fastest} {achieved[fastest]:.0f}초 ~ {slowest} {achieved[slowest]:.0f}초 "
+                        f"(평균 {sum(achieved.values()) / len(achieved):.0f}초)")
+        return summary
+
+    # 스케줄링 ---------------------------------------------------------------
+
+    def due(self, now=None):
+        """
+        지금 수집할 호선 목록을 반환하고 요청 수를 예산에 반영합니다. (메인 스케줄 루프에서 주기적으로 호출)
+
+        Returns:
+            list: 수집할 호선명 목록 (예산을 다 썼으면 자정까지 빈 리스트)
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            self._roll_day(now)
+            if now >= self._next_plan:
+                self._plan(now)
+                self._next_plan = now + self.replan_seconds
+
+            lines = [line for line, state in self._state.items() if state.next_due <= now]
+            if self.daily_budget > 0:
+                remaining = self.daily_budget - self.used
+                if remaining < len(lines):
+                    if not self._exhausted_logged:
+                        print(f"[적응형 폴링] 오늘 요청 예산({self.daily_budget}회)을 모두 사용해 자정까지 수집을 멈춥니다.")
+                        self._exhausted_logged = True
+                    # 남은 예산은 가장 오래 기다린 호선부터 사용
+                    lines = sorted(lines, key=lambda line: self._state[line].next_due)[:max(remaining, 0)]
+
+            for line in lines:
+                state = self._state[line]
+                if state.last_poll is not None:
+                    gap = now - state.last_poll
+                    state.achieved = gap if state.achieved is None else \
+                        (1 - ACHIEVED_ALPHA) * state.achieved + ACHIEVED_ALPHA * gap
+                    ACHIEVED_INTERVAL.set(round(state.achieved, 1), line=line)
+                state.last_poll = now
+                state.next_due = now + state.interval
+                state.polls += 1
+                POLL_REQUESTS.inc(line=line)
+            self.used += len(lines)
+            if self.daily_budget > 0:
+                BUDGET_REMAINING.set(self.daily_budget - self.used)
+        return lines
+
+    def seconds_until_next(self, now=None):
+        """다음 호선 수집까지 남은 시간(초)"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            return max(0.0, min(state.next_due for state in self._state.values()) - now)
+
+    def resolution(self):
+        """
+        호선별 샘플링 해상도
+
+        Returns:
+            dict: 호선명 -> {'planned': 계획 간격(초), 'achieved': 실제 간격 이동 평균(초, 아직 없으면 None),
+                  'polls': 오늘 요청 수}
+        """
+        with self._lock:
+            return {line: {"planned": state.interval, "achieved": state.achieved, "polls": state.polls}
+                    for line, state in self._state.items()}
+
+    def _roll_day(self, now):
+        """한국 시간 날짜가 바뀌면 예산과 호선별 요청 수를 초기화합니다."""
+        day = datetime.fromtimestamp(now, KST).date()
+        if day == self._day:
+            return
+        if self._day is not None:
+            print(f"[적응형 폴링] {self._day} 요청 {self.used}회 사용 (예산 {self.daily_budget}회)")
+        self._day = day
+        self.used = 0
+        self._exhausted_logged = False
+        self._next_plan = 0.0
+        for state in self._state.values():
+            state.polls = 0
+
+    def _weights(self, hour, suspects=None, current=True):
+        """
+        시(hour)와 활동량 기준 호선별 가중치
+        current가 False이면 이후 시간대 추정용으로 운행 없음/막차처럼 지금만 유효한 상태는 빼고 계산합니다.
+        """
+        active = [state.trains for state in self._state.values() if state.trains]
+        mean_trains = sum(active) / len(active) if active else 0
+        base = PEAK_WEIGHT if hour in self.peak_hours else NIGHT_WEIGHT if hour in self.night_hours else 1.0
+
+        weights = {}
+        for line, state in self._state.items():
+            weight = base
+            if current and state.observed and not state.trains:
+                weight *= IDLE_WEIGHT
+            elif mean_trains:
+                low, high = BUSY_RANGE
+                weight *= min(max((state.trains / mean_trains) ** 0.5, low), high)
+            if suspects is not None and suspects.get(line):
+                weight *= SUSPECT_WEIGHT
+            if current and state.last_train:
+                weight *= LAST_TRAIN_WEIGHT
+            weights[line] = weight
+        return weights
+
+    def _intervals(self, weights):
+        return {line: min(max(self.base_interval / weight, self.min_interval), self.max_interval)
+                for line, weight in weights.items()}
+
+    def _plan(self, now):
+        """호선별 간격을 다시 계산하고, 오늘 남은 예산을 넘지 않도록 배율을 정합니다."""
+        local = datetime.fromtimestamp(now, KST)
+        suspects = self.suspects() if self.suspects else None
+        intervals = self._intervals(self._weights(local.hour, suspects))
+
+        self.scale = 1.0
+        if self.daily_budget > 0:
+            # 남은 시간의 요청 수 추정: 이번 시(hour)는 현재 간격, 이후 시간대는 시간대 가중치만 반영
+            # (지연 의심/막차처럼 일시적인 상태는 지금 시간에만 적용)
+            hour_end = local.replace(minute=0, second=0, microsecond=0).timestamp() + 3600
+            demand = sum((hour_end - now) / interval for interval in intervals.values())
+            for hour in range(local.hour + 1, 24):
+                future = self._intervals(self._weights(hour, current=False))
+                demand += sum(3600 / interval for interval in future.values())
+            remaining = max(self.daily_budget - self.used, 0)
+            if demand > remaining:
+                self.scale = demand / remaining if remaining else float("inf")
+
+        for line, interval in intervals.items():
+            state = self._state[line]
+            interval *= self.scale
+            if interval != state.interval and state.last_poll is not None:
+                # 간격이 바뀌면 다음 수집 시각을 새 간격 기준으로 당기거나 미룸
+                state.next_due = state.last_poll + interval
+            state.interval = interval
+            if interval != float("inf"):
+                PLANNED_INTERVAL.set(round(interval, 1), line=line)
@@ -0,0 +1,47 @@
+import pandas as pd
+
+# 분석용 DataFrame 컬럼 타입 (docs/schema.sql의 타입 정의와 대응)
+# - 반복되는 ID/이름은 category로 보관해 문자열 중복 저장을 없앰
+# - 상태/방향/급행 코드는 int8 (-1: 값 없음)
+# - 수신 시각은 한국 시간대 datetime
+CATEGORY_COLUMNS = [
+    "line_id", "line_name", "station_id", "station_name", "train_number",
+    "dest_station_id", "dest_station_name",
+]
+INT8_COLUMNS = ["direction_type", "train_status", "is_express"]
+TIMESTAMP_COLUMNS = ["last_rec_time", "created_at"]
+LOCAL_TZ = "Asia/Seoul"
+EPOCH = pd.Timestamp(0, tz="UTC")  # 수신 시각 -> epoch 초 변환 기준
+
+
+def coerce_frame(df):
+    """
+    조회된 DataFrame의 컬럼을 분석용 타입(category, int8, datetime)으로 변환합니다.
+    이미 변환된 컬럼은 건너뛰므로 여러 번 호출해도 비용이 거의 들지 않습니다.
+
+    Args:
+        df (pandas.DataFrame): DB 또는 로컬 저장소에서 읽은 DataFrame
+
+    Returns:
+        pandas.DataFrame: 타입이 변환된 DataFrame (원본을 직접 수정하지 않음)
+    """
+    converted = {}
+
+    for col in TIMESTAMP_COLUMNS:
+        if col in df and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            converted[col] = pd.to_datetime(df[col], utc=True, format="ISO8601").dt.tz_convert(LOCAL_TZ)
+
+    for col in INT8_COLUMNS:
+        if col in df and df[col].dtype != "int8":
+            converted[col] = pd.to_numeric(df[col], errors="coerce").fillna(-1).astype("int8")
+
+    for col in CATEGORY_COLUMNS:
+        if col in df and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            # ID는 숫자/문자열이 섞여 들어올 수 있으므로 문자열로 통일 후 category 변환
+            values = df[col] if col.endswith("_name") or col == "train_number" else df[col].astype("string")
+            converted[col] = values.astype("category")
+
+    if "is_last_train" in df and df["is_last_train"].dtype != bool:
+        converted["is_last_train"] = df["is_last_train"].fillna(False).astype(bool)
+
+    return df.assign(**converted) if converted else df
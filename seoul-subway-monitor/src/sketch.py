@@ -0,0 +1,142 @@
+import math
+import random
+
+
+class KLLSketch:
+    """
+    KLL 분위수 스케치 (Karnin, Lang, Liberty 2016)
+    값을 모두 저장하지 않고 높이별 압축기(compactor)에 일부만 남겨 분위수를 근사합니다.
+    - 메모리: 입력 건수와 무관하게 약 3k개 값
+    - 정확도: 순위 오차 약 1.65 / k (k=200이면 약 ±1%p)
+    - 병합 가능: 나눠서 만든 스케치를 merge()로 합쳐도 같은 정확도
+    높이 h 압축기에 남은 값 하나는 원본 2^h개를 대표합니다.
+    """
+
+    def __init__(self, k=200, c=2 / 3, seed=None):
+        """
+        Args:
+            k (int): 최상위 압축기 크기 (클수록 정확하고 메모리를 더 씀)
+            c (float): 아래 높이로 갈수록 압축기 크기를 줄이는 비율
+            seed (int, optional): 압축 시 홀짝 선택 난수 시드
+        """
+        self.k = k
+        self.c = c
+        self.count = 0
+        self.compactors = []
+        self.size = 0
+        self.max_size = 0
+        self._rng = random.Random(seed)
+        self._grow()
+
+    def _capacity(self, height):
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil(self.k * self.c ** depth)) + 1
+
+    def _grow(self):
+        self.compactors.append([])
+        self.max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def update(self, value):
+        """값 하나를 추가합니다."""
+        self.compactors[0].append(value)
+        self.size += 1
+        self.count += 1
+        if self.size >= self.max_size:
+            self._compress()
+
+    def update_many(self, values):
+        """여러 값을 한 번에 추가합니다."""
+        values = list(values)
+        self.compactors[0].extend(values)
+        self.size += len(values)
+        self.count += len(values)
+        while self.size >= self.max_size:
+            self._compress()
+
+    def _compress(self):
+        """가득 찬 가장 낮은 압축기를 정렬 후 절반(홀/짝 무작위)만 위 높이로 올립니다."""
+        for height in range(len(self.compactors)):
+            items = self.compactors[height]
+            if len(items) < self._capacity(height):
+                continue
+            if height + 1 >= len(self.compactors):
+                self._grow()
+            items.sort()
+            keep = len(items) % 2
+            self.compactors[height + 1].extend(items[keep + self._rng.randint(0, 1)::2])
+            self.compactors[height] = items[:keep]
+            self.size = sum(len(c) for c in self.compactors)
+            if self.size < self.max_size:
+                break
+
+    def merge(self, other):
+        """다른 스케치를 합칩니다. (같은 k를 권장)"""
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for height, items in enumerate(other.compactors):
+            self.compactors[height].extend(items)
+        self.count += other.count
+        self.size = sum(len(c) for c in self.compactors)
+        while self.size >= self.max_size:
+            self._compress()
+        return self
+
+    def _weighted(self):
+        """(값, 가중치) 목록을 값 순서로 반환합니다."""
+        pairs = [(value, 1 << height) for height, items in enumerate(self.compactors) for value in items]
+        pairs.sort()
+        return pairs
+
+    def quantiles(self, qs):
+        """
+        여러 분위수를 한 번에 계산합니다.
+
+        Args:
+            qs (list): 0~1 사이 분위 목록
+
+        Returns:
+            list: 분위수 값 목록 (값이 없으면 None)
+        """
+        pairs = self._weighted()
+        if not pairs:
+            return [None for _ in qs]
+        total = sum(weight for _, weight in pairs)
+        results = []
+        for q in qs:
+            target = q * total
+            cumulative = 0
+            value = pairs[-1][0]
+            for candidate, weight in pairs:
+                cumulative += weight
+                if cumulative >= target:
+                    value = candidate
+                    break
+            results.append(value)
+        return results
+
+    def quantile(self, q):
+        """분위수 하나를 계산합니다."""
+        return self.quantiles([q])[0]
+
+    def rank(self, value):
+        """value 이하 값의 비율 (0~1)"""
+        pairs = self._weighted()
+        total = sum(weight for _, weight in pairs)
+        if not total:
+            return None
+        return sum(weight for v, weight in pairs if v <= value) / total
+
+    def to_dict(self):
+        """JSON 저장용 dict로 변환합니다."""
+        return {"k": self.k, "c": self.c, "count": self.count, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, data):
+        """to_dict() 결과에서 스케치를 복원합니다."""
+        sketch = cls(k=data["k"], c=data.get("c", 2 / 3))
+        for _ in range(len(data["compactors"]) - 1):
+            sketch._grow()
+        sketch.compactors = [list(items) for items in data["compactors"]]
+        sketch.count = data["count"]
+        sketch.size = sum(len(c) for c in sketch.compactors)
+        return sketch
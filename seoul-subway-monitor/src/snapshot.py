@@ -0,0 +1,291 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from src import metrics
+from src.dwell import KST
+
+
+class _LineSnapshot:
+    """호선 하나의 최신 수집 결과 (교체만 하고 수정하지 않으므로 잠금 없이 읽을 수 있음)"""
+    __slots__ = ("version", "updated_at", "records", "by_station", "by_train")
+
+    def __init__(self, version, updated_at, records):
+        self.version = version
+        self.updated_at = updated_at
+        self.records = records
+        self.by_station = {}  # 역명 / 역 ID(문자열) -> 레코드 리스트
+        self.by_train = {}    # 열차번호 -> 레코드 리스트
+        for record in records:
+            for key in (record.get("station_name"), record.get("station_id")):
+                if key is not None:
+                    self.by_station.setdefault(str(key), []).append(record)
+            self.by_train.setdefault(str(record.get("train_number")), []).append(record)
+
+
+class LiveSnapshot:
+    """
+    실시간 열차 위치 스냅샷 (수집기 observer)
+    호선별 최신 수집 결과를 메모리에 보관하고 호선/역/열차 기준으로 조회합니다.
+    - 호선 결과가 들어오면 색인을 새로 만든 뒤 통째로 교체하므로 조회 중 잠금이 필요 없음
+    - 내용이 바뀔 때마다 버전이 올라가며, 버전으로 ETag를 만들어 바뀌지 않은 조회는 본문 없이 응답(304)
+    - 직렬화한 응답 본문은 (경로, 버전) 단위로 캐시해 같은 버전을 여러 번 요청해도 한 번만 직렬화
+    """
+
+    name = "실시간 스냅샷"
+
+    def __init__(self, cache_size=1024):
+        """
+        Args:
+            cache_size (int): 보관할 직렬화 응답 본문 최대 개수 (넘으면 비움)
+        """
+        self.cache_size = cache_size
+        self._lines = {}  # 호선명 -> _LineSnapshot
+        self._version = 0
+        self._lock = threading.Lock()
+        self._cache = {}  # 경로 -> (ETag, 본문)
+        # 재시작 후 같은 버전 번호가 다시 쓰여도 이전 ETag와 겹치지 않도록 실행마다 다른 접두사 사용
+        self._boot = os.urandom(4).hex()
+
+        # 주기별 카운터
+        self._cycle_updates = 0
+        self.requests = 0
+        self.not_modified = 0
+
+    # 수집기 연동 (main.job의 observers) -------------------------------------
+
+    def observe(self, line, records):
+        """수집 스레드에서 호선별 레코드를 받아 해당 호선 스냅샷을 교체합니다. (내용이 같으면 유지)"""
+        current = self._lines.get(line)
+        if current is not None and current.records == records:
+            return
+        with self._lock:
+            self._version += 1
+            self._lines[line] = _LineSnapshot(self._version, time.time(), list(records))
+            self._cycle_updates += 1
+
+    def end_cycle(self):
+        """이번 주기 요약 문자열을 반환하고 카운터를 초기화합니다."""
+        with self._lock:
+            trains = sum(len(snapshot.records) for snapshot in self._lines.values())
+            summary = (f"호선 {len(self._lines)}개, 열차 {trains}대, 갱신 {self._cycle_updates}개 호선, "
+                       f"API 요청 {self.requests}건 (304 {self.not_modified}건)")
+            self._cycle_updates = 0
+            self.requests = 0
+            self.not_modified = 0
+        return summary
+
+    # 조회 ------------------------------------------------------------------
+
+    @property
+    def version(self):
+        return self._version
+
+    def has_line(self, line_name):
+        return line_name in self._lines
+
+    def count_request(self, not_modified):
+        """HTTP 조회 요청 수를 집계합니다. (304 응답 여부 포함)"""
+        with self._lock:
+            self.requests += 1
+            self.not_modified += bool(not_modified)
+
+    def lines(self):
+        """호선별 요약 (열차 수, 갱신 시각, 버전)"""
+        return [
+            {"line_name": line, "trains": len(snapshot.records),
+             "updated_at": _isoformat(snapshot.updated_at), "version": snapshot.version}
+            for line, snapshot in sorted(self._lines.items())
+        ]
+
+    def line(self, line_name):
+        """
+        호선 하나의 최신 열차 위치
+
+        Returns:
+            dict | None: {line_name, updated_at, trains} (수집된 적 없는 호선이면 None)
+        """
+        snapshot = self._lines.get(line_name)
+        if snapshot is None:
+            return None
+        return {"line_name": line_name, "updated_at": _isoformat(snapshot.updated_at), "trains": snapshot.records}
+
+    def all(self):
+        """모든 호선의 최신 열차 위치"""
+        return {"lines": [self.line(line) for line in sorted(self._lines)]}
+
+    def station(self, station, line_name=None):
+        """
+        역(역명 또는 역 ID)에 있는 열차 목록
+
+        Args:
+            station (str): 역명 또는 역 ID
+            line_name (str, optional): 호선명 (없으면 모든 호선에서 검색)
+        """
+        return {"station": station, "trains": self._find("by_station", station, line_name)}
+
+    def train(self, train_number, line_name=None):
+        """열차번호로 열차 위치를 찾습니다. (열차번호는 호선끼리 겹칠 수 있어 목록으로 반환)"""
+        return {"train_number": train_number, "trains": self._find("by_train", train_number, line_name)}
+
+    def _find(self, index, key, line_name):
+        snapshots = [self._lines.get(line_name)] if line_name else list(self._lines.values())
+        return [record for snapshot in snapshots if snapshot is not None
+                for record in getattr(snapshot, index).get(str(key), ())]
+
+    # HTTP 응답 -------------------------------------------------------------
+
+    def etag(self, line_name=None):
+        """조회 범위(호선 하나 또는 전체)의 현재 버전으로 만든 ETag"""
+        if line_name:
+            snapshot = self._lines.get(line_name)
+            version = snapshot.version if snapshot is not None else 0
+        else:
+            version = self._version
+        return f'"{self._boot}-{version}"'
+
+    def render(self, path, etag, build):
+        """
+        경로의 응답 본문(JSON bytes)을 반환합니다. 같은 ETag로 이미 만든 본문은 재사용합니다.
+
+        Args:
+            path (str): 캐시 키 (요청 경로 + 쿼리)
+            etag (str): 현재 ETag
+            build (callable): 본문 dict를 만드는 함수
+        """
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == etag:
+            return cached[1]
+        body = json.dumps(build(), ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[path] = (etag, body)
+        return body
+
+
+def _isoformat(epoch):
+    return datetime.fromtimestamp(epoch, KST).isoformat(timespec="seconds")
+
+
+def _etag_matches(header, etag):
+    """If-None-Match 헤더(쉼표 구분 목록, *, W/ 접두사 허용)가 ETag와 일치하는지 확인합니다."""
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
+
+
+class _SnapshotHandler(BaseHTTPRequestHandler):
+    """
+    스냅샷 조회 HTTP 핸들러 (GET만 지원)
+        /health                     상태 확인
+        /lines                      호선별 요약
+        /lines/{호선명}              호선 하나의 열차 위치
+        /trains                     모든 호선의 열차 위치
+        /trains/{열차번호}?line=     열차번호로 조회
+        /stations/{역명|역 ID}?line= 역에 있는 열차 조회
+        /metrics                    수집기 계측 지표 (Prometheus 텍스트 형식)
+    """
+
+    protocol_version = "HTTP/1.1"   # keep-alive (대시보드의 잦은 폴링에서 연결 재사용)
+    disable_nagle_algorithm = True  # 헤더와 본문을 따로 보내도 작은 응답이 ACK 대기로 지연되지 않도록
+    snapshot = None                 # SnapshotServer가 LiveSnapshot을 지정
+
+    def do_GET(self):
+        snapshot = self.snapshot
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/") if part]
+        line_name = parse_qs(url.query).get("line", [None])[0]
+
+        if parts == ["health"]:
+            return self._send(200, json.dumps({"status": "ok", "version": snapshot.version}).encode("utf-8"))
+        if parts == ["metrics"]:
+            body = metrics.REGISTRY.to_prometheus().encode("utf-8")
+            return self._send(200, body, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+        route = self._route(snapshot, parts, line_name)
+        if route is None:
+            return self._send(404, json.dumps({"error": "not found", "path": url.path}, ensure_ascii=False).encode("utf-8"))
+
+        etag, build = route
+        not_modified = _etag_matches(self.headers.get("If-None-Match"), etag)
+        snapshot.count_request(not_modified)
+        if not_modified:
+            return self._send(304, None, etag)
+
+        self._send(200, snapshot.render(self.path, etag, build), etag)
+
+    @staticmethod
+    def _route(snapshot, parts, line_name):
+        """경로 -> (ETag, 본문 생성 함수), 알 수 없는 경로면 None"""
+        if parts == ["lines"]:
+            return snapshot.etag(), snapshot.lines
+        if parts == ["trains"]:
+            return snapshot.etag(), snapshot.all
+        if len(parts) == 2 and parts[0] == "lines":
+            if not snapshot.has_line(parts[1]):
+                return None
+            return snapshot.etag(parts[1]), lambda: snapshot.line(parts[1])
+        if len(parts) == 2 and parts[0] == "trains":
+            return snapshot.etag(line_name), lambda: snapshot.train(parts[1], line_name)
+        if len(parts) == 2 and parts[0] == "stations":
+            return snapshot.etag(line_name), lambda: snapshot.station(parts[1], line_name)
+        return None
+
+    def _send(self, status, body, etag=None, content_type="application/json; charset=utf-8"):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        if body is not None:
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+        else:
+            self.send_header("Content-Length", "0")
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 폴링 요청마다 로그를 남기지 않음 (요청 수는 LiveSnapshot.end_cycle()로 집계)
+        pass
+
+
+class SnapshotServer:
+    """
+    LiveSnapshot을 로컬 HTTP/JSON으로 제공하는 서버 (데몬 스레드에서 실행)
+    대시보드는 DB나 서울시 API 호출 없이 이 서버를 자주 폴링할 수 있습니다.
+    """
+
+    def __init__(self, snapshot, host="127.0.0.1", port=8080):
+        """
+        Args:
+            snapshot (LiveSnapshot): 제공할 스냅샷
+            host (str): 바인딩 주소 (기본: 로컬 전용)
+            port (int): 포트 (0이면 빈 포트 자동 선택)
+        """
+        handler = type("SnapshotHandler", (_SnapshotHandler,), {"snapshot": snapshot})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """서버 스레드를 시작합니다."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="snapshot-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """서버를 종료합니다."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
@@ -0,0 +1,207 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from hashlib import blake2b
+
+# 로컬 저장 대기열 (write-ahead spool)
+# 작성 스레드가 DB에 보내기 전에 모든 배치를 SQLite(WAL 모드) 파일에 먼저 추가하고,
+# 별도 재전송 스레드(IngestPipeline)가 오래된 배치부터 멱등 upsert로 보낸 뒤에야 지웁니다.
+# Supabase 장애 중에도 수집분이 디스크에 남아 있다가 복구되면 순서대로 채워지고,
+# 전체 크기는 max_bytes로 제한되어 장애가 길어지면 가장 오래된 배치부터 버립니다.
+
+# 레코드 식별 키에 쓰는 컬럼 (같은 적재 시각의 같은 열차 상태 = 같은 행)
+KEY_COLUMNS = ("line_id", "train_number", "direction_type", "station_id", "train_status", "last_rec_time")
+
+
+def record_key(record):
+    """레코드 내용으로 만든 16자리 식별 키 (docs/migrations/004_add_record_key.sql)"""
+    raw = "\x1f".join(str(record.get(column)) for column in KEY_COLUMNS)
+    return blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def stamp_records(records, created_at=None):
+    """
+    레코드에 적재 시각(created_at)과 식별 키(record_key)를 붙인 사본을 만듭니다.
+    적재 시각을 DB 기본값(now()) 대신 대기열에 추가하는 시점에 정해 두므로, 장애 후 늦게 저장되어도 수집 시각이 유지되고
+    같은 배치를 다시 보내면 (created_at, record_key)가 같아 DB의 고유 인덱스로 중복이 걸러집니다.
+    원본 레코드는 실시간 분석기(스냅샷 등)가 참조하고 있으므로 수정하지 않습니다.
+
+    Args:
+        records (list): transform()으로 변환된 레코드 리스트
+        created_at (str, optional): 적재 시각 ISO 문자열 (기본: 현재 UTC 시각)
+
+    Returns:
+        list: created_at, record_key가 추가된 레코드 사본 리스트
+    """
+    created_at = created_at or datetime.now(timezone.utc).isoformat()
+    return [dict(record, created_at=record.get("created_at") or created_at,
+                 record_key=record.get("record_key") or record_key(record)) for record in records]
+
+
+class WriteAheadSpool:
+    """
+    SQLite 파일 기반의 추가 전용 배치 대기열
+    배치 하나 = 행 하나(zlib 압축 JSON)이며, seq 오름차순(추가 순서)으로 꺼내고 확인(ack)된 배치만 지웁니다.
+    적재 시각은 단일 작성 스레드가 append 직전에 붙이고(IngestPipeline._spool) 재전송은 seq 순서로 하므로,
+    created_at 순서와 DB 삽입 순서가 같아 로컬 저장소의 (created_at, id) 증분 동기화도 그대로 동작합니다.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 ** 2, compress_level=1):
+        """
+        Args:
+            path (str): SQLite 파일 경로
+            max_bytes (int): 보관할 배치 본문(압축 후)의 최대 합계 크기, 넘으면 오래된 배치부터 버림
+            compress_level (int): zlib 압축 수준 (1: 빠름, 9: 작음)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # auto_vacuum은 테이블 생성 전에만 적용됨 (확인된 배치를 지운 공간을 파일에서 반환하기 위해)
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # 추가는 주기당 몇 번뿐이므로 커밋마다 fsync (프로세스/OS가 죽어도 커밋된 배치는 남음)
+        self._conn.execute("PRAGMA synchronous=FULL")
+        # 체크포인트 후 WAL 파일을 이 크기로 줄임 (디스크 사용량 제한)
+        self._conn.execute("PRAGMA journal_size_limit=16777216")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS batches ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " spooled_at REAL NOT NULL,"
+            " rows INTEGER NOT NULL,"
+            " bytes INTEGER NOT NULL,"
+            " payload BLOB NOT NULL,"
+            " dead INTEGER NOT NULL DEFAULT 0)"  # 1: DB가 거부한 배치 (재전송하지 않고 보관만)
+        )
+        self.batches, self.rows, self.bytes, self.dead_rows = self._conn.execute(
+            "SELECT count(*), coalesce(sum(rows), 0), coalesce(sum(bytes), 0),"
+            " coalesce(sum(CASE WHEN dead THEN rows ELSE 0 END), 0) FROM batches"
+        ).fetchone()
+        self.evicted_rows = 0
+
+    def append(self, records):
+        """
+        배치를 대기열 끝에 추가합니다. 크기 제한을 넘으면 가장 오래된 배치(거부된 배치 먼저)를 버립니다.
+
+        Args:
+            records (list): stamp_records()를 거친 레코드 리스트
+
+        Returns:
+            int: 크기 제한 때문에 버린 행 수
+        """
+        if not records:
+            return 0
+        payload = zlib.compress(json.dumps(records, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+                                self.compress_level)
+        with self._lock:
+            self._conn.execute("INSERT INTO batches (spooled_at, rows, bytes, payload) VALUES (?, ?, ?, ?)",
+                               (time.time(), len(records), len(payload), payload))
+            self.batches += 1
+            self.rows += len(records)
+            self.bytes += len(payload)
+            return self._evict()
+
+    def _evict(self):
+        evicted = 0
+        while self.bytes > self.max_bytes and self.batches > 1:
+            seq, rows, size, dead = self._conn.execute(
+                "SELECT seq, rows, bytes, dead FROM batches ORDER BY dead DESC, seq LIMIT 1").fetchone()
+            self._conn.execute("DELETE FROM batches WHERE seq = ?", (seq,))
+            self._forget(rows, size, dead)
+            evicted += rows
+        if evicted:
+            self.evicted_rows += evicted
+            self._conn.execute("PRAGMA incremental_vacuum")
+        return evicted
+
+    def _forget(self, rows, size, dead):
+        self.batches -= 1
+        self.rows -= rows
+        self.bytes -= size
+        if dead:
+            self.dead_rows -= rows
+
+    def peek(self, max_rows):
+        """
+        재전송할 가장 오래된 배치들을 max_rows 건 안에서 꺼냅니다. (대기열에서 지우지는 않음)
+        첫 배치가 max_rows보다 커도 배치는 나누지 않고 그대로 반환합니다.
+
+        Returns:
+            tuple: (배치 seq 목록, 레코드 리스트), 보낼 배치가 없으면 ([], [])
+        """
+        with self._lock:
+            cursor = self._conn.execute("SELECT seq, rows, payload FROM batches WHERE dead = 0 ORDER BY seq")
+            seqs, records = [], []
+            for seq, rows, payload in cursor:
+                if records and len(records) + rows > max_rows:
+                    break
+                seqs.append(seq)
+                records.extend(json.loads(zlib.decompress(payload)))
+            cursor.close()
+        return seqs, records
+
+    def ack(self, seqs, dead=False):
+        """
+        재전송이 끝난 배치를 지웁니다.
+
+        Args:
+            seqs (list): peek()이 반환한 seq 목록
+            dead (bool): True이면 지우지 않고 거부된 배치로 표시 (잘못된 행 때문에 대기열이 막히지 않도록)
+        """
+        if not seqs:
+            return
+        marks = ",".join("?" * len(seqs))
+        with self._lock:
+            # peek() 이후 크기 제한으로 이미 버려진 배치가 있을 수 있으므로 남아 있는 배치 기준으로 계산
+            count, rows, size = self._conn.execute(
+                f"SELECT count(*), coalesce(sum(rows), 0), coalesce(sum(bytes), 0) FROM batches"
+                f" WHERE dead = 0 AND seq IN ({marks})", seqs).fetchone()
+            if dead:
+                self._conn.execute(f"UPDATE batches SET dead = 1 WHERE seq IN ({marks})", seqs)
+                self.dead_rows += rows
+                return
+            self._conn.execute(f"DELETE FROM batches WHERE seq IN ({marks})", seqs)
+            self.batches -= count
+            self.rows -= rows
+            self.bytes -= size
+            # 대기열이 비면 남은 빈 페이지를 파일에서 반환
+            if self.rows == self.dead_rows:
+                self._conn.execute("PRAGMA incremental_vacuum")
+
+    def pending_rows(self):
+        """재전송을 기다리는 행 수 (거부된 배치 제외)"""
+        with self._lock:
+            return self.rows - self.dead_rows
+
+    def depth(self):
+        """
+        대기열 현황
+
+        Returns:
+            dict: batches, rows(재전송 대기), dead_rows(거부됨), bytes(배치 본문 합계), file_bytes(SQLite + WAL 파일 크기),
+                oldest_age_seconds(가장 오래된 대기 배치의 경과 시간), evicted_rows(크기 제한으로 버린 누적 행 수)
+        """
+        with self._lock:
+            oldest = self._conn.execute("SELECT min(spooled_at) FROM batches WHERE dead = 0").fetchone()[0]
+            result = {
+                "batches": self.batches,
+                "rows": self.rows - self.dead_rows,
+                "dead_rows": self.dead_rows,
+                "bytes": self.bytes,
+                "evicted_rows": self.evicted_rows,
+            }
+        result["file_bytes"] = sum(os.path.getsize(self.path + suffix)
+                                   for suffix in ("", "-wal") if os.path.exists(self.path + suffix))
+        result["oldest_age_seconds"] = time.time() - oldest if oldest else 0.0
+        return result
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,234 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from src.schema import LOCAL_TZ, coerce_frame
+
+# 궤적 인덱스 구성에 필요한 컬럼
+TRAJECTORY_COLUMNS = [
+    'line_id', 'line_name', 'station_id', 'station_name', 'train_number',
+    'direction_type', 'dest_station_id', 'train_status', 'is_express', 'last_rec_time',
+]
+
+# 운행일 기준: 한국 시간 04:00 이전 기록은 전날 운행분 (자정 넘어 운행하는 막차 포함)
+SERVICE_DAY_START_HOUR = 4
+
+_NS_PER_DAY = 86400 * 10 ** 9
+_SERVICE_DAY_OFFSET_NS = (9 - SERVICE_DAY_START_HOUR) * 3600 * 10 ** 9  # UTC -> 한국 시간 -> 04시 기준
+_EPOCH_DATE = date(1970, 1, 1)
+
+
+def _epoch_ns(series):
+    """시각 컬럼을 epoch 나노초 정수 배열로 변환합니다."""
+    return series.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+
+def _category_codes(series, vocabulary):
+    """category 컬럼 값을 공통 어휘(vocabulary)의 위치 번호로 변환합니다. (값 없음: -1)"""
+    series = series.astype('category') if not isinstance(series.dtype, pd.CategoricalDtype) else series
+    lookup = vocabulary.get_indexer(series.cat.categories).astype(np.int32)
+    codes = series.cat.codes.to_numpy()
+    return np.where(codes >= 0, lookup[codes], -1).astype(np.int32)
+
+
+def service_day(ts):
+    """시각(Timestamp/datetime)이 속한 운행일(date)을 반환합니다."""
+    ts = pd.Timestamp(ts)
+    ts = ts.tz_localize(LOCAL_TZ) if ts.tzinfo is None else ts.tz_convert(LOCAL_TZ)
+    return (ts - pd.Timedelta(hours=SERVICE_DAY_START_HOUR)).date()
+
+
+class Trajectory:
+    """
+    열차 한 대의 하루 운행 궤적 (수신 시각 순)
+    인덱스가 가진 연속 배열의 구간을 그대로 가리키는 뷰이므로 만들 때 복사가 일어나지 않습니다.
+    """
+    __slots__ = ("key", "ts", "station", "dest", "direction", "status", "express", "_index")
+
+    def __init__(self, index, key, start, stop):
+        self.key = key
+        self.ts = index.ts[start:stop]
+        self.station = index.station[start:stop]
+        self.dest = index.dest[start:stop]
+        self.direction = index.direction[start:stop]
+        self.status = index.status[start:stop]
+        self.express = index.express[start:stop]
+        self._index = index
+
+    def __len__(self):
+        return len(self.ts)
+
+    def between(self, start=None, end=None):
+        """
+        [start, end) 구간의 관측 위치 범위를 이진 탐색으로 찾습니다.
+
+        Returns:
+            slice: 이 궤적 배열에 적용할 구간
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.ts, _to_ns(start), side='left'))
+        hi = len(self.ts) if end is None else int(np.searchsorted(self.ts, _to_ns(end), side='left'))
+        return slice(lo, hi)
+
+    def at(self, ts):
+        """주어진 시각 직전(같은 시각 포함)의 마지막 관측 위치 번호를 반환합니다. (없으면 None)"""
+        pos = int(np.searchsorted(self.ts, _to_ns(ts), side='right')) - 1
+        return pos if pos >= 0 else None
+
+    def to_frame(self):
+        """궤적을 DataFrame으로 변환합니다. (역 ID/이름, 방향, 상태, 수신 시각)"""
+        stations = self._index.stations
+        return pd.DataFrame({
+            'station_id': stations[self.station],
+            'station_name': self._index.station_names[self.station],
+            'direction_type': self.direction,
+            'dest_station_id': np.where(self.dest >= 0, stations[np.maximum(self.dest, 0)], None),
+            'train_status': self.status,
+            'is_express': self.express,
+            'last_rec_time': pd.to_datetime(self.ts, utc=True).tz_convert(LOCAL_TZ),
+        })
+
+
+class TrajectoryIndex:
+    """
+    열차별 운행 궤적 인덱스
+    위치 레코드를 (호선, 열차번호, 운행일, 수신 시각) 순으로 한 번만 정렬해 컬럼별 연속 배열로 보관하고,
+    열차 키 (line_id, train_number, 운행일)마다 배열 구간(start, stop)을 기록합니다.
+    - 열차 조회: 키 -> 구간 사전 조회 후 배열 뷰 반환 (정렬/전체 스캔 없음)
+    - 궤적 내 시간 구간 조회: 수신 시각 배열 이진 탐색 (O(log n))
+    열차번호는 호선 안에서만 고유하므로 키에 line_id를 함께 둡니다.
+
+    역 ID(station_id, dest_station_id)는 공통 어휘(stations)의 위치 번호로 저장하므로
+    현재 역과 종착역을 정수 비교만으로 맞춰 볼 수 있습니다.
+    """
+
+    def __init__(self, df):
+        """
+        Args:
+            df (pandas.DataFrame): TRAJECTORY_COLUMNS를 포함한 위치 레코드 (정렬 불필요)
+        """
+        df = coerce_frame(df)
+
+        station_col = df['station_id'].astype('category')
+        dest_col = df['dest_station_id'].astype('category') if 'dest_station_id' in df else None
+        vocabulary = station_col.cat.categories
+        if dest_col is not None:
+            vocabulary = vocabulary.union(dest_col.cat.categories)
+        self.stations = vocabulary.to_numpy()
+
+        line = df['line_id'].astype('category')
+        train = df['train_number'].astype('category')
+        line_codes = line.cat.codes.to_numpy()
+        train_codes = train.cat.codes.to_numpy()
+        ts = _epoch_ns(df['last_rec_time'])
+        day = (ts + _SERVICE_DAY_OFFSET_NS) // _NS_PER_DAY
+
+        # 한 번만 정렬 (np.lexsort는 마지막 키가 1순위)
+        order = np.lexsort((ts, day, train_codes, line_codes))
+        station_codes = _category_codes(station_col, vocabulary)
+        self.ts = ts[order]
+        self.station = station_codes[order]
+        self.dest = (_category_codes(dest_col, vocabulary)[order] if dest_col is not None
+                     else np.full(len(order), -1, dtype=np.int32))
+        self.direction = df['direction_type'].to_numpy()[order]
+        self.status = df['train_status'].to_numpy()[order] if 'train_status' in df else np.full(len(order), -1, np.int8)
+        self.express = df['is_express'].to_numpy()[order] if 'is_express' in df else np.full(len(order), -1, np.int8)
+
+        # 열차 키가 바뀌는 위치로 구간 경계 계산
+        line_sorted, train_sorted, day_sorted = line_codes[order], train_codes[order], day[order]
+        boundary = np.zeros(len(order), dtype=bool)
+        if len(order):
+            boundary[0] = True
+            boundary[1:] = ((line_sorted[1:] != line_sorted[:-1]) | (train_sorted[1:] != train_sorted[:-1])
+                            | (day_sorted[1:] != day_sorted[:-1]))
+        self.starts = np.flatnonzero(boundary)
+        self.stops = np.append(self.starts[1:], len(order)).astype(self.starts.dtype)
+
+        line_values = line.cat.categories.to_numpy()
+        train_values = train.cat.categories.to_numpy()
+        self.keys = [
+            (line_values[line_sorted[s]], train_values[train_sorted[s]],
+             _EPOCH_DATE + timedelta(days=int(day_sorted[s])))
+            for s in self.starts
+        ]
+        self._slices = {key: i for i, key in enumerate(self.keys)}
+
+        # 역 ID -> 역명 (stations와 같은 순서), 호선 ID -> 호선명 (보고용)
+        self.station_names = _name_lookup(df, station_codes, vocabulary, 'station_name')
+        self.line_names = {}
+        if 'line_name' in df:
+            pairs = pd.DataFrame({'id': line_codes, 'name': df['line_name'].astype('category').cat.codes.to_numpy()})
+            pairs = pairs.drop_duplicates('id')
+            names = df['line_name'].astype('category').cat.categories.to_numpy()
+            self.line_names = {line_values[i]: names[n] for i, n in zip(pairs['id'], pairs['name']) if i >= 0 and n >= 0}
+
+    @classmethod
+    def from_frames(cls, frames):
+        """DataFrame 여러 개(청크 이터레이터 등)를 이어 붙여 인덱스를 만듭니다."""
+        frames = list(frames)
+        if not frames:
+            return cls(pd.DataFrame(columns=TRAJECTORY_COLUMNS))
+        return cls(pd.concat(frames, ignore_index=True))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self._slices
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def get(self, line_id, train_number, day):
+        """
+        열차 한 대의 운행일 궤적을 반환합니다.
+
+        Args:
+            line_id (str): 호선 ID (예: '1002')
+            train_number (str): 열차번호
+            day (datetime.date | str): 운행일 (04시 기준, 예: '2026-01-07')
+
+        Returns:
+            Trajectory | None: 궤적 (없으면 None)
+        """
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        i = self._slices.get((str(line_id), str(train_number), day))
+        if i is None:
+            return None
+        return Trajectory(self, self.keys[i], int(self.starts[i]), int(self.stops[i]))
+
+    def trajectories(self):
+        """모든 궤적을 키 순서대로 순회합니다."""
+        for i, key in enumerate(self.keys):
+            yield Trajectory(self, key, int(self.starts[i]), int(self.stops[i]))
+
+    def segment_ids(self):
+        """정렬된 배열의 각 행이 속한 궤적 번호 (keys 위치) 배열"""
+        return np.repeat(np.arange(len(self.keys)), self.stops - self.starts)
+
+    def memory_bytes(self):
+        """인덱스 배열이 차지하는 메모리(바이트)"""
+        arrays = (self.ts, self.station, self.dest, self.direction, self.status, self.express, self.starts, self.stops)
+        return sum(a.nbytes for a in arrays)
+
+
+def _name_lookup(df, station_codes, vocabulary, name_col):
+    """공통 역 어휘 순서대로 역명 배열을 만듭니다. (이름을 모르는 역은 ID로 채움)"""
+    names = vocabulary.to_numpy().astype(object)
+    if name_col not in df:
+        return names
+    name_cat = df[name_col].astype('category')
+    pairs = pd.DataFrame({
+        'station': station_codes,
+        'name': name_cat.cat.codes.to_numpy(),
+    }).drop_duplicates('station')
+    pairs = pairs[(pairs['station'] >= 0) & (pairs['name'] >= 0)]
+    names[pairs['station'].to_numpy()] = name_cat.cat.categories.to_numpy()[pairs['name'].to_numpy()]
+    return names
+
+
+def _to_ns(value):
+    """시각(Timestamp/datetime/문자열, 시간대 없으면 한국 시간)을 epoch 나노초로 변환합니다."""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(LOCAL_TZ)
+    return ts.value
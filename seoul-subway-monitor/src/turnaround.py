@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from src import metrics
+from src.local_store import load_frames
+from src.schema import LOCAL_TZ
+from src.trajectory import TRAJECTORY_COLUMNS, TrajectoryIndex
+
+# 출발 상태 코드 (train_status: 0:진입, 1:도착, 2:출발)
+DEPART_STATUS = 2
+
+TURNAROUND_COLUMNS = [
+    'line_id', 'line_name', 'train_number', 'service_day', 'station_id', 'station_name',
+    'arrival_direction', 'is_express', 'arrival_time', 'departure_time', 'turnaround_seconds',
+]
+
+
+@metrics.ANALYSIS_SECONDS.timed(step="turnaround.detect")
+def detect_turnarounds(index, max_turnaround_seconds=3600):
+    """
+    궤적 인덱스에서 종착역 회차를 찾아 회차 소요 시간을 계산합니다. (모든 열차를 배열 연산으로 한 번에 처리)
+    - 도착: 열차가 자신의 종착역(dest_station_id)에 처음 관측된 시점
+    - 출발: 그 이후 반대 방향(direction_type)으로 처음 출발(train_status=2)하거나 다른 역으로 이동한 시점
+
+    Args:
+        index (TrajectoryIndex): 열차별 궤적 인덱스
+        max_turnaround_seconds (float): 이보다 오래 걸린 회차는 운행 종료(입고)로 보고 제외
+
+    Returns:
+        pandas.DataFrame: 회차 이벤트 (TURNAROUND_COLUMNS)
+    """
+    n = len(index.ts)
+    if n == 0:
+        return pd.DataFrame(columns=TURNAROUND_COLUMNS)
+
+    seg = index.segment_ids()
+    station, dest, direction, ts = index.station, index.dest, index.direction, index.ts
+
+    same_train = np.zeros(n, dtype=bool)
+    same_train[1:] = seg[1:] == seg[:-1]
+    same_station = np.zeros(n, dtype=bool)
+    same_station[1:] = same_train[1:] & (station[1:] == station[:-1])
+
+    # 종착역 도착: 종착역에 있는 관측 중 직전 관측이 같은 역, 같은 방향의 종착역 관측이 아닌 행
+    at_terminal = (dest >= 0) & (station == dest)
+    stayed = np.zeros(n, dtype=bool)
+    stayed[1:] = same_station[1:] & at_terminal[:-1] & (direction[1:] == direction[:-1])
+    arrivals = np.flatnonzero(at_terminal & ~stayed)
+
+    # 출발 후보: 출발 상태이거나 직전 관측과 역이 달라진 행
+    candidate = (index.status == DEPART_STATUS) | ~same_station
+
+    # 도착 방향별로 반대 방향 출발 후보 중 도착 직후 첫 행을 이진 탐색
+    departures = np.full(len(arrivals), -1, dtype=np.int64)
+    arrival_direction = direction[arrivals]
+    for d in np.unique(arrival_direction):
+        positions = np.flatnonzero(candidate & (direction != d) & (direction >= 0))
+        selected = arrival_direction == d
+        k = np.searchsorted(positions, arrivals[selected], side='right')
+        found = np.full(len(k), -1, dtype=np.int64)
+        ok = k < len(positions)
+        found[ok] = positions[k[ok]]
+        departures[selected] = found
+
+    matched = departures >= 0
+    matched[matched] = seg[departures[matched]] == seg[arrivals[matched]]
+    arrivals, departures = arrivals[matched], departures[matched]
+
+    seconds = (ts[departures] - ts[arrivals]) / 1e9
+    keep = seconds <= max_turnaround_seconds
+    arrivals, departures, seconds = arrivals[keep], departures[keep], seconds[keep]
+
+    # 같은 출발에 연결된 도착이 여럿이면 가장 이른 도착만 사용
+    departures, first = np.unique(departures, return_index=True)
+    arrivals, seconds = arrivals[first], seconds[first]
+
+    keys = np.array(index.keys, dtype=object).reshape(-1, 3)[seg[arrivals]]
+    line_ids = keys[:, 0] if len(keys) else np.array([], dtype=object)
+    return pd.DataFrame({
+        'line_id': line_ids,
+        'line_name': [index.line_names.get(line_id) for line_id in line_ids],
+        'train_number': keys[:, 1] if len(keys) else [],
+        'service_day': keys[:, 2] if len(keys) else [],
+        'station_id': index.stations[station[arrivals]],
+        'station_name': index.station_names[station[arrivals]],
+        'arrival_direction': direction[arrivals],
+        'is_express': index.express[arrivals],
+        'arrival_time': pd.to_datetime(ts[arrivals], utc=True).tz_convert(LOCAL_TZ),
+        'departure_time': pd.to_datetime(ts[departures], utc=True).tz_convert(LOCAL_TZ),
+        'turnaround_seconds': seconds,
+    }, columns=TURNAROUND_COLUMNS).sort_values('arrival_time', ignore_index=True)
+
+
+@metrics.ANALYSIS_SECONDS.timed(step="turnaround.summarize_terminals")
+def summarize_terminals(turnarounds):
+    """
+    종착역/도착 방향별 회차 소요 시간 요약 (횟수, 중앙값, 평균, 90분위, 최댓값)
+
+    Returns:
+        pandas.DataFrame: 중앙값이 긴 순으로 정렬된 요약
+    """
+    grouped = turnarounds.groupby(['line_name', 'station_name', 'arrival_direction'], observed=True)['turnaround_seconds']
+    summary = grouped.agg(['size', 'median', 'mean']).reset_index()
+    summary['p90'] = grouped.quantile(0.9).to_numpy()
+    summary['max'] = grouped.max().to_numpy()
+    summary = summary.rename(columns={
+        'size': 'turnarounds', 'median': 'median_seconds', 'mean': 'mean_seconds',
+        'p90': 'p90_seconds', 'max': 'max_seconds',
+    })
+    return summary.sort_values('median_seconds', ascending=False, ignore_index=True)
+
+
+def analyze_turnaround(hours=24):
+    """
+    최근 데이터로 종착역 회차 소요 시간을 분석하고 회차가 오래 걸리는 종착역을 보고합니다.
+
+    Args:
+        hours (float): 분석할 최근 시간 범위(시간)
+    """
+    print("=== 3. 회차 효율성 분석 ===")
+    start = datetime.now() - timedelta(hours=hours)
+    frames = list(load_frames(start=start, columns=TRAJECTORY_COLUMNS))
+    if not frames:
+        print("[오류] 분석할 데이터가 없습니다.")
+        return
+
+    index = TrajectoryIndex.from_frames(frames)
+    print(f"총 {len(index.ts)}건의 데이터로 열차 궤적 {len(index)}개를 구성했습니다.")
+
+    turnarounds = detect_turnarounds(index)
+    if turnarounds.empty:
+        print("[결과] 회차 이벤트가 없습니다.")
+        return
+
+    summary = summarize_terminals(turnarounds)
+    print(f"\n[분석 결과] 회차 {len(turnarounds)}건, 중앙값 {turnarounds['turnaround_seconds'].median() / 60:.1f}분")
+
+    print("\n[회차 소요 시간 Top 20 종착역]")
+    print(f"{'호선':<10} | {'종착역':<12} | {'방향':<4} | {'횟수':<4} | {'중앙값(분)':<10} | {'90분위(분)':<10} | {'최대(분)':<8}")
+    print("-" * 80)
+    for _, row in summary.head(20).iterrows():
+        print(f"{row['line_name']:<10} | {row['station_name']:<12} | {row['arrival_direction']:<4} | {row['turnarounds']:<4} | "
+              f"{row['median_seconds'] / 60:<10.1f} | {row['p90_seconds'] / 60:<10.1f} | {row['max_seconds'] / 60:<8.1f}")
+
+    output_file = "analysis_result_turnaround.csv"
+    turnarounds.to_csv(output_file, index=False, encoding='utf-8-sig')
+    print(f"\n회차 이벤트가 '{output_file}'에 저장되었습니다.")
+
+
+if __name__ == "__main__":
+    analyze_turnaround()